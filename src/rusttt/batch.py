@@ -0,0 +1,115 @@
+"""Legal-move generation over many positions at once.
+
+A batch is an ``(N, 12) uint64`` array of boards, indexed like ``piece_array``,
+plus three length-``N`` arrays: side to move (non-zero for white), castle rights
+mask and en passant square. The compiled kernels split the positions across
+threads with ``prange`` and run the same ``generate_moves`` the perft engine
+uses on every row. Counting never leaves compiled code. Move lists come back
+flattened: position ``i`` owns ``moves[offsets[i]:offsets[i + 1]]``.
+"""
+
+from collections.abc import Iterable
+
+import numpy as np
+from numba import njit, prange
+
+from rusttt.jit import MAX_MOVES, STATE_CASTLE, STATE_EP, STATE_SIZE, STATE_WHITE_TO_PLAY, generate_moves
+from rusttt.logic import Position
+
+# Positions handled per parallel work item, so scratch buffers are allocated per chunk, not per position.
+BATCH_CHUNK = 1024
+
+
+@njit(cache=True)
+def _load_state(state, white_to_play, castle_rights, en_passant, index):
+    state[STATE_WHITE_TO_PLAY] = 1 if white_to_play[index] else 0
+    state[STATE_CASTLE] = castle_rights[index]
+    state[STATE_EP] = en_passant[index]
+
+
+@njit(cache=True, parallel=True)
+def _batch_count(boards, white_to_play, castle_rights, en_passant, counts):
+    size = boards.shape[0]
+    for chunk in prange((size + BATCH_CHUNK - 1) // BATCH_CHUNK):
+        state = np.empty(STATE_SIZE, dtype=np.int64)
+        buffer = np.empty(MAX_MOVES, dtype=np.int32)
+        for index in range(chunk * BATCH_CHUNK, min(size, (chunk + 1) * BATCH_CHUNK)):
+            _load_state(state, white_to_play, castle_rights, en_passant, index)
+            counts[index] = generate_moves(boards[index], state, buffer)
+
+
+@njit(cache=True, parallel=True)
+def _batch_fill(boards, white_to_play, castle_rights, en_passant, offsets, moves):
+    size = boards.shape[0]
+    for chunk in prange((size + BATCH_CHUNK - 1) // BATCH_CHUNK):
+        state = np.empty(STATE_SIZE, dtype=np.int64)
+        for index in range(chunk * BATCH_CHUNK, min(size, (chunk + 1) * BATCH_CHUNK)):
+            _load_state(state, white_to_play, castle_rights, en_passant, index)
+            # The slice is exactly as long as the count pass found, so it doubles as the buffer.
+            generate_moves(boards[index], state, moves[offsets[index] : offsets[index + 1]])
+
+
+def _batch_inputs(
+    boards: np.ndarray,
+    white_to_play: np.ndarray,
+    castle_rights: np.ndarray,
+    en_passant: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    boards = np.ascontiguousarray(boards, dtype=np.uint64)
+    if boards.ndim != 2 or boards.shape[1] != 12:
+        msg = f"Expected an (N, 12) board array, got shape {boards.shape}"
+        raise ValueError(msg)
+    columns = tuple(
+        np.ascontiguousarray(column, dtype=np.int64) for column in (white_to_play, castle_rights, en_passant)
+    )
+    for name, column in zip(("white_to_play", "castle_rights", "en_passant"), columns, strict=True):
+        if column.shape != (boards.shape[0],):
+            msg = f"Expected {name} of shape ({boards.shape[0]},), got {column.shape}"
+            raise ValueError(msg)
+    return boards, *columns
+
+
+def batch_arrays(positions: Iterable[Position]) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Return the ``(boards, white_to_play, castle_rights, en_passant)`` batch for ``positions``."""
+
+    positions = list(positions)
+    boards = np.array([position.piece_array for position in positions], dtype=np.uint64).reshape(-1, 12)
+    white_to_play = np.array([position.white_to_play for position in positions], dtype=np.int64)
+    castle_rights = np.array([position.castle_rights for position in positions], dtype=np.int64)
+    en_passant = np.array([position.ep for position in positions], dtype=np.int64)
+    return boards, white_to_play, castle_rights, en_passant
+
+
+def batch_count_moves(
+    boards: np.ndarray,
+    white_to_play: np.ndarray,
+    castle_rights: np.ndarray,
+    en_passant: np.ndarray,
+) -> np.ndarray:
+    """Return the number of legal moves of every position as an ``int64[N]`` array."""
+
+    boards, white_to_play, castle_rights, en_passant = _batch_inputs(boards, white_to_play, castle_rights, en_passant)
+    counts = np.empty(boards.shape[0], dtype=np.int64)
+    _batch_count(boards, white_to_play, castle_rights, en_passant, counts)
+    return counts
+
+
+def batch_generate_moves(
+    boards: np.ndarray,
+    white_to_play: np.ndarray,
+    castle_rights: np.ndarray,
+    en_passant: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return ``(moves, offsets)``: every position's packed legal moves, concatenated.
+
+    ``offsets`` has ``N + 1`` entries and position ``i`` owns ``moves[offsets[i]:offsets[i + 1]]``.
+    """
+
+    boards, white_to_play, castle_rights, en_passant = _batch_inputs(boards, white_to_play, castle_rights, en_passant)
+    counts = np.empty(boards.shape[0], dtype=np.int64)
+    _batch_count(boards, white_to_play, castle_rights, en_passant, counts)
+    offsets = np.zeros(boards.shape[0] + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    moves = np.empty(offsets[-1], dtype=np.int32)
+    _batch_fill(boards, white_to_play, castle_rights, en_passant, offsets, moves)
+    return moves, offsets
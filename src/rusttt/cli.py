@@ -1,9 +1,19 @@
 from __future__ import annotations
 
+from pathlib import Path
+
 import click
 from structlog.stdlib import get_logger
 
-from rusttt.logic import print_board, run_perft_inline, set_starting_position
+from rusttt.constants import STARTING_FEN
+from rusttt.copymake import DEFAULT_STRATEGY, PERFT_STRATEGIES, run_perft_copy_make
+from rusttt.logic import (
+    PERFT_REPLACEMENT_POLICIES,
+    Position,
+    print_board,
+    run_perft_hashed,
+    run_perft_inline,
+)
 
 logger = get_logger(__name__)
 
@@ -17,10 +27,175 @@ def cli(ctx: click.Context) -> None:
         click.echo(ctx.get_help())
 
 
+def load_fen(fen: str) -> Position:
+    try:
+        return Position.from_fen(fen)
+    except ValueError as error:
+        raise click.BadParameter(str(error), param_hint="--fen") from error
+
+
+fen_option = click.option("--fen", default=STARTING_FEN, show_default="start position", help="Position to search from.")
+
+
 @cli.command()
-def run() -> None:
-    set_starting_position()
-    print_board()
+@fen_option
+def run(fen: str) -> None:
+    position = load_fen(fen)
+    print_board(position)
 
-    run_perft_inline(6)
+    run_perft_inline(position, 6)
     # RunPerftInlineStruct(6)  # noqa: ERA001
+
+
+@cli.command()
+@click.option("--depth", default=6, show_default=True, help="Number of plies to search.")
+@click.option(
+    "--backend",
+    type=click.Choice(["numba", "python"]),
+    default="numba",
+    show_default=True,
+    help="Move generator to count with.",
+)
+@click.option(
+    "--hash-mb",
+    type=float,
+    default=None,
+    help="Reuse transposed subtrees through a perft table of this many MB (python backend).",
+)
+@click.option(
+    "--hash-policy",
+    type=click.Choice(PERFT_REPLACEMENT_POLICIES),
+    default="depth-preferred",
+    show_default=True,
+    help="Which entry wins when two positions share a perft table slot.",
+)
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Worker processes to split the tree across.",
+)
+@click.option(
+    "--strategy",
+    type=click.Choice(PERFT_STRATEGIES),
+    default=None,
+    help="Undo moves in place or copy the board per node.  [default: fastest for the backend]",
+)
+@click.option(
+    "--detailed",
+    is_flag=True,
+    help="Break the leaves down into captures, e.p., castles, promotions, checks and mates (numba backend).",
+)
+@fen_option
+def perft(
+    fen: str,
+    depth: int,
+    backend: str,
+    hash_mb: float | None,
+    hash_policy: str,
+    jobs: int,
+    strategy: str | None,
+    detailed: bool,
+) -> None:
+    """Run perft and print the per-move divide."""
+    position = load_fen(fen)
+
+    if strategy is not None and (jobs > 1 or hash_mb is not None):
+        msg = "--strategy cannot be combined with --jobs or --hash-mb"
+        raise click.UsageError(msg)
+    copy_make = (strategy or DEFAULT_STRATEGY[backend]) == "copy-make"
+
+    if detailed:
+        if backend != "numba" or jobs > 1 or hash_mb is not None or strategy is not None:
+            msg = "--detailed is only supported with --backend numba on its own"
+            raise click.UsageError(msg)
+        from rusttt.jit import run_perft_detailed
+
+        run_perft_detailed(position, depth)
+        return
+
+    if jobs > 1:
+        if hash_mb is not None:
+            msg = "--hash-mb cannot be combined with --jobs"
+            raise click.UsageError(msg)
+        # Imported here so single-process runs skip the pool machinery.
+        from rusttt.parallel import run_perft_parallel
+
+        run_perft_parallel(position, depth, jobs, backend)
+        return
+
+    if hash_mb is not None:
+        if backend != "python":
+            msg = "--hash-mb is only supported with --backend python"
+            raise click.UsageError(msg)
+        run_perft_hashed(position, depth, hash_mb, hash_policy)
+        return
+
+    if backend == "python":
+        if copy_make:
+            run_perft_copy_make(position, depth)
+        else:
+            run_perft_inline(position, depth)
+        return
+
+    # Imported here so commands that do not need it skip numba start-up.
+    from rusttt.jit import run_perft_jit
+
+    run_perft_jit(position, depth, copy_make)
+
+
+@cli.command()
+@click.option("--depth", type=click.IntRange(min=1), default=None, help="Deepest iteration to search.")
+@click.option("--nodes", type=click.IntRange(min=1), default=None, help="Stop after about this many nodes.")
+@click.option(
+    "--movetime", type=click.FloatRange(min=0, min_open=True), default=None, help="Stop after this many seconds."
+)
+@click.option(
+    "--hash-mb",
+    type=click.FloatRange(min=0, min_open=True),
+    default=16,
+    show_default=True,
+    help="Transposition table budget; the table never grows past it.",
+)
+@fen_option
+def search(fen: str, depth: int | None, nodes: int | None, movetime: float | None, hash_mb: float) -> None:
+    """Search for the best move, printing depth, score, nodes, nps and PV per iteration."""
+    from rusttt.search import DEFAULT_DEPTH, run_search
+
+    position = load_fen(fen)
+    if depth is None and nodes is None and movetime is None:
+        depth = DEFAULT_DEPTH
+    try:
+        run_search(position, depth, nodes, movetime, hash_mb)
+    except ValueError as error:
+        raise click.BadParameter(str(error), param_hint="--hash-mb") from error
+
+
+@cli.command("perft-suite")
+@click.argument("epd_file", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option("--max-depth", type=click.IntRange(min=1), default=None, help="Skip expected counts deeper than this.")
+@click.option(
+    "--backend",
+    type=click.Choice(["numba", "python"]),
+    default="numba",
+    show_default=True,
+    help="Move generator to count with.",
+)
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Worker processes to check positions on.  [default: CPU count]",
+)
+@click.pass_context
+def perft_suite(ctx: click.Context, epd_file: Path, max_depth: int | None, backend: str, jobs: int | None) -> None:
+    """Check every position in an EPD perft suite against its D1..Dn node counts."""
+    from rusttt.suite import run_perft_suite
+
+    try:
+        all_passed = run_perft_suite(epd_file, jobs, max_depth, backend)
+    except ValueError as error:
+        raise click.ClickException(str(error)) from error
+    if not all_passed:
+        ctx.exit(1)
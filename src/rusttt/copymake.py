@@ -0,0 +1,175 @@
+"""Copy-make perft over a compact board.
+
+Instead of applying a move to one shared ``Position`` and undoing it on the way
+back, every child is a fresh copy of its parent with the move's deltas XORed in.
+Nothing has to be remembered for the undo, at the price of one copy per node.
+
+The compact board is a flat list of ints: the 12 piece bitboards indexed like
+``piece_array``, the white, black and combined occupancies, and the rest of the
+position packed into one state int (see ``pack_state``). Which strategy wins
+depends on the backend: copying a 16-element list is cheap next to the Python
+bookkeeping that ``apply_move``/``undo_move`` do, whereas numba's in-place
+make/unmake barely allocates at all.
+"""
+
+import time
+
+from rusttt.constants import BP, CASTLE_ALL, NO_SQUARE, SQUARE_BBS, WP
+from rusttt.logic import (
+    CASTLE_MASK,
+    MOVE_PIECE_SHIFT,
+    MOVE_TAG_EFFECTS,
+    MOVE_TAG_SHIFT,
+    MOVE_TARGET_SHIFT,
+    Position,
+    count_moves_from_state,
+    decode_move,
+    generate_packed_moves_from_state,
+    print_move_no_nl,
+)
+
+PERFT_STRATEGIES: tuple[str, ...] = ("make-unmake", "copy-make")
+# Faster strategy per backend, from start position and Kiwipete perft timings.
+DEFAULT_STRATEGY: dict[str, str] = {"numba": "make-unmake", "python": "copy-make"}
+
+WHITE_OCCUPANCY = 12
+BLACK_OCCUPANCY = 13
+OCCUPANCY = 14
+STATE = 15
+BOARD_SIZE = 16
+
+STATE_CASTLE_SHIFT = 1
+STATE_EP_SHIFT = 5
+
+
+def pack_state(white_to_play: bool, castle: int, ep: int) -> int:
+    """Pack side to move (bit 0), castle rights (bits 1-4) and the ep square (bits 5+)."""
+
+    return int(white_to_play) | castle << STATE_CASTLE_SHIFT | ep << STATE_EP_SHIFT
+
+
+def compact_board(position: Position) -> list[int]:
+    """Return the compact copy-make board for ``position``."""
+
+    return [
+        *position.piece_array,
+        position.white_occupancy,
+        position.black_occupancy,
+        position.occupancy,
+        pack_state(position.white_to_play, position.castle_rights, position.ep),
+    ]
+
+
+def to_position(board: list[int]) -> Position:
+    """Return a ``Position`` for a compact board; the move counters start fresh."""
+
+    state = board[STATE]
+    position = Position()
+    position.piece_array = board[:12]
+    position.white_to_play = bool(state & 1)
+    position.castle_rights = (state >> STATE_CASTLE_SHIFT) & CASTLE_ALL
+    position.ep = state >> STATE_EP_SHIFT
+    position.refresh()
+    return position
+
+
+def generate_board_moves(board: list[int], moves: list[int]) -> list[int]:
+    """Append the packed legal moves for a compact board to ``moves`` and return it."""
+
+    state = board[STATE]
+    return generate_packed_moves_from_state(
+        board,
+        bool(state & 1),
+        (state >> STATE_CASTLE_SHIFT) & CASTLE_ALL,
+        state >> STATE_EP_SHIFT,
+        board[WHITE_OCCUPANCY],
+        board[BLACK_OCCUPANCY],
+        moves,
+    )
+
+
+def make_child(board: list[int], move: int) -> list[int]:
+    """Return a new compact board with the packed ``move`` played; ``board`` is left untouched."""
+
+    child = board.copy()
+    starting = move & 63
+    target = (move >> MOVE_TARGET_SHIFT) & 63
+    tag = (move >> MOVE_TAG_SHIFT) & 31
+    piece = move >> MOVE_PIECE_SHIFT
+    start_mask = SQUARE_BBS[starting]
+    target_mask = SQUARE_BBS[target]
+    state = board[STATE]
+
+    if state & 1:
+        own_occupancy, enemy_occupancy, enemy_base = WHITE_OCCUPANCY, BLACK_OCCUPANCY, BP
+    else:
+        own_occupancy, enemy_occupancy, enemy_base = BLACK_OCCUPANCY, WHITE_OCCUPANCY, WP
+
+    if board[enemy_occupancy] & target_mask:
+        for index in range(enemy_base, enemy_base + 6):
+            if board[index] & target_mask:
+                child[index] ^= target_mask
+                break
+        child[enemy_occupancy] ^= target_mask
+
+    promoted_piece, ep_victim, ep_victim_offset, rook, rook_from, rook_to, ep_offset = MOVE_TAG_EFFECTS[tag]
+    child[piece] ^= start_mask
+    child[piece if promoted_piece < 0 else promoted_piece] ^= target_mask
+    child[own_occupancy] ^= start_mask | target_mask
+
+    if ep_victim >= 0:
+        victim_mask = SQUARE_BBS[target + ep_victim_offset]
+        child[ep_victim] ^= victim_mask
+        child[enemy_occupancy] ^= victim_mask
+    elif rook >= 0:
+        rook_mask = SQUARE_BBS[rook_from] | SQUARE_BBS[rook_to]
+        child[rook] ^= rook_mask
+        child[own_occupancy] ^= rook_mask
+    ep = target + ep_offset if ep_offset else NO_SQUARE
+
+    child[OCCUPANCY] = child[WHITE_OCCUPANCY] | child[BLACK_OCCUPANCY]
+    castle = (state >> STATE_CASTLE_SHIFT) & CASTLE_MASK[starting] & CASTLE_MASK[target]
+    child[STATE] = ((state & 1) ^ 1) | castle << STATE_CASTLE_SHIFT | ep << STATE_EP_SHIFT
+    return child
+
+
+def perft_copy_make(board: list[int], depth: int) -> int:
+    """Count leaf nodes ``depth`` plies below a compact board."""
+
+    if depth <= 0:
+        return 1
+    state = board[STATE]
+    if depth == 1:
+        return count_moves_from_state(
+            board,
+            bool(state & 1),
+            (state >> STATE_CASTLE_SHIFT) & CASTLE_ALL,
+            state >> STATE_EP_SHIFT,
+            board[WHITE_OCCUPANCY],
+            board[BLACK_OCCUPANCY],
+        )
+
+    nodes = 0
+    for move in generate_board_moves(board, []):
+        nodes += perft_copy_make(make_child(board, move), depth - 1)
+    return nodes
+
+
+def run_perft_copy_make(position: Position, depth: int) -> int:
+    board = compact_board(position)
+    timestamp_start = time.monotonic_ns()
+
+    nodes = 0
+    for move in generate_board_moves(board, []):
+        move_nodes = perft_copy_make(make_child(board, move), depth - 1)
+        starting, target, tag, _piece = decode_move(move)
+        print_move_no_nl(starting, target, tag)
+        print(f": {move_nodes}")
+        nodes += move_nodes
+
+    timestamp_end = time.monotonic_ns()
+    elapsed = timestamp_end - timestamp_start
+
+    print(f"Nodes: {nodes}")
+    print(f"Elapsed time: {elapsed / 1_000_000} ms")
+    return nodes
@@ -0,0 +1,786 @@
+"""Numba-compiled perft over flat ``uint64`` board arrays.
+
+The board is a ``numpy.uint64[12]`` array indexed like ``piece_array`` and the
+rest of the position lives in a small ``int64`` state array (see ``STATE_*``).
+Moves are packed into ``int32`` values (``from | to << 6 | tag << 12 | piece << 17``)
+and written into a preallocated ``(ply, MAX_MOVES)`` buffer, so the compiled
+search does not allocate per node.
+"""
+
+import time
+from dataclasses import astuple, dataclass
+
+import numpy as np
+from numba import njit
+
+from rusttt import magic
+from rusttt.constants import (
+    A1,
+    A8,
+    BISHOP_ATTACKS,
+    BISHOP_DOWN_LEFT,
+    BISHOP_DOWN_RIGHT,
+    BISHOP_UP_LEFT,
+    BISHOP_UP_RIGHT,
+    BKS_EMPTY_BITBOARD,
+    BLACK_PAWN_ATTACKS,
+    BQS_EMPTY_BITBOARD,
+    C1,
+    C8,
+    CASTLE_BKS,
+    CASTLE_BQS,
+    CASTLE_WKS,
+    CASTLE_WQS,
+    D1,
+    D8,
+    E1,
+    E8,
+    F1,
+    F8,
+    G1,
+    G8,
+    H1,
+    H8,
+    INBETWEEN_BITBOARDS,
+    KING_ATTACKS,
+    KNIGHT_ATTACKS,
+    NO_SQUARE,
+    RANK_2_BITBOARD,
+    RANK_4_BITBOARD,
+    RANK_5_BITBOARD,
+    RANK_7_BITBOARD,
+    ROOK_ATTACKS,
+    ROOK_DOWN,
+    ROOK_LEFT,
+    ROOK_RIGHT,
+    ROOK_UP,
+    TAG_B_BISHOP_PROMOTION,
+    TAG_B_CAPTURE_BISHOP_PROMOTION,
+    TAG_B_CAPTURE_KNIGHT_PROMOTION,
+    TAG_B_CAPTURE_QUEEN_PROMOTION,
+    TAG_B_CAPTURE_ROOK_PROMOTION,
+    TAG_B_KNIGHT_PROMOTION,
+    TAG_B_QUEEN_PROMOTION,
+    TAG_B_ROOK_PROMOTION,
+    TAG_BCASTLEKS,
+    TAG_BCASTLEQS,
+    TAG_BLACKEP,
+    TAG_CAPTURE,
+    TAG_CHECK_CAPTURE,
+    TAG_DOUBLE_PAWN_BLACK,
+    TAG_DOUBLE_PAWN_WHITE,
+    TAG_NONE,
+    TAG_W_BISHOP_PROMOTION,
+    TAG_W_CAPTURE_BISHOP_PROMOTION,
+    TAG_W_CAPTURE_KNIGHT_PROMOTION,
+    TAG_W_CAPTURE_QUEEN_PROMOTION,
+    TAG_W_CAPTURE_ROOK_PROMOTION,
+    TAG_W_KNIGHT_PROMOTION,
+    TAG_W_QUEEN_PROMOTION,
+    TAG_W_ROOK_PROMOTION,
+    TAG_WCASTLEKS,
+    TAG_WCASTLEQS,
+    TAG_WHITEEP,
+    WHITE_PAWN_ATTACKS,
+    WKS_EMPTY_BITBOARD,
+    WQS_EMPTY_BITBOARD,
+)
+from rusttt.logic import CASTLE_MASK, DEBRUIJN64, MAGIC, Position, decode_move, print_move_no_nl
+
+MAX_PLY = 64
+MAX_MOVES = 256
+
+STATE_WHITE_TO_PLAY = 0
+STATE_CASTLE = 1
+STATE_EP = 2
+STATE_SIZE = 3
+
+# Counters of perft_detailed, in PerftStats field order.
+STAT_NODES = 0
+STAT_CAPTURES = 1
+STAT_EN_PASSANT = 2
+STAT_CASTLES = 3
+STAT_PROMOTIONS = 4
+STAT_CHECKS = 5
+STAT_DISCOVERED_CHECKS = 6
+STAT_DOUBLE_CHECKS = 7
+STAT_CHECKMATES = 8
+STATS_SIZE = 9
+
+_ZERO = np.uint64(0)
+_ONE = np.uint64(1)
+_ALL = np.uint64((1 << 64) - 1)
+_DEBRUIJN_MAGIC = np.uint64(MAGIC)
+_DEBRUIJN_SHIFT = np.uint64(58)
+
+_RANK_2 = np.uint64(RANK_2_BITBOARD)
+_RANK_4 = np.uint64(RANK_4_BITBOARD)
+_RANK_5 = np.uint64(RANK_5_BITBOARD)
+_RANK_7 = np.uint64(RANK_7_BITBOARD)
+_WKS_EMPTY = np.uint64(WKS_EMPTY_BITBOARD)
+_WQS_EMPTY = np.uint64(WQS_EMPTY_BITBOARD)
+_BKS_EMPTY = np.uint64(BKS_EMPTY_BITBOARD)
+_BQS_EMPTY = np.uint64(BQS_EMPTY_BITBOARD)
+
+_M1 = np.uint64(0x5555555555555555)
+_M2 = np.uint64(0x3333333333333333)
+_M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+_H01 = np.uint64(0x0101010101010101)
+
+DEBRUIJN_INDEX = np.array(DEBRUIJN64, dtype=np.int64)
+SQUARE_BB = np.array([1 << square for square in range(64)], dtype=np.uint64)
+KING_TABLE = np.array(KING_ATTACKS, dtype=np.uint64)
+KNIGHT_TABLE = np.array(KNIGHT_ATTACKS, dtype=np.uint64)
+# Indexed by the colour of the pawn: 0 for white, 1 for black.
+PAWN_TABLE = np.array([WHITE_PAWN_ATTACKS, BLACK_PAWN_ATTACKS], dtype=np.uint64)
+INBETWEEN_TABLE = np.array(INBETWEEN_BITBOARDS, dtype=np.uint64)
+# Magic lookups stay in uint64 throughout: numba promotes mixed int64/uint64
+# arithmetic to float64.
+ROOK_MAGICS = magic.TABLES["rook_magics"]
+ROOK_MAGIC_MASKS = magic.TABLES["rook_masks"]
+ROOK_MAGIC_SHIFTS = magic.TABLES["rook_shifts"]
+ROOK_MAGIC_OFFSETS = magic.TABLES["rook_offsets"]
+ROOK_MAGIC_TABLE = magic.TABLES["rook_attacks"]
+BISHOP_MAGICS = magic.TABLES["bishop_magics"]
+BISHOP_MAGIC_MASKS = magic.TABLES["bishop_masks"]
+BISHOP_MAGIC_SHIFTS = magic.TABLES["bishop_shifts"]
+BISHOP_MAGIC_OFFSETS = magic.TABLES["bishop_offsets"]
+BISHOP_MAGIC_TABLE = magic.TABLES["bishop_attacks"]
+
+
+def _build_line_table() -> np.ndarray:
+    """Return the full board line through two aligned squares, or 0 if unaligned."""
+
+    ray_pairs = (
+        (ROOK_ATTACKS[ROOK_UP], ROOK_ATTACKS[ROOK_DOWN]),
+        (ROOK_ATTACKS[ROOK_LEFT], ROOK_ATTACKS[ROOK_RIGHT]),
+        (BISHOP_ATTACKS[BISHOP_UP_LEFT], BISHOP_ATTACKS[BISHOP_DOWN_RIGHT]),
+        (BISHOP_ATTACKS[BISHOP_UP_RIGHT], BISHOP_ATTACKS[BISHOP_DOWN_LEFT]),
+    )
+    table = [[0] * 64 for _ in range(64)]
+    for square in range(64):
+        for first, second in ray_pairs:
+            line = first[square] | second[square] | (1 << square)
+            bits = first[square] | second[square]
+            while bits:
+                lsb = bits & -bits
+                table[square][lsb.bit_length() - 1] = line
+                bits ^= lsb
+    return np.array(table, dtype=np.uint64)
+
+
+LINE_TABLE = _build_line_table()
+
+# Castle rights that survive a move touching the square (as origin or target).
+CASTLE_MASK_TABLE = np.array(CASTLE_MASK, dtype=np.int64)
+
+# Piece a promotion tag turns the pawn into, or -1 for non-promotions.
+PROMOTION_PIECE = np.full(32, -1, dtype=np.int64)
+for _tag, _piece in (
+    (TAG_W_KNIGHT_PROMOTION, 1),
+    (TAG_W_BISHOP_PROMOTION, 2),
+    (TAG_W_ROOK_PROMOTION, 3),
+    (TAG_W_QUEEN_PROMOTION, 4),
+    (TAG_B_KNIGHT_PROMOTION, 7),
+    (TAG_B_BISHOP_PROMOTION, 8),
+    (TAG_B_ROOK_PROMOTION, 9),
+    (TAG_B_QUEEN_PROMOTION, 10),
+    (TAG_W_CAPTURE_KNIGHT_PROMOTION, 1),
+    (TAG_W_CAPTURE_BISHOP_PROMOTION, 2),
+    (TAG_W_CAPTURE_ROOK_PROMOTION, 3),
+    (TAG_W_CAPTURE_QUEEN_PROMOTION, 4),
+    (TAG_B_CAPTURE_KNIGHT_PROMOTION, 7),
+    (TAG_B_CAPTURE_BISHOP_PROMOTION, 8),
+    (TAG_B_CAPTURE_ROOK_PROMOTION, 9),
+    (TAG_B_CAPTURE_QUEEN_PROMOTION, 10),
+):
+    PROMOTION_PIECE[_tag] = _piece
+
+# Square the rook lands on for each castling tag, or -1.
+CASTLE_ROOK_TARGET = np.full(32, -1, dtype=np.int64)
+CASTLE_ROOK_TARGET[TAG_WCASTLEKS] = F1
+CASTLE_ROOK_TARGET[TAG_WCASTLEQS] = D1
+CASTLE_ROOK_TARGET[TAG_BCASTLEKS] = F8
+CASTLE_ROOK_TARGET[TAG_BCASTLEQS] = D8
+
+# Promotion tags per side (0 white, 1 black) in queen, rook, bishop, knight order.
+QUIET_PROMOTION_TAGS = np.array(
+    [
+        [TAG_W_QUEEN_PROMOTION, TAG_W_ROOK_PROMOTION, TAG_W_BISHOP_PROMOTION, TAG_W_KNIGHT_PROMOTION],
+        [TAG_B_QUEEN_PROMOTION, TAG_B_ROOK_PROMOTION, TAG_B_BISHOP_PROMOTION, TAG_B_KNIGHT_PROMOTION],
+    ],
+    dtype=np.int64,
+)
+CAPTURE_PROMOTION_TAGS = np.array(
+    [
+        [
+            TAG_W_CAPTURE_QUEEN_PROMOTION,
+            TAG_W_CAPTURE_ROOK_PROMOTION,
+            TAG_W_CAPTURE_BISHOP_PROMOTION,
+            TAG_W_CAPTURE_KNIGHT_PROMOTION,
+        ],
+        [
+            TAG_B_CAPTURE_QUEEN_PROMOTION,
+            TAG_B_CAPTURE_ROOK_PROMOTION,
+            TAG_B_CAPTURE_BISHOP_PROMOTION,
+            TAG_B_CAPTURE_KNIGHT_PROMOTION,
+        ],
+    ],
+    dtype=np.int64,
+)
+
+
+@njit(cache=True)
+def bitscan_forward(bitboard):
+    return DEBRUIJN_INDEX[((bitboard ^ (bitboard - _ONE)) * _DEBRUIJN_MAGIC) >> _DEBRUIJN_SHIFT]
+
+
+@njit(cache=True)
+def popcount(bitboard):
+    bitboard = bitboard - ((bitboard >> np.uint64(1)) & _M1)
+    bitboard = (bitboard & _M2) + ((bitboard >> np.uint64(2)) & _M2)
+    bitboard = (bitboard + (bitboard >> np.uint64(4))) & _M4
+    return np.int64((bitboard * _H01) >> np.uint64(56))
+
+
+@njit(cache=True)
+def rook_attacks(square, occupancy):
+    return ROOK_MAGIC_TABLE[
+        ROOK_MAGIC_OFFSETS[square]
+        + (((occupancy & ROOK_MAGIC_MASKS[square]) * ROOK_MAGICS[square]) >> ROOK_MAGIC_SHIFTS[square])
+    ]
+
+
+@njit(cache=True)
+def bishop_attacks(square, occupancy):
+    return BISHOP_MAGIC_TABLE[
+        BISHOP_MAGIC_OFFSETS[square]
+        + (((occupancy & BISHOP_MAGIC_MASKS[square]) * BISHOP_MAGICS[square]) >> BISHOP_MAGIC_SHIFTS[square])
+    ]
+
+
+@njit(cache=True)
+def is_square_attacked(board, square, occupancy, by_black):
+    """Return whether the side (``by_black`` 0 or 1) attacks ``square``."""
+
+    base = by_black * 6
+    if board[base] & PAWN_TABLE[1 - by_black, square]:
+        return True
+    if board[base + 1] & KNIGHT_TABLE[square]:
+        return True
+    if board[base + 5] & KING_TABLE[square]:
+        return True
+    if (board[base + 2] | board[base + 4]) & bishop_attacks(square, occupancy):
+        return True
+    return ((board[base + 3] | board[base + 4]) & rook_attacks(square, occupancy)) != _ZERO
+
+
+@njit(cache=True)
+def attackers_to(board, square, occupancy, by_black):
+    """Return the pieces of the side (``by_black`` 0 or 1) that attack ``square``."""
+
+    base = by_black * 6
+    return (
+        (board[base] & PAWN_TABLE[1 - by_black, square])
+        | (board[base + 1] & KNIGHT_TABLE[square])
+        | (board[base + 5] & KING_TABLE[square])
+        | ((board[base + 2] | board[base + 4]) & bishop_attacks(square, occupancy))
+        | ((board[base + 3] | board[base + 4]) & rook_attacks(square, occupancy))
+    )
+
+
+@njit(cache=True)
+def _push(moves, count, starting, target, tag, piece):
+    moves[count] = starting | (target << 6) | (tag << 12) | (piece << 17)
+    return count + 1
+
+
+@njit(cache=True)
+def _push_targets(moves, count, starting, targets, enemy, piece):
+    while targets:
+        target = bitscan_forward(targets)
+        if SQUARE_BB[target] & enemy:
+            count = _push(moves, count, starting, target, TAG_CAPTURE, piece)
+        else:
+            count = _push(moves, count, starting, target, TAG_NONE, piece)
+        targets &= targets - _ONE
+    return count
+
+
+@njit(cache=True)
+def generate_moves(board, state, moves):
+    """Write the legal moves of the side to move into ``moves`` and return their count."""
+
+    us = 0 if state[STATE_WHITE_TO_PLAY] else 1
+    them = 1 - us
+    own = us * 6
+    enemy_base = them * 6
+
+    white_occ = board[0] | board[1] | board[2] | board[3] | board[4] | board[5]
+    black_occ = board[6] | board[7] | board[8] | board[9] | board[10] | board[11]
+    friendly = white_occ if us == 0 else black_occ
+    enemy = black_occ if us == 0 else white_occ
+    occupancy = white_occ | black_occ
+    empty = ~occupancy
+
+    king_bb = board[own + 5]
+    king_square = bitscan_forward(king_bb)
+    enemy_diagonal = board[enemy_base + 2] | board[enemy_base + 4]
+    enemy_orthogonal = board[enemy_base + 3] | board[enemy_base + 4]
+
+    checkers = (board[enemy_base] & PAWN_TABLE[us, king_square]) | (board[enemy_base + 1] & KNIGHT_TABLE[king_square])
+    check_mask = checkers
+    pinned = _ZERO
+    sliders = (bishop_attacks(king_square, enemy) & enemy_diagonal) | (
+        rook_attacks(king_square, enemy) & enemy_orthogonal
+    )
+    while sliders:
+        attacker = bitscan_forward(sliders)
+        ray = INBETWEEN_TABLE[king_square, attacker]
+        blockers = ray & friendly
+        if blockers == _ZERO:
+            checkers |= SQUARE_BB[attacker]
+            check_mask |= ray
+        elif (blockers & (blockers - _ONE)) == _ZERO:
+            pinned |= blockers
+        sliders &= sliders - _ONE
+
+    check_count = popcount(checkers)
+    if check_count == 0:
+        check_mask = _ALL
+
+    count = 0
+
+    # King
+    occupancy_without_king = occupancy ^ king_bb
+    targets = KING_TABLE[king_square] & ~friendly
+    while targets:
+        target = bitscan_forward(targets)
+        if not is_square_attacked(board, target, occupancy_without_king, them):
+            if SQUARE_BB[target] & enemy:
+                count = _push(moves, count, king_square, target, TAG_CAPTURE, own + 5)
+            else:
+                count = _push(moves, count, king_square, target, TAG_NONE, own + 5)
+        targets &= targets - _ONE
+
+    if check_count > 1:
+        return count
+
+    castle = state[STATE_CASTLE]
+    if check_count == 0:
+        if us == 0 and king_square == E1:
+            if (
+                (castle & CASTLE_WKS)
+                and (occupancy & _WKS_EMPTY) == _ZERO
+                and (board[3] & SQUARE_BB[H1])
+                and not is_square_attacked(board, F1, occupancy, 1)
+                and not is_square_attacked(board, G1, occupancy, 1)
+            ):
+                count = _push(moves, count, E1, G1, TAG_WCASTLEKS, 5)
+            if (
+                (castle & CASTLE_WQS)
+                and (occupancy & _WQS_EMPTY) == _ZERO
+                and (board[3] & SQUARE_BB[A1])
+                and not is_square_attacked(board, C1, occupancy, 1)
+                and not is_square_attacked(board, D1, occupancy, 1)
+            ):
+                count = _push(moves, count, E1, C1, TAG_WCASTLEQS, 5)
+        elif us == 1 and king_square == E8:
+            if (
+                (castle & CASTLE_BKS)
+                and (occupancy & _BKS_EMPTY) == _ZERO
+                and (board[9] & SQUARE_BB[H8])
+                and not is_square_attacked(board, F8, occupancy, 0)
+                and not is_square_attacked(board, G8, occupancy, 0)
+            ):
+                count = _push(moves, count, E8, G8, TAG_BCASTLEKS, 11)
+            if (
+                (castle & CASTLE_BQS)
+                and (occupancy & _BQS_EMPTY) == _ZERO
+                and (board[9] & SQUARE_BB[A8])
+                and not is_square_attacked(board, C8, occupancy, 0)
+                and not is_square_attacked(board, D8, occupancy, 0)
+            ):
+                count = _push(moves, count, E8, C8, TAG_BCASTLEQS, 11)
+
+    movable = ~friendly & check_mask
+
+    # Knights (a pinned knight can never move)
+    pieces = board[own + 1] & ~pinned
+    while pieces:
+        square = bitscan_forward(pieces)
+        count = _push_targets(moves, count, square, KNIGHT_TABLE[square] & movable, enemy, own + 1)
+        pieces &= pieces - _ONE
+
+    # Bishops, rooks and queens
+    for offset in range(2, 5):
+        pieces = board[own + offset]
+        while pieces:
+            square = bitscan_forward(pieces)
+            if offset == 2:
+                targets = bishop_attacks(square, occupancy)
+            elif offset == 3:
+                targets = rook_attacks(square, occupancy)
+            else:
+                targets = bishop_attacks(square, occupancy) | rook_attacks(square, occupancy)
+            targets &= movable
+            if pinned & SQUARE_BB[square]:
+                targets &= LINE_TABLE[king_square, square]
+            count = _push_targets(moves, count, square, targets, enemy, own + offset)
+            pieces &= pieces - _ONE
+
+    # Pawns
+    if us == 0:
+        forward = -8
+        start_rank = _RANK_2
+        promotion_rank = _RANK_7
+        ep_rank = _RANK_5
+        double_tag = TAG_DOUBLE_PAWN_WHITE
+        ep_tag = TAG_WHITEEP
+    else:
+        forward = 8
+        start_rank = _RANK_7
+        promotion_rank = _RANK_2
+        ep_rank = _RANK_4
+        double_tag = TAG_DOUBLE_PAWN_BLACK
+        ep_tag = TAG_BLACKEP
+    ep = state[STATE_EP]
+
+    pieces = board[own]
+    while pieces:
+        square = bitscan_forward(pieces)
+        start_mask = SQUARE_BB[square]
+        allowed = check_mask
+        if pinned & start_mask:
+            allowed &= LINE_TABLE[king_square, square]
+        promoting = (start_mask & promotion_rank) != _ZERO
+
+        one = square + forward
+        if SQUARE_BB[one] & empty:
+            if SQUARE_BB[one] & allowed:
+                if promoting:
+                    for index in range(4):
+                        count = _push(moves, count, square, one, QUIET_PROMOTION_TAGS[us, index], own)
+                else:
+                    count = _push(moves, count, square, one, TAG_NONE, own)
+            if start_mask & start_rank:
+                two = one + forward
+                if SQUARE_BB[two] & empty & allowed:
+                    count = _push(moves, count, square, two, double_tag, own)
+
+        captures = PAWN_TABLE[us, square] & enemy & allowed
+        while captures:
+            target = bitscan_forward(captures)
+            if promoting:
+                for index in range(4):
+                    count = _push(moves, count, square, target, CAPTURE_PROMOTION_TAGS[us, index], own)
+            else:
+                count = _push(moves, count, square, target, TAG_CAPTURE, own)
+            captures &= captures - _ONE
+
+        if ep != NO_SQUARE and (start_mask & ep_rank) and (PAWN_TABLE[us, square] & SQUARE_BB[ep]):
+            captured_square = ep - forward
+            if (not (pinned & start_mask) or (LINE_TABLE[king_square, square] & SQUARE_BB[ep])) and (
+                (SQUARE_BB[ep] | SQUARE_BB[captured_square]) & check_mask
+            ):
+                after = (occupancy ^ start_mask ^ SQUARE_BB[captured_square]) | SQUARE_BB[ep]
+                if (rook_attacks(king_square, after) & enemy_orthogonal) == _ZERO and (
+                    bishop_attacks(king_square, after) & enemy_diagonal
+                ) == _ZERO:
+                    count = _push(moves, count, square, ep, ep_tag, own)
+
+        pieces &= pieces - _ONE
+
+    return count
+
+
+@njit(cache=True)
+def make_move(board, state, move):
+    """Apply ``move`` in place and return the captured piece index, or -1."""
+
+    starting = move & 63
+    target = (move >> 6) & 63
+    tag = (move >> 12) & 31
+    piece = (move >> 17) & 15
+    start_mask = SQUARE_BB[starting]
+    target_mask = SQUARE_BB[target]
+    captured = -1
+
+    if tag in (TAG_CAPTURE, TAG_CHECK_CAPTURE) or TAG_B_CAPTURE_KNIGHT_PROMOTION <= tag <= TAG_W_CAPTURE_ROOK_PROMOTION:
+        enemy_base = 6 if piece < 6 else 0
+        for index in range(enemy_base, enemy_base + 6):
+            if board[index] & target_mask:
+                board[index] ^= target_mask
+                captured = index
+                break
+
+    promoted = PROMOTION_PIECE[tag]
+    if promoted >= 0:
+        board[piece] ^= start_mask
+        board[promoted] ^= target_mask
+    else:
+        board[piece] ^= start_mask | target_mask
+
+    state[STATE_EP] = NO_SQUARE
+    if tag == TAG_DOUBLE_PAWN_WHITE:
+        state[STATE_EP] = target + 8
+    elif tag == TAG_DOUBLE_PAWN_BLACK:
+        state[STATE_EP] = target - 8
+    elif tag == TAG_WHITEEP:
+        board[6] ^= SQUARE_BB[target + 8]
+        captured = 6
+    elif tag == TAG_BLACKEP:
+        board[0] ^= SQUARE_BB[target - 8]
+        captured = 0
+    elif tag == TAG_WCASTLEKS:
+        board[3] ^= SQUARE_BB[H1] | SQUARE_BB[F1]
+    elif tag == TAG_WCASTLEQS:
+        board[3] ^= SQUARE_BB[A1] | SQUARE_BB[D1]
+    elif tag == TAG_BCASTLEKS:
+        board[9] ^= SQUARE_BB[H8] | SQUARE_BB[F8]
+    elif tag == TAG_BCASTLEQS:
+        board[9] ^= SQUARE_BB[A8] | SQUARE_BB[D8]
+
+    state[STATE_CASTLE] &= CASTLE_MASK_TABLE[starting] & CASTLE_MASK_TABLE[target]
+    state[STATE_WHITE_TO_PLAY] ^= 1
+    return captured
+
+
+@njit(cache=True)
+def undo_move(board, state, move, captured, castle, ep):
+    """Revert ``move`` given the result of ``make_move`` and the prior castle/ep state."""
+
+    starting = move & 63
+    target = (move >> 6) & 63
+    tag = (move >> 12) & 31
+    piece = (move >> 17) & 15
+    start_mask = SQUARE_BB[starting]
+    target_mask = SQUARE_BB[target]
+
+    promoted = PROMOTION_PIECE[tag]
+    if promoted >= 0:
+        board[piece] ^= start_mask
+        board[promoted] ^= target_mask
+    else:
+        board[piece] ^= start_mask | target_mask
+
+    if tag == TAG_WHITEEP:
+        board[6] ^= SQUARE_BB[target + 8]
+    elif tag == TAG_BLACKEP:
+        board[0] ^= SQUARE_BB[target - 8]
+    elif tag == TAG_WCASTLEKS:
+        board[3] ^= SQUARE_BB[H1] | SQUARE_BB[F1]
+    elif tag == TAG_WCASTLEQS:
+        board[3] ^= SQUARE_BB[A1] | SQUARE_BB[D1]
+    elif tag == TAG_BCASTLEKS:
+        board[9] ^= SQUARE_BB[H8] | SQUARE_BB[F8]
+    elif tag == TAG_BCASTLEQS:
+        board[9] ^= SQUARE_BB[A8] | SQUARE_BB[D8]
+    elif captured >= 0:
+        board[captured] ^= target_mask
+
+    state[STATE_CASTLE] = castle
+    state[STATE_EP] = ep
+    state[STATE_WHITE_TO_PLAY] ^= 1
+
+
+@njit(cache=True)
+def _perft(board, state, moves, depth, ply):
+    count = generate_moves(board, state, moves[ply])
+    if depth == 1:
+        return count
+
+    castle = state[STATE_CASTLE]
+    ep = state[STATE_EP]
+    nodes = 0
+    for index in range(count):
+        move = moves[ply, index]
+        captured = make_move(board, state, move)
+        nodes += _perft(board, state, moves, depth - 1, ply + 1)
+        undo_move(board, state, move, captured, castle, ep)
+    return nodes
+
+
+@njit(cache=True)
+def _perft_copy_make(boards, states, moves, depth, ply):
+    count = generate_moves(boards[ply], states[ply], moves[ply])
+    if depth == 1:
+        return count
+
+    nodes = 0
+    for index in range(count):
+        # The child row is overwritten from the parent, so nothing needs undoing.
+        boards[ply + 1, :] = boards[ply]
+        states[ply + 1, :] = states[ply]
+        make_move(boards[ply + 1], states[ply + 1], moves[ply, index])
+        nodes += _perft_copy_make(boards, states, moves, depth - 1, ply + 1)
+    return nodes
+
+
+@njit(cache=True)
+def _record_leaf(board, state, moves, ply, move, captured, stats):
+    """Classify a leaf reached by ``move``; ``board``/``state`` hold the position after it."""
+
+    target = (move >> 6) & 63
+    tag = (move >> 12) & 31
+    stats[STAT_NODES] += 1
+    if captured >= 0:
+        stats[STAT_CAPTURES] += 1
+    if tag in (TAG_WHITEEP, TAG_BLACKEP):
+        stats[STAT_EN_PASSANT] += 1
+    if PROMOTION_PIECE[tag] >= 0:
+        stats[STAT_PROMOTIONS] += 1
+    moved = SQUARE_BB[target]
+    rook_target = CASTLE_ROOK_TARGET[tag]
+    if rook_target >= 0:
+        stats[STAT_CASTLES] += 1
+        moved |= SQUARE_BB[rook_target]
+
+    defender = 0 if state[STATE_WHITE_TO_PLAY] else 1
+    king_square = bitscan_forward(board[defender * 6 + 5])
+    occupancy = _ZERO
+    for index in range(12):
+        occupancy |= board[index]
+    checkers = attackers_to(board, king_square, occupancy, 1 - defender)
+    if checkers == _ZERO:
+        return
+
+    stats[STAT_CHECKS] += 1
+    # Like the published tables, a double check is not also counted as discovered.
+    if checkers & (checkers - _ONE):
+        stats[STAT_DOUBLE_CHECKS] += 1
+    elif checkers & ~moved:
+        # The checker is not the piece that just moved, so the move uncovered it.
+        stats[STAT_DISCOVERED_CHECKS] += 1
+    if generate_moves(board, state, moves[ply]) == 0:
+        stats[STAT_CHECKMATES] += 1
+
+
+@njit(cache=True)
+def _perft_detailed(board, state, moves, depth, ply, stats):
+    count = generate_moves(board, state, moves[ply])
+    castle = state[STATE_CASTLE]
+    ep = state[STATE_EP]
+    for index in range(count):
+        move = moves[ply, index]
+        captured = make_move(board, state, move)
+        if depth == 1:
+            _record_leaf(board, state, moves, ply + 1, move, captured, stats)
+        else:
+            _perft_detailed(board, state, moves, depth - 1, ply + 1, stats)
+        undo_move(board, state, move, captured, castle, ep)
+
+
+@dataclass(slots=True)
+class PerftStats:
+    """Leaf counts broken out the way the published perft tables list them."""
+
+    nodes: int = 0
+    captures: int = 0
+    en_passant: int = 0
+    castles: int = 0
+    promotions: int = 0
+    checks: int = 0
+    discovered_checks: int = 0
+    double_checks: int = 0
+    checkmates: int = 0
+
+
+def position_arrays(position: Position) -> tuple[np.ndarray, np.ndarray]:
+    """Return the ``(board, state)`` arrays the compiled engine works on."""
+
+    board = np.array(position.piece_array, dtype=np.uint64)
+    state = np.zeros(STATE_SIZE, dtype=np.int64)
+    state[STATE_WHITE_TO_PLAY] = 1 if position.white_to_play else 0
+    state[STATE_CASTLE] = position.castle_rights
+    state[STATE_EP] = position.ep
+    return board, state
+
+
+def legal_moves(board: np.ndarray, state: np.ndarray) -> list[int]:
+    """Return the packed legal moves for the position as Python ints."""
+
+    buffer = np.empty(MAX_MOVES, dtype=np.int32)
+    count = generate_moves(board, state, buffer)
+    return buffer[:count].tolist()
+
+
+def perft(board: np.ndarray, state: np.ndarray, depth: int) -> int:
+    """Count leaf nodes ``depth`` plies below the position held in ``board``/``state``."""
+
+    if depth <= 0:
+        return 1
+    moves = np.empty((depth, MAX_MOVES), dtype=np.int32)
+    return int(_perft(board, state, moves, depth, 0))
+
+
+def perft_copy_make(board: np.ndarray, state: np.ndarray, depth: int) -> int:
+    """``perft`` with copy-make: every ply gets its own board and state row."""
+
+    if depth <= 0:
+        return 1
+    boards = np.empty((depth, board.shape[0]), dtype=np.uint64)
+    states = np.empty((depth, STATE_SIZE), dtype=np.int64)
+    boards[0] = board
+    states[0] = state
+    moves = np.empty((depth, MAX_MOVES), dtype=np.int32)
+    return int(_perft_copy_make(boards, states, moves, depth, 0))
+
+
+def perft_detailed(board: np.ndarray, state: np.ndarray, depth: int) -> PerftStats:
+    """Return the ``PerftStats`` of the leaves ``depth`` plies below the position."""
+
+    if depth <= 0:
+        return PerftStats(nodes=1)
+    stats = np.zeros(STATS_SIZE, dtype=np.int64)
+    # One extra row: checkmate detection generates the replies at the leaves.
+    moves = np.empty((depth + 1, MAX_MOVES), dtype=np.int32)
+    _perft_detailed(board, state, moves, depth, 0, stats)
+    return PerftStats(*(int(value) for value in stats))
+
+
+def perft_divide(board: np.ndarray, state: np.ndarray, depth: int, copy_make: bool = False) -> list[tuple[int, int]]:
+    """Return ``(move, nodes)`` for every root move, in generation order."""
+
+    count = perft_copy_make if copy_make else perft
+
+    results: list[tuple[int, int]] = []
+    castle = state[STATE_CASTLE]
+    ep = state[STATE_EP]
+    for move in legal_moves(board, state):
+        captured = make_move(board, state, move)
+        results.append((move, count(board, state, depth - 1)))
+        undo_move(board, state, move, captured, castle, ep)
+    return results
+
+
+def run_perft_jit(position: Position, depth: int, copy_make: bool = False) -> int:
+    board, state = position_arrays(position)
+    timestamp_start = time.monotonic_ns()
+
+    nodes = 0
+    for move, move_nodes in perft_divide(board, state, depth, copy_make):
+        starting, target, tag, _piece = decode_move(move)
+        print_move_no_nl(starting, target, tag)
+        print(f": {move_nodes}")
+        nodes += move_nodes
+
+    timestamp_end = time.monotonic_ns()
+    elapsed = timestamp_end - timestamp_start
+
+    print(f"Nodes: {nodes}")
+    print(f"Elapsed time: {elapsed / 1_000_000} ms")
+    return nodes
+
+
+def run_perft_detailed(position: Position, depth: int) -> PerftStats:
+    board, state = position_arrays(position)
+    timestamp_start = time.monotonic_ns()
+    stats = perft_detailed(board, state, depth)
+    elapsed = time.monotonic_ns() - timestamp_start
+
+    labels = ("Nodes", "Captures", "E.p.", "Castles", "Promotions", "Checks", "Discovered", "Double", "Checkmates")
+    for label, value in zip(labels, astuple(stats), strict=True):
+        print(f"{label}: {value}")
+    print(f"Elapsed time: {elapsed / 1_000_000} ms")
+    return stats
@@ -1,4 +1,6 @@
+import os
 import time
+from array import array
 from collections.abc import Callable, Iterable, Mapping, Sequence
 from dataclasses import dataclass
 from typing import NamedTuple
@@ -15,8 +17,8 @@ from rusttt.constants import (
     BISHOP_UP_RIGHT,
     BK,
     BK_STARTING_POSITION,
-    BKS_CASTLE_RIGHTS,
     BKS_EMPTY_BITBOARD,
+    BKS_SAFE_BITBOARD,
     BLACK_PAWN_ATTACKS,
     BN,
     BN_STARTING_POSITIONS,
@@ -24,12 +26,17 @@ from rusttt.constants import (
     BP_STARTING_POSITIONS,
     BQ,
     BQ_STARTING_POSITION,
-    BQS_CASTLE_RIGHTS,
     BQS_EMPTY_BITBOARD,
+    BQS_SAFE_BITBOARD,
     BR,
     BR_STARTING_POSITIONS,
     C1,
     C8,
+    CASTLE_ALL,
+    CASTLE_BKS,
+    CASTLE_BQS,
+    CASTLE_WKS,
+    CASTLE_WQS,
     D1,
     D8,
     E1,
@@ -37,6 +44,10 @@ from rusttt.constants import (
     EMPTY,
     F1,
     F8,
+    FILE_A_BITBOARD,
+    FILE_B_BITBOARD,
+    FILE_G_BITBOARD,
+    FILE_H_BITBOARD,
     G1,
     G8,
     H1,
@@ -45,11 +56,18 @@ from rusttt.constants import (
     KING_ATTACKS,
     KNIGHT_ATTACKS,
     MAX_ULONG,
+    MOVE_PIECE_SHIFT,
+    MOVE_TAG_SHIFT,
+    MOVE_TARGET_SHIFT,
     NO_SQUARE,
+    RANK_1_BITBOARD,
     RANK_2_BITBOARD,
+    RANK_3_BITBOARD,
     RANK_4_BITBOARD,
     RANK_5_BITBOARD,
+    RANK_6_BITBOARD,
     RANK_7_BITBOARD,
+    RANK_8_BITBOARD,
     ROOK_ATTACKS,
     ROOK_DOWN,
     ROOK_LEFT,
@@ -91,31 +109,28 @@ from rusttt.constants import (
     WHITE_PAWN_ATTACKS,
     WK,
     WK_STARTING_POSITION,
-    WKS_CASTLE_RIGHTS,
     WKS_EMPTY_BITBOARD,
+    WKS_SAFE_BITBOARD,
     WN,
     WN_STARTING_POSITIONS,
     WP,
     WP_STARTING_POSITIONS,
     WQ,
     WQ_STARTING_POSITION,
-    WQS_CASTLE_RIGHTS,
     WQS_EMPTY_BITBOARD,
+    WQS_SAFE_BITBOARD,
     WR,
     WR_STARTING_POSITIONS,
     piece_colours,
     piece_names,
 )
-
-piece_array = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
-white_to_play: bool = True
-castle_rights: list[bool] = [True, True, True, True]
-ep: int = NO_SQUARE
-board_ply: int = 0
+from rusttt.magic import get_bishop_attacks, get_queen_attacks, get_rook_attacks
+from rusttt.zobrist import CASTLE_MASK_KEYS, EP_FILE_KEYS, PIECE_KEYS, SIDE_KEY, compute_hash
 
 BOARD_MASK: int = (1 << 64) - 1
-BLACK_CAPTURE_RANGE: tuple[int, ...] = tuple(range(BP, BK + 1))
-WHITE_CAPTURE_RANGE: tuple[int, ...] = tuple(range(WP, BP))
+
+# Debug switch: recompute the Zobrist key from scratch after every apply/undo.
+VERIFY_HASH: bool = os.environ.get("RUSTTT_VERIFY_HASH", "") not in ("", "0")
 
 
 class Pin(NamedTuple):
@@ -124,11 +139,40 @@ class Pin(NamedTuple):
 
 
 class Move(NamedTuple):
+    """Decoded view of a packed move (``starting | target << 6 | tag << 12 | piece << 17``).
+
+    The generators and ``perft_inline`` work on the packed ints; ``Move`` is what the
+    public API hands out. ``apply_move`` and ``undo_move`` accept either form.
+    """
+
     starting: int
     target: int
     tag: int
     piece: int
 
+    @classmethod
+    def from_packed(cls, move: int) -> "Move":
+        return cls(move & 63, (move >> MOVE_TARGET_SHIFT) & 63, (move >> MOVE_TAG_SHIFT) & 31, move >> MOVE_PIECE_SHIFT)
+
+    @property
+    def packed(self) -> int:
+        return encode_move(self.starting, self.target, self.tag, self.piece)
+
+
+def encode_move(starting: int, target: int, tag: int, piece: int) -> int:
+    return starting | (target << MOVE_TARGET_SHIFT) | (tag << MOVE_TAG_SHIFT) | (piece << MOVE_PIECE_SHIFT)
+
+
+def decode_move(move: int) -> tuple[int, int, int, int]:
+    """Return ``(starting, target, tag, piece)`` for a packed move."""
+
+    return move & 63, (move >> MOVE_TARGET_SHIFT) & 63, (move >> MOVE_TAG_SHIFT) & 31, move >> MOVE_PIECE_SHIFT
+
+
+# Tag fields of the two most common move kinds, pre-shifted for the generators.
+CAPTURE_TAG_BITS: int = TAG_CAPTURE << MOVE_TAG_SHIFT
+QUIET_TAG_BITS: int = TAG_NONE << MOVE_TAG_SHIFT
+
 
 @dataclass(slots=True)
 class KingState:
@@ -143,7 +187,183 @@ class KingState:
 class MoveContext:
     captured_piece_index: int
     previous_ep: int
-    previous_castle_rights: tuple[bool, bool, bool, bool]
+    previous_castle_rights: int
+    previous_hash: int
+    previous_halfmove_clock: int
+
+
+# FEN letters in piece index order (WP..WK, BP..BK) and castle rights order (WKS, WQS, BKS, BQS).
+FEN_PIECES = "PNBRQKpnbrqk"
+FEN_CASTLES = "KQkq"
+
+
+def square_name(square: int) -> str:
+    return f"{SQ_CHAR_X[square]}{SQ_CHAR_Y[square]}"
+
+
+def parse_square(name: str) -> int:
+    if len(name) != 2 or name[0] not in "abcdefgh" or name[1] not in "12345678":
+        msg = f"Invalid square {name!r}"
+        raise ValueError(msg)
+    return (8 - int(name[1])) * 8 + "abcdefgh".index(name[0])
+
+
+class Position:
+    """A chess position: the piece bitboards plus side to move, castle rights and en passant.
+
+    ``hash_key`` is the Zobrist key of the position, the occupancies are the union
+    of each side's bitboards and ``mailbox`` maps every square to the piece on it
+    (or ``EMPTY``). ``apply_move`` and ``undo_move`` keep all of them current; code
+    that edits the fields directly calls ``refresh``. The halfmove clock and
+    fullmove number are carried for FEN round trips and are not part of the hash.
+    """
+
+    __slots__ = (
+        "black_occupancy",
+        "board_ply",
+        "castle_rights",
+        "ep",
+        "fullmove_number",
+        "halfmove_clock",
+        "hash_key",
+        "mailbox",
+        "occupancy",
+        "piece_array",
+        "white_occupancy",
+        "white_to_play",
+    )
+
+    def __init__(self):
+        self.piece_array = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+        self.white_to_play = True
+        self.castle_rights = CASTLE_ALL
+        self.ep = NO_SQUARE
+        self.board_ply = 0
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+        self.white_occupancy = 0
+        self.black_occupancy = 0
+        self.occupancy = 0
+        self.mailbox = [EMPTY] * 64
+        self.hash_key = compute_hash(self.piece_array, self.white_to_play, self.castle_rights, self.ep)
+
+    @classmethod
+    def from_fen(cls, fen: str) -> "Position":
+        """Build a position from a FEN string.
+
+        The halfmove clock and fullmove number may be omitted, as they are in EPD
+        records; they then default to 0 and 1.
+        """
+
+        fields = fen.split()
+        if len(fields) not in (4, 6):
+            msg = f"FEN needs 4 or 6 fields, got {len(fields)}: {fen!r}"
+            raise ValueError(msg)
+        placement, side, castles, ep = fields[:4]
+
+        position = cls()
+        ranks = placement.split("/")
+        if len(ranks) != 8:
+            msg = f"FEN board needs 8 ranks, got {len(ranks)}: {placement!r}"
+            raise ValueError(msg)
+        for rank_index, rank in enumerate(ranks):
+            file = 0
+            for char in rank:
+                if char in "12345678":
+                    file += int(char)
+                elif char in FEN_PIECES and file < 8:
+                    position.piece_array[FEN_PIECES.index(char)] |= SQUARE_BBS[rank_index * 8 + file]
+                    file += 1
+                else:
+                    msg = f"Invalid FEN rank {rank!r}"
+                    raise ValueError(msg)
+            if file != 8:
+                msg = f"FEN rank {rank!r} does not cover 8 files"
+                raise ValueError(msg)
+
+        if side not in ("w", "b"):
+            msg = f"Invalid side to move {side!r}"
+            raise ValueError(msg)
+        position.white_to_play = side == "w"
+
+        if castles != "-" and (not castles or any(char not in FEN_CASTLES for char in castles)):
+            msg = f"Invalid castling field {castles!r}"
+            raise ValueError(msg)
+        position.castle_rights = sum(1 << index for index, char in enumerate(FEN_CASTLES) if char in castles)
+
+        position.ep = NO_SQUARE if ep == "-" else parse_square(ep)
+        if position.ep != NO_SQUARE and SQ_CHAR_Y[position.ep] not in ("3", "6"):
+            msg = f"Invalid en passant square {ep!r}"
+            raise ValueError(msg)
+
+        if len(fields) == 6:
+            try:
+                position.halfmove_clock = int(fields[4])
+                position.fullmove_number = int(fields[5])
+            except ValueError:
+                msg = f"Invalid move counters {fields[4]!r} {fields[5]!r}"
+                raise ValueError(msg) from None
+
+        position.refresh()
+        return position
+
+    def to_fen(self) -> str:
+        ranks = []
+        for rank_index in range(8):
+            rank = ""
+            empty = 0
+            for square in range(rank_index * 8, rank_index * 8 + 8):
+                piece = self.mailbox[square]
+                if piece == EMPTY:
+                    empty += 1
+                    continue
+                if empty:
+                    rank += str(empty)
+                    empty = 0
+                rank += FEN_PIECES[piece]
+            if empty:
+                rank += str(empty)
+            ranks.append(rank)
+
+        castles = "".join(char for index, char in enumerate(FEN_CASTLES) if self.castle_rights >> index & 1)
+        ep = "-" if self.ep == NO_SQUARE else square_name(self.ep)
+        side = "w" if self.white_to_play else "b"
+        return f"{'/'.join(ranks)} {side} {castles or '-'} {ep} {self.halfmove_clock} {self.fullmove_number}"
+
+    def refresh_hash(self) -> int:
+        self.hash_key = compute_hash(self.piece_array, self.white_to_play, self.castle_rights, self.ep)
+        return self.hash_key
+
+    def refresh_occupancies(self) -> None:
+        self.white_occupancy, self.black_occupancy = side_occupancies(self.piece_array)
+        self.occupancy = self.white_occupancy | self.black_occupancy
+        self.mailbox = build_mailbox(self.piece_array)
+
+    def refresh(self) -> None:
+        """Recompute the occupancies, mailbox and hash after editing the fields directly."""
+
+        self.refresh_occupancies()
+        self.refresh_hash()
+
+    def copy(self) -> "Position":
+        position = Position()
+        position.piece_array = self.piece_array.copy()
+        position.white_to_play = self.white_to_play
+        position.castle_rights = self.castle_rights
+        position.ep = self.ep
+        position.board_ply = self.board_ply
+        position.halfmove_clock = self.halfmove_clock
+        position.fullmove_number = self.fullmove_number
+        position.white_occupancy = self.white_occupancy
+        position.black_occupancy = self.black_occupancy
+        position.occupancy = self.occupancy
+        position.mailbox = self.mailbox.copy()
+        position.hash_key = self.hash_key
+        return position
+
+
+# The original name of the position container.
+Board = Position
 
 
 PROMOTION_MAP: dict[int, int] = {
@@ -169,6 +389,58 @@ CAPTURE_PROMOTION_MAP: dict[int, int] = {
 }
 
 
+def move_name(move: int) -> str:
+    """Return a packed move in long algebraic (UCI) notation, e.g. ``e2e4`` or ``e7e8q``."""
+
+    tag = (move >> MOVE_TAG_SHIFT) & 31
+    name = f"{square_name(move & 63)}{square_name((move >> MOVE_TARGET_SHIFT) & 63)}"
+    promoted = PROMOTION_MAP.get(tag, CAPTURE_PROMOTION_MAP.get(tag))
+    return name if promoted is None else name + FEN_PIECES[promoted].lower()
+
+
+class MoveEffect(NamedTuple):
+    """What a move tag does on top of taking whatever stands on the target square.
+
+    The mover (or ``promoted_piece``) goes from ``starting`` to ``target``; the
+    other fields are -1 or 0 when they do not apply.
+    """
+
+    promoted_piece: int
+    ep_victim: int
+    ep_victim_offset: int
+    rook: int
+    rook_from: int
+    rook_to: int
+    ep_offset: int
+
+
+_PLAIN_MOVE = MoveEffect(-1, -1, 0, -1, 0, 0, 0)
+
+# Indexed by tag; None marks tags no generator emits.
+MOVE_TAG_EFFECTS: list[MoveEffect | None] = [None] * 32
+for _tag in (TAG_NONE, TAG_CAPTURE, TAG_CHECK, TAG_CHECK_CAPTURE):
+    MOVE_TAG_EFFECTS[_tag] = _PLAIN_MOVE
+for _tag, _piece in (PROMOTION_MAP | CAPTURE_PROMOTION_MAP).items():
+    MOVE_TAG_EFFECTS[_tag] = _PLAIN_MOVE._replace(promoted_piece=_piece)
+MOVE_TAG_EFFECTS[TAG_WHITEEP] = _PLAIN_MOVE._replace(ep_victim=BP, ep_victim_offset=8)
+MOVE_TAG_EFFECTS[TAG_BLACKEP] = _PLAIN_MOVE._replace(ep_victim=WP, ep_victim_offset=-8)
+MOVE_TAG_EFFECTS[TAG_WCASTLEKS] = _PLAIN_MOVE._replace(rook=WR, rook_from=H1, rook_to=F1)
+MOVE_TAG_EFFECTS[TAG_WCASTLEQS] = _PLAIN_MOVE._replace(rook=WR, rook_from=A1, rook_to=D1)
+MOVE_TAG_EFFECTS[TAG_BCASTLEKS] = _PLAIN_MOVE._replace(rook=BR, rook_from=H8, rook_to=F8)
+MOVE_TAG_EFFECTS[TAG_BCASTLEQS] = _PLAIN_MOVE._replace(rook=BR, rook_from=A8, rook_to=D8)
+MOVE_TAG_EFFECTS[TAG_DOUBLE_PAWN_WHITE] = _PLAIN_MOVE._replace(ep_offset=8)
+MOVE_TAG_EFFECTS[TAG_DOUBLE_PAWN_BLACK] = _PLAIN_MOVE._replace(ep_offset=-8)
+
+# Castle rights that survive a move touching the square (as origin or target).
+CASTLE_MASK: list[int] = [CASTLE_ALL] * 64
+CASTLE_MASK[E1] &= ~(CASTLE_WKS | CASTLE_WQS)
+CASTLE_MASK[H1] &= ~CASTLE_WKS
+CASTLE_MASK[A1] &= ~CASTLE_WQS
+CASTLE_MASK[E8] &= ~(CASTLE_BKS | CASTLE_BQS)
+CASTLE_MASK[H8] &= ~CASTLE_BKS
+CASTLE_MASK[A8] &= ~CASTLE_BQS
+
+
 def iterate_bits(bitboard: int) -> Iterable[int]:
     """Yield the index of each set bit within ``bitboard``."""
 
@@ -195,19 +467,11 @@ def pin_mask_for_square(
     return MAX_ULONG
 
 
-def locate_captured_piece(target_square: int, capturing_piece: int) -> int:
-    """Return the index of the captured piece for the supplied move."""
-
-    search_range = (
-        BLACK_CAPTURE_RANGE if WP <= capturing_piece <= WK else WHITE_CAPTURE_RANGE
-    )
-    target_mask = SQUARE_BBS[target_square]
+def locate_captured_piece(mailbox: Sequence[int], target_square: int) -> int:
+    """Return the index of the piece a move to ``target_square`` captures, or -1."""
 
-    for index in search_range:
-        if (piece_array[index] & target_mask) != 0:
-            return index
-
-    return -1
+    piece = mailbox[target_square]
+    return -1 if piece == EMPTY else piece
 
 
 def scan_slider_checks_and_pins(
@@ -250,11 +514,11 @@ def scan_slider_checks_and_pins(
                 pin_lookup[pinned_square] = ray_mask
 
     process_attackers(
-        get_bishop_moves_separate(king_square, enemy_occupancies),
+        get_bishop_attacks(king_square, enemy_occupancies),
         enemy_bishop_bb | enemy_queen_bb,
     )
     process_attackers(
-        get_rook_moves_separate(king_square, enemy_occupancies),
+        get_rook_attacks(king_square, enemy_occupancies),
         enemy_rook_bb | enemy_queen_bb,
     )
 
@@ -319,98 +583,76 @@ def generate_king_moves(
     piece_array_local: Sequence[int],
     king_state: KingState,
     is_white: bool,
-    friendly_occupancies: int,
+    friendly_occupancies: int,  # noqa: ARG001
     enemy_occupancies: int,
     combined_occupancies: int,
-    empty_occupancies: int,  # noqa: ARG001
-    castle_rights: Sequence[bool],
+    empty_occupancies: int,
+    castle_rights: int,
     allow_castle: bool,
-) -> list[Move]:
-    moves: list[Move] = []
-
+    moves: list[int],
+) -> list[int]:
     king_piece = WK if is_white else BK
-    enemy_pawn_piece = BP if is_white else WP
-    enemy_knight_piece = BN if is_white else WN
-    enemy_bishop_piece = BB if is_white else WB
-    enemy_rook_piece = BR if is_white else WR
-    enemy_queen_piece = BQ if is_white else WQ
-    enemy_king_piece = BK if is_white else WK
-
-    pawn_attack_table = WHITE_PAWN_ATTACKS if is_white else BLACK_PAWN_ATTACKS
 
     king_square = king_state.king_square
+    # Sliders see through the king, so it cannot step back along the line of a check.
     occupancies_without_king = combined_occupancies & (~piece_array_local[king_piece])
-    candidate_targets = KING_ATTACKS[king_square] & (~friendly_occupancies & BOARD_MASK)
+    # Passing only the enemy (or only the empty) squares restricts the king to captures (or quiet moves).
+    candidate_targets = KING_ATTACKS[king_square] & (enemy_occupancies | empty_occupancies)
+    if allow_castle and king_state.check_count == 0:
+        castle_squares = (
+            (WKS_SAFE_BITBOARD if castle_rights & CASTLE_WKS else 0)
+            | (WQS_SAFE_BITBOARD if castle_rights & CASTLE_WQS else 0)
+            if is_white
+            else (BKS_SAFE_BITBOARD if castle_rights & CASTLE_BKS else 0)
+            | (BQS_SAFE_BITBOARD if castle_rights & CASTLE_BQS else 0)
+        )
+    else:
+        castle_squares = 0
+    danger_zone = candidate_targets | castle_squares
+    attacked = attack_map(piece_array_local, not is_white, occupancies_without_king, danger_zone) if danger_zone else 0
+    candidate_targets &= ~attacked
 
     for target_square in iterate_bits(candidate_targets):
         target_mask = SQUARE_BBS[target_square]
-
-        if (piece_array_local[enemy_pawn_piece] & pawn_attack_table[target_square]) != 0:
-            continue
-
-        if (piece_array_local[enemy_knight_piece] & KNIGHT_ATTACKS[target_square]) != 0:
-            continue
-
-        if (piece_array_local[enemy_king_piece] & KING_ATTACKS[target_square]) != 0:
-            continue
-
-        bishop_attacks = get_bishop_moves_separate(target_square, occupancies_without_king)
-        if (piece_array_local[enemy_bishop_piece] & bishop_attacks) != 0:
-            continue
-
-        if (piece_array_local[enemy_queen_piece] & bishop_attacks) != 0:
-            continue
-
-        rook_attacks = get_rook_moves_separate(target_square, occupancies_without_king)
-        if (piece_array_local[enemy_rook_piece] & rook_attacks) != 0:
-            continue
-
-        if (piece_array_local[enemy_queen_piece] & rook_attacks) != 0:
-            continue
-
-        tag = TAG_CAPTURE if (enemy_occupancies & target_mask) != 0 else TAG_NONE
-        moves.append(Move(king_square, target_square, tag, king_piece))
+        tag_bits = CAPTURE_TAG_BITS if (enemy_occupancies & target_mask) != 0 else QUIET_TAG_BITS
+        moves.append(king_square | (target_square << MOVE_TARGET_SHIFT) | tag_bits | (king_piece << MOVE_PIECE_SHIFT))
 
     if not allow_castle or king_state.check_count != 0:
         return moves
 
     if is_white and king_square == E1:
         if (
-            castle_rights[WKS_CASTLE_RIGHTS]
+            castle_rights & CASTLE_WKS
             and (WKS_EMPTY_BITBOARD & combined_occupancies) == 0
             and (piece_array_local[WR] & SQUARE_BBS[H1]) != 0
-            and (not is_square_attacked_by_black(F1, combined_occupancies, piece_array_local))
-            and (not is_square_attacked_by_black(G1, combined_occupancies, piece_array_local))
+            and (attacked & WKS_SAFE_BITBOARD) == 0
         ):
-            moves.append(Move(E1, G1, TAG_WCASTLEKS, WK))
+            moves.append(encode_move(E1, G1, TAG_WCASTLEKS, WK))
 
         if (
-            castle_rights[WQS_CASTLE_RIGHTS]
+            castle_rights & CASTLE_WQS
             and (WQS_EMPTY_BITBOARD & combined_occupancies) == 0
             and (piece_array_local[WR] & SQUARE_BBS[A1]) != 0
-            and (not is_square_attacked_by_black(C1, combined_occupancies, piece_array_local))
-            and (not is_square_attacked_by_black(D1, combined_occupancies, piece_array_local))
+            and (attacked & WQS_SAFE_BITBOARD) == 0
         ):
-            moves.append(Move(E1, C1, TAG_WCASTLEQS, WK))
+            moves.append(encode_move(E1, C1, TAG_WCASTLEQS, WK))
 
     if (not is_white) and king_square == E8:
         if (
-            castle_rights[BKS_CASTLE_RIGHTS]
+            castle_rights & CASTLE_BKS
             and (BKS_EMPTY_BITBOARD & combined_occupancies) == 0
             and (piece_array_local[BR] & SQUARE_BBS[H8]) != 0
-            and (not is_square_attacked_by_white(F8, combined_occupancies, piece_array_local))
-            and (not is_square_attacked_by_white(G8, combined_occupancies, piece_array_local))
+            and (attacked & BKS_SAFE_BITBOARD) == 0
         ):
-            moves.append(Move(E8, G8, TAG_BCASTLEKS, BK))
+            moves.append(encode_move(E8, G8, TAG_BCASTLEKS, BK))
 
         if (
-            castle_rights[BQS_CASTLE_RIGHTS]
+            castle_rights & CASTLE_BQS
             and (BQS_EMPTY_BITBOARD & combined_occupancies) == 0
             and (piece_array_local[BR] & SQUARE_BBS[A8]) != 0
-            and (not is_square_attacked_by_white(C8, combined_occupancies, piece_array_local))
-            and (not is_square_attacked_by_white(D8, combined_occupancies, piece_array_local))
+            and (attacked & BQS_SAFE_BITBOARD) == 0
         ):
-            moves.append(Move(E8, C8, TAG_BCASTLEQS, BK))
+            moves.append(encode_move(E8, C8, TAG_BCASTLEQS, BK))
 
     return moves
 
@@ -424,10 +666,11 @@ def generate_leaper_moves(
     check_mask: int,
     pins: Mapping[int, int] | Sequence[Pin],
     king_state: KingState,
-) -> list[Move]:
-    moves: list[Move] = []
+    moves: list[int],
+) -> list[int]:
     moves_append = moves.append
     pin_get = pins.get if isinstance(pins, Mapping) else None
+    piece_bits = piece_index << MOVE_PIECE_SHIFT
 
     for starting_square in iterate_bits(piece_bitboard):
         allowed_mask = (
@@ -438,15 +681,18 @@ def generate_leaper_moves(
             continue
 
         attacks = attack_table[starting_square] & allowed_mask
+        origin = starting_square | piece_bits
         capture_targets = attacks & enemy_occupancies
         if capture_targets:
+            capture_origin = origin | CAPTURE_TAG_BITS
             for target_square in iterate_bits(capture_targets):
-                moves_append(Move(starting_square, target_square, TAG_CAPTURE, piece_index))
+                moves_append(capture_origin | (target_square << MOVE_TARGET_SHIFT))
 
         quiet_targets = attacks & empty_occupancies
         if quiet_targets:
+            quiet_origin = origin | QUIET_TAG_BITS
             for target_square in iterate_bits(quiet_targets):
-                moves_append(Move(starting_square, target_square, TAG_NONE, piece_index))
+                moves_append(quiet_origin | (target_square << MOVE_TARGET_SHIFT))
 
     return moves
 
@@ -461,10 +707,11 @@ def generate_slider_moves(
     check_mask: int,
     pins: Mapping[int, int] | Sequence[Pin],
     king_state: KingState,
-) -> list[Move]:
-    moves: list[Move] = []
+    moves: list[int],
+) -> list[int]:
     moves_append = moves.append
     pin_get = pins.get if isinstance(pins, Mapping) else None
+    piece_bits = piece_index << MOVE_PIECE_SHIFT
 
     for starting_square in iterate_bits(piece_bitboard):
         pin_mask = pin_get(starting_square, MAX_ULONG) if pin_get else pin_mask_for_square(pins, king_state.king_square, starting_square)
@@ -475,15 +722,18 @@ def generate_slider_moves(
         if not attack_mask:
             continue
 
+        origin = starting_square | piece_bits
         capture_targets = attack_mask & enemy_occupancies
         if capture_targets:
+            capture_origin = origin | CAPTURE_TAG_BITS
             for target_square in iterate_bits(capture_targets):
-                moves_append(Move(starting_square, target_square, TAG_CAPTURE, piece_index))
+                moves_append(capture_origin | (target_square << MOVE_TARGET_SHIFT))
 
         quiet_targets = attack_mask & empty_occupancies
         if quiet_targets:
+            quiet_origin = origin | QUIET_TAG_BITS
             for target_square in iterate_bits(quiet_targets):
-                moves_append(Move(starting_square, target_square, TAG_NONE, piece_index))
+                moves_append(quiet_origin | (target_square << MOVE_TARGET_SHIFT))
 
     return moves
 
@@ -497,20 +747,41 @@ def generate_pawn_moves(
     pins: Mapping[int, int] | Sequence[Pin],
     king_state: KingState,
     en_passant_square: int,
-) -> list[Move]:
-    moves: list[Move] = []
+    moves: list[int],
+) -> list[int]:
+    """Append the pawn moves, generated a whole set at a time for unpinned pawns.
+
+    Pushes and captures shift the pawn bitboard, so every target set comes with a
+    fixed offset back to its from-square. Pinned pawns and en passant go square by
+    square, as in ``count_pawn_moves``.
+    """
+
     moves_append = moves.append
 
+    if not isinstance(pins, Mapping):  # pragma: no cover - compatibility path
+        pins = {pin.pinned_square: INBETWEEN_BITBOARDS[king_state.king_square][pin.pinner_square] for pin in pins}
+
+    empty_occupancies = ~combined_occupancies & BOARD_MASK
     pawn_piece = WP if is_white else BP
+    pawn_bitboard = piece_array_local[pawn_piece]
+    pinned = 0
+    for square in pins:
+        pinned |= SQUARE_BBS[square]
+    free_pawns = pawn_bitboard & ~pinned
 
     if is_white:
-        pawn_bitboard = piece_array_local[WP]
-        forward_one_delta = -8
-        forward_two_delta = -16
+        single_pushes = (free_pawns >> 8) & empty_occupancies
+        double_pushes = ((single_pushes & RANK_3_BITBOARD) >> 8) & empty_occupancies
+        captures_left = ((free_pawns & ~FILE_A_BITBOARD) >> 9) & enemy_occupancies
+        captures_right = ((free_pawns & ~FILE_H_BITBOARD) >> 7) & enemy_occupancies
+        # Offsets from a target back to the pawn that reaches it.
+        push_offset, left_offset, right_offset = 8, 9, 7
+        promotion_targets = RANK_8_BITBOARD
         start_rank_mask = RANK_2_BITBOARD
         promotion_rank_mask = RANK_7_BITBOARD
         ep_rank_mask = RANK_5_BITBOARD
         pawn_attack_table = WHITE_PAWN_ATTACKS
+        enemy_attack_table = BLACK_PAWN_ATTACKS
         promotion_tags = (
             TAG_W_QUEEN_PROMOTION,
             TAG_W_ROOK_PROMOTION,
@@ -525,15 +796,18 @@ def generate_pawn_moves(
         )
         double_push_tag = TAG_DOUBLE_PAWN_WHITE
         en_passant_tag = TAG_WHITEEP
-        captured_pawn_offset = 8
     else:
-        pawn_bitboard = piece_array_local[BP]
-        forward_one_delta = 8
-        forward_two_delta = 16
+        single_pushes = (free_pawns << 8) & empty_occupancies
+        double_pushes = ((single_pushes & RANK_6_BITBOARD) << 8) & empty_occupancies
+        captures_left = ((free_pawns & ~FILE_A_BITBOARD) << 7) & enemy_occupancies
+        captures_right = ((free_pawns & ~FILE_H_BITBOARD) << 9) & enemy_occupancies
+        push_offset, left_offset, right_offset = -8, -7, -9
+        promotion_targets = RANK_1_BITBOARD
         start_rank_mask = RANK_7_BITBOARD
         promotion_rank_mask = RANK_2_BITBOARD
         ep_rank_mask = RANK_4_BITBOARD
         pawn_attack_table = BLACK_PAWN_ATTACKS
+        enemy_attack_table = WHITE_PAWN_ATTACKS
         promotion_tags = (
             TAG_B_QUEEN_PROMOTION,
             TAG_B_ROOK_PROMOTION,
@@ -548,86 +822,294 @@ def generate_pawn_moves(
         )
         double_push_tag = TAG_DOUBLE_PAWN_BLACK
         en_passant_tag = TAG_BLACKEP
-        captured_pawn_offset = -8
-
-    pin_get = pins.get if isinstance(pins, Mapping) else None
 
-    for starting_square in iterate_bits(pawn_bitboard):
-        pin_mask = pin_get(starting_square, MAX_ULONG) if pin_get else pin_mask_for_square(pins, king_state.king_square, starting_square)
+    piece_bits = pawn_piece << MOVE_PIECE_SHIFT
+    for targets, offset, tag_bits, promotion_tag_list in (
+        (single_pushes, push_offset, QUIET_TAG_BITS, promotion_tags),
+        (double_pushes, 2 * push_offset, double_push_tag << MOVE_TAG_SHIFT, ()),
+        (captures_left, left_offset, CAPTURE_TAG_BITS, capture_promotion_tags),
+        (captures_right, right_offset, CAPTURE_TAG_BITS, capture_promotion_tags),
+    ):
+        targets &= check_mask
+        promotions = targets & promotion_targets
+        targets ^= promotions
+        while targets:
+            lsb = targets & -targets
+            target_square = lsb.bit_length() - 1
+            moves_append((target_square + offset) | (target_square << MOVE_TARGET_SHIFT) | tag_bits | piece_bits)
+            targets ^= lsb
+        if promotions:
+            for target_square in iterate_bits(promotions):
+                for tag in promotion_tag_list:
+                    moves_append(encode_move(target_square + offset, target_square, tag, pawn_piece))
+
+    for starting_square in iterate_bits(pawn_bitboard & pinned):
         start_mask = SQUARE_BBS[starting_square]
-        allowed_mask = check_mask & pin_mask
+        origin = starting_square | piece_bits
+        allowed_mask = check_mask & pins[starting_square]
 
-        forward_one_square = starting_square + forward_one_delta
+        forward_one_square = starting_square - push_offset
         forward_one_mask = SQUARE_BBS[forward_one_square]
         if (forward_one_mask & combined_occupancies) == 0:
             if (start_mask & promotion_rank_mask) != 0:
                 if (forward_one_mask & allowed_mask) != 0:
                     for tag in promotion_tags:
-                        moves_append(Move(starting_square, forward_one_square, tag, pawn_piece))
+                        moves_append(encode_move(starting_square, forward_one_square, tag, pawn_piece))
             else:
                 if (forward_one_mask & allowed_mask) != 0:
-                    moves_append(Move(starting_square, forward_one_square, TAG_NONE, pawn_piece))
+                    moves_append(origin | (forward_one_square << MOVE_TARGET_SHIFT) | QUIET_TAG_BITS)
 
                 if (start_mask & start_rank_mask) != 0:
-                    forward_two_square = starting_square + forward_two_delta
+                    forward_two_square = forward_one_square - push_offset
                     forward_two_mask = SQUARE_BBS[forward_two_square]
-                    if (
-                        (forward_two_mask & combined_occupancies) == 0
-                        and (forward_two_mask & allowed_mask) != 0
-                    ):
-                        moves_append(Move(starting_square, forward_two_square, double_push_tag, pawn_piece))
+                    if (forward_two_mask & empty_occupancies & allowed_mask) != 0:
+                        moves_append(encode_move(starting_square, forward_two_square, double_push_tag, pawn_piece))
 
-        capture_targets = (pawn_attack_table[starting_square] & enemy_occupancies) & allowed_mask
-        if capture_targets:
-            for target_square in iterate_bits(capture_targets):
-                if (start_mask & promotion_rank_mask) != 0:
-                    for tag in capture_promotion_tags:
-                        moves_append(Move(starting_square, target_square, tag, pawn_piece))
-                else:
-                    moves_append(Move(starting_square, target_square, TAG_CAPTURE, pawn_piece))
+        for target_square in iterate_bits(pawn_attack_table[starting_square] & enemy_occupancies & allowed_mask):
+            if (start_mask & promotion_rank_mask) != 0:
+                for tag in capture_promotion_tags:
+                    moves_append(encode_move(starting_square, target_square, tag, pawn_piece))
+            else:
+                moves_append(origin | (target_square << MOVE_TARGET_SHIFT) | CAPTURE_TAG_BITS)
+
+    if en_passant_square != NO_SQUARE:
+        # The pawns that attack the en passant square are exactly those the enemy pawn table reaches from it.
+        for starting_square in iterate_bits(pawn_bitboard & ep_rank_mask & enemy_attack_table[en_passant_square]):
+            if en_passant_is_legal(
+                piece_array_local,
+                is_white,
+                starting_square,
+                en_passant_square,
+                combined_occupancies,
+                king_state.king_square,
+                pins.get(starting_square, MAX_ULONG),
+                check_mask,
+            ):
+                moves_append(encode_move(starting_square, en_passant_square, en_passant_tag, pawn_piece))
 
-        if (
-            en_passant_square != NO_SQUARE
-            and (start_mask & ep_rank_mask) != 0
-            and (pawn_attack_table[starting_square] & SQUARE_BBS[en_passant_square]) != 0
-            and (SQUARE_BBS[en_passant_square] & allowed_mask) != 0
+    return moves
+
+
+def en_passant_is_legal(
+    piece_array_local: Sequence[int],
+    is_white: bool,
+    starting_square: int,
+    en_passant_square: int,
+    combined_occupancies: int,
+    king_square: int,
+    pin_mask: int,
+    check_mask: int,
+) -> bool:
+    """Return whether the pawn on ``starting_square`` may capture en passant.
+
+    The capture resolves a check either by landing on the check ray or by removing
+    the checking pawn, and must not expose the king along the shared rank.
+    """
+
+    captured_square = en_passant_square + (8 if is_white else -8)
+    if (SQUARE_BBS[en_passant_square] & pin_mask) == 0:
+        return False
+    if ((SQUARE_BBS[en_passant_square] | SQUARE_BBS[captured_square]) & check_mask) == 0:
+        return False
+
+    king_rank_mask = RANK_5_BITBOARD if is_white else RANK_4_BITBOARD
+    enemy_rook_piece = BR if is_white else WR
+    enemy_queen_piece = BQ if is_white else WQ
+
+    if (SQUARE_BBS[king_square] & king_rank_mask) == 0 or (
+        (piece_array_local[enemy_rook_piece] & king_rank_mask) == 0
+        and (piece_array_local[enemy_queen_piece] & king_rank_mask) == 0
+    ):
+        return True
+
+    occupancy_without_ep = combined_occupancies & ~SQUARE_BBS[starting_square] & ~SQUARE_BBS[captured_square]
+    rook_attacks_from_king = get_rook_attacks(king_square, occupancy_without_ep)
+    return (rook_attacks_from_king & (piece_array_local[enemy_rook_piece] | piece_array_local[enemy_queen_piece])) == 0
+
+
+def generate_evasion_moves(
+    piece_array_local: Sequence[int],
+    is_white: bool,
+    king_state: KingState,
+    friendly_occupancies: int,
+    enemy_occupancies: int,
+    combined_occupancies: int,
+    en_passant_square: int,
+    moves: list[int],
+) -> list[int]:
+    """Append the legal answers to a single check.
+
+    Apart from king steps, a move must capture the checker or block the ray
+    between it and the king, so ``check_mask`` holds every useful target. The
+    generator walks those few squares and asks which pieces reach each one,
+    instead of generating every piece and filtering.
+    """
+
+    empty_occupancies = ~combined_occupancies & BOARD_MASK
+    generate_king_moves(
+        piece_array_local,
+        king_state,
+        is_white,
+        friendly_occupancies,
+        enemy_occupancies,
+        combined_occupancies,
+        empty_occupancies,
+        0,
+        False,
+        moves,
+    )
+
+    moves_append = moves.append
+    own = WP if is_white else BP
+    pins = king_state.pin_lookup
+    pawns = piece_array_local[own]
+    knights = piece_array_local[own + 1]
+    bishops = piece_array_local[own + 2]
+    rooks = piece_array_local[own + 3]
+    queens = piece_array_local[own + 4]
+
+    if is_white:
+        # A pawn pushing onto ``target`` starts at ``target + push_offset``.
+        push_offset = 8
+        double_push_rank_mask = RANK_4_BITBOARD
+        promotion_rank_mask = RANK_8_BITBOARD
+        # The pawns attacking a square are those the enemy pawn table reaches from it.
+        capturer_table = BLACK_PAWN_ATTACKS
+        promotion_tags = (TAG_W_QUEEN_PROMOTION, TAG_W_ROOK_PROMOTION, TAG_W_BISHOP_PROMOTION, TAG_W_KNIGHT_PROMOTION)
+        capture_promotion_tags = (
+            TAG_W_CAPTURE_QUEEN_PROMOTION,
+            TAG_W_CAPTURE_ROOK_PROMOTION,
+            TAG_W_CAPTURE_BISHOP_PROMOTION,
+            TAG_W_CAPTURE_KNIGHT_PROMOTION,
+        )
+        double_push_tag = TAG_DOUBLE_PAWN_WHITE
+        en_passant_tag = TAG_WHITEEP
+    else:
+        push_offset = -8
+        double_push_rank_mask = RANK_5_BITBOARD
+        promotion_rank_mask = RANK_1_BITBOARD
+        capturer_table = WHITE_PAWN_ATTACKS
+        promotion_tags = (TAG_B_QUEEN_PROMOTION, TAG_B_ROOK_PROMOTION, TAG_B_BISHOP_PROMOTION, TAG_B_KNIGHT_PROMOTION)
+        capture_promotion_tags = (
+            TAG_B_CAPTURE_QUEEN_PROMOTION,
+            TAG_B_CAPTURE_ROOK_PROMOTION,
+            TAG_B_CAPTURE_BISHOP_PROMOTION,
+            TAG_B_CAPTURE_KNIGHT_PROMOTION,
+        )
+        double_push_tag = TAG_DOUBLE_PAWN_BLACK
+        en_passant_tag = TAG_BLACKEP
+
+    for target_square in iterate_bits(king_state.check_mask):
+        target_mask = SQUARE_BBS[target_square]
+        is_capture = (target_mask & enemy_occupancies) != 0
+        tag_bits = CAPTURE_TAG_BITS if is_capture else QUIET_TAG_BITS
+        target_bits = target_square << MOVE_TARGET_SHIFT
+
+        diagonal_attackers = get_bishop_attacks(target_square, combined_occupancies)
+        straight_attackers = get_rook_attacks(target_square, combined_occupancies)
+        for piece, defenders in (
+            (own + 1, KNIGHT_ATTACKS[target_square] & knights),
+            (own + 2, diagonal_attackers & bishops),
+            (own + 3, straight_attackers & rooks),
+            (own + 4, (diagonal_attackers | straight_attackers) & queens),
         ):
-            king_rank_mask = RANK_5_BITBOARD if is_white else RANK_4_BITBOARD
-            enemy_rook_piece = BR if is_white else WR
-            enemy_queen_piece = BQ if is_white else WQ
-            king_piece = WK if is_white else BK
-
-            if (piece_array_local[king_piece] & king_rank_mask) == 0 or (
-                (piece_array_local[enemy_rook_piece] & king_rank_mask) == 0
-                and (piece_array_local[enemy_queen_piece] & king_rank_mask) == 0
+            for starting_square in iterate_bits(defenders):
+                if pins.get(starting_square, MAX_ULONG) & target_mask:
+                    moves_append(starting_square | target_bits | tag_bits | (piece << MOVE_PIECE_SHIFT))
+
+        if is_capture:
+            pawn_origins = capturer_table[target_square] & pawns
+            pawn_tags = capture_promotion_tags
+        else:
+            starting_square = target_square + push_offset
+            pawn_origins = pawns & SQUARE_BBS[starting_square] if 0 <= starting_square < 64 else 0
+            pawn_tags = promotion_tags
+            if (
+                target_mask & double_push_rank_mask
+                and SQUARE_BBS[starting_square] & empty_occupancies
+                and pawns & SQUARE_BBS[starting_square + push_offset]
+                and pins.get(starting_square + push_offset, MAX_ULONG) & target_mask
             ):
-                moves_append(Move(starting_square, en_passant_square, en_passant_tag, pawn_piece))
+                moves_append(encode_move(starting_square + push_offset, target_square, double_push_tag, own))
+
+        for starting_square in iterate_bits(pawn_origins):
+            if not pins.get(starting_square, MAX_ULONG) & target_mask:
+                continue
+            if target_mask & promotion_rank_mask:
+                for tag in pawn_tags:
+                    moves_append(encode_move(starting_square, target_square, tag, own))
             else:
-                occupancy_without_ep = combined_occupancies & ~SQUARE_BBS[starting_square]
-                occupancy_without_ep &= ~SQUARE_BBS[en_passant_square + captured_pawn_offset]
+                moves_append(starting_square | target_bits | tag_bits | (own << MOVE_PIECE_SHIFT))
+
+    if en_passant_square != NO_SQUARE:
+        for starting_square in iterate_bits(pawns & capturer_table[en_passant_square]):
+            if en_passant_is_legal(
+                piece_array_local,
+                is_white,
+                starting_square,
+                en_passant_square,
+                combined_occupancies,
+                king_state.king_square,
+                pins.get(starting_square, MAX_ULONG),
+                king_state.check_mask,
+            ):
+                moves_append(encode_move(starting_square, en_passant_square, en_passant_tag, own))
 
-                rook_attacks_from_king = get_rook_moves_separate(
-                    king_state.king_square,
-                    occupancy_without_ep,
-                )
+    return moves
 
-                if (rook_attacks_from_king & piece_array_local[enemy_rook_piece]) == 0 and (
-                    rook_attacks_from_king & piece_array_local[enemy_queen_piece]
-                ) == 0:
-                    moves_append(Move(starting_square, en_passant_square, en_passant_tag, pawn_piece))
 
-    return moves
+def side_occupancies(piece_array: Sequence[int]) -> tuple[int, int]:
+    """Return ``(white_occupancies, black_occupancies)`` for ``piece_array``."""
+
+    white_occupancies = (
+        piece_array[WP] | piece_array[WN] | piece_array[WB] | piece_array[WR] | piece_array[WQ] | piece_array[WK]
+    )
+    black_occupancies = (
+        piece_array[BP] | piece_array[BN] | piece_array[BB] | piece_array[BR] | piece_array[BQ] | piece_array[BK]
+    )
+    return white_occupancies, black_occupancies
+
+
+def build_mailbox(piece_array: Sequence[int]) -> list[int]:
+    """Return the square -> piece index list for ``piece_array``, ``EMPTY`` where no piece stands."""
 
+    mailbox = [EMPTY] * 64
+    for piece, bitboard in enumerate(piece_array):
+        for square in iterate_bits(bitboard):
+            mailbox[square] = piece
+    return mailbox
 
-def generate_moves_for_side(
+
+def generate_moves_for_side(position: Position) -> list[Move]:
+    return [Move.from_packed(move) for move in generate_packed_moves(position, [])]
+
+
+def generate_packed_moves(position: Position, moves: list[int]) -> list[int]:
+    """Append the packed legal moves of the side to move to ``moves`` and return it."""
+
+    return generate_packed_moves_from_state(
+        position.piece_array,
+        position.white_to_play,
+        position.castle_rights,
+        position.ep,
+        position.white_occupancy,
+        position.black_occupancy,
+        moves,
+    )
+
+
+def generate_packed_moves_from_state(
     piece_array_local: Sequence[int],
     white_to_move: bool,
-    castle_rights: Sequence[bool],
+    castle_rights: int,
     en_passant_square: int,
     white_occupancies: int,
     black_occupancies: int,
-    combined_occupancies: int,
-) -> list[Move]:
+    moves: list[int],
+) -> list[int]:
+    """``generate_packed_moves`` for callers that keep the position and its occupancies elsewhere."""
+
+    combined_occupancies = white_occupancies | black_occupancies
     empty_occupancies = (~combined_occupancies) & BOARD_MASK
 
     if white_to_move:
@@ -649,288 +1131,470 @@ def generate_moves_for_side(
             combined_occupancies,
             empty_occupancies,
             castle_rights,
-            allow_castle=False,
+            False,
+            moves,
         )
 
-    check_mask = king_state.check_mask if king_state.check_count == 1 else MAX_ULONG
-
-    moves: list[Move] = []
-    moves.extend(
-        generate_king_moves(
+    if king_state.check_count == 1:
+        return generate_evasion_moves(
             piece_array_local,
-            king_state,
             white_to_move,
+            king_state,
             friendly_occ,
             enemy_occ,
             combined_occupancies,
-            empty_occupancies,
-            castle_rights,
-            allow_castle=king_state.check_count == 0,
+            en_passant_square,
+            moves,
         )
+
+    check_mask = MAX_ULONG
+
+    generate_king_moves(
+        piece_array_local,
+        king_state,
+        white_to_move,
+        friendly_occ,
+        enemy_occ,
+        combined_occupancies,
+        empty_occupancies,
+        castle_rights,
+        True,
+        moves,
     )
 
     knight_piece = WN if white_to_move else BN
-    moves.extend(
-        generate_leaper_moves(
-            piece_array_local[knight_piece],
-            KNIGHT_ATTACKS,
-            knight_piece,
-            enemy_occ,
-            empty_occupancies,
-            check_mask,
-            king_state.pin_lookup,
-            king_state,
-        )
+    generate_leaper_moves(
+        piece_array_local[knight_piece],
+        KNIGHT_ATTACKS,
+        knight_piece,
+        enemy_occ,
+        empty_occupancies,
+        check_mask,
+        king_state.pin_lookup,
+        king_state,
+        moves,
     )
 
-    moves.extend(
-        generate_pawn_moves(
-            piece_array_local,
-            white_to_move,
-            enemy_occ,
-            combined_occupancies,
-            check_mask,
-            king_state.pin_lookup,
-            king_state,
-            en_passant_square,
-        )
+    generate_pawn_moves(
+        piece_array_local,
+        white_to_move,
+        enemy_occ,
+        combined_occupancies,
+        check_mask,
+        king_state.pin_lookup,
+        king_state,
+        en_passant_square,
+        moves,
     )
 
     bishop_piece = WB if white_to_move else BB
-    moves.extend(
-        generate_slider_moves(
-            piece_array_local[bishop_piece],
-            get_bishop_moves_separate,
-            bishop_piece,
-            enemy_occ,
-            empty_occupancies,
-            combined_occupancies,
-            check_mask,
-            king_state.pin_lookup,
-            king_state,
-        )
+    generate_slider_moves(
+        piece_array_local[bishop_piece],
+        get_bishop_attacks,
+        bishop_piece,
+        enemy_occ,
+        empty_occupancies,
+        combined_occupancies,
+        check_mask,
+        king_state.pin_lookup,
+        king_state,
+        moves,
     )
 
     rook_piece = WR if white_to_move else BR
-    moves.extend(
-        generate_slider_moves(
-            piece_array_local[rook_piece],
-            get_rook_moves_separate,
-            rook_piece,
-            enemy_occ,
-            empty_occupancies,
-            combined_occupancies,
-            check_mask,
-            king_state.pin_lookup,
-            king_state,
-        )
+    generate_slider_moves(
+        piece_array_local[rook_piece],
+        get_rook_attacks,
+        rook_piece,
+        enemy_occ,
+        empty_occupancies,
+        combined_occupancies,
+        check_mask,
+        king_state.pin_lookup,
+        king_state,
+        moves,
     )
 
     queen_piece = WQ if white_to_move else BQ
+    generate_slider_moves(
+        piece_array_local[queen_piece],
+        get_queen_attacks,
+        queen_piece,
+        enemy_occ,
+        empty_occupancies,
+        combined_occupancies,
+        check_mask,
+        king_state.pin_lookup,
+        king_state,
+        moves,
+    )
+
+    return moves
+
+
+def count_leaper_moves(piece_bitboard: int, attack_table: Sequence[int], movable: int, pins: Mapping[int, int]) -> int:
+    count = 0
+    pin_get = pins.get
+    for starting_square in iterate_bits(piece_bitboard):
+        count += (attack_table[starting_square] & movable & pin_get(starting_square, MAX_ULONG)).bit_count()
+    return count
+
+
+def count_slider_moves(
+    piece_bitboard: int,
+    attack_fn: Callable[[int, int], int],
+    combined_occupancies: int,
+    movable: int,
+    pins: Mapping[int, int],
+) -> int:
+    count = 0
+    pin_get = pins.get
+    for starting_square in iterate_bits(piece_bitboard):
+        attack_mask = attack_fn(starting_square, combined_occupancies) & movable
+        count += (attack_mask & pin_get(starting_square, MAX_ULONG)).bit_count()
+    return count
+
+
+def count_pawn_moves(
+    piece_array_local: Sequence[int],
+    is_white: bool,
+    enemy_occupancies: int,
+    combined_occupancies: int,
+    check_mask: int,
+    pins: Mapping[int, int],
+    king_state: KingState,
+    en_passant_square: int,
+) -> int:
+    """Count pawn moves the way ``generate_pawn_moves`` would emit them.
+
+    Unpinned pawns are counted a whole set at a time by shifting the pawn bitboard;
+    promotions count four times. Pinned pawns and en passant go square by square.
+    """
+
+    empty_occupancies = ~combined_occupancies & BOARD_MASK
+    pawn_bitboard = piece_array_local[WP if is_white else BP]
+    pinned = 0
+    for square in pins:
+        pinned |= SQUARE_BBS[square]
+    free_pawns = pawn_bitboard & ~pinned
+
+    if is_white:
+        single_pushes = (free_pawns >> 8) & empty_occupancies
+        double_pushes = ((single_pushes & RANK_3_BITBOARD) >> 8) & empty_occupancies
+        captures_left = ((free_pawns & ~FILE_A_BITBOARD) >> 9) & enemy_occupancies
+        captures_right = ((free_pawns & ~FILE_H_BITBOARD) >> 7) & enemy_occupancies
+        promotion_targets = RANK_8_BITBOARD
+        forward_one_delta = -8
+        start_rank_mask = RANK_2_BITBOARD
+        ep_rank_mask = RANK_5_BITBOARD
+        pawn_attack_table = WHITE_PAWN_ATTACKS
+    else:
+        single_pushes = (free_pawns << 8) & empty_occupancies
+        double_pushes = ((single_pushes & RANK_6_BITBOARD) << 8) & empty_occupancies
+        captures_left = ((free_pawns & ~FILE_A_BITBOARD) << 7) & enemy_occupancies
+        captures_right = ((free_pawns & ~FILE_H_BITBOARD) << 9) & enemy_occupancies
+        promotion_targets = RANK_1_BITBOARD
+        forward_one_delta = 8
+        start_rank_mask = RANK_7_BITBOARD
+        ep_rank_mask = RANK_4_BITBOARD
+        pawn_attack_table = BLACK_PAWN_ATTACKS
+
+    count = (double_pushes & check_mask).bit_count()
+    for targets in (single_pushes, captures_left, captures_right):
+        targets &= check_mask
+        count += (targets & ~promotion_targets).bit_count() + 4 * (targets & promotion_targets).bit_count()
+
+    for starting_square in iterate_bits(pawn_bitboard & pinned):
+        allowed_mask = check_mask & pins[starting_square]
+        promotion_weight = 4 if (SQUARE_BBS[starting_square] & (RANK_7_BITBOARD if is_white else RANK_2_BITBOARD)) else 1
+        forward_one_mask = SQUARE_BBS[starting_square + forward_one_delta]
+        if forward_one_mask & empty_occupancies:
+            if forward_one_mask & allowed_mask:
+                count += promotion_weight
+            if SQUARE_BBS[starting_square] & start_rank_mask:
+                forward_two_mask = SQUARE_BBS[starting_square + 2 * forward_one_delta]
+                if forward_two_mask & empty_occupancies & allowed_mask:
+                    count += 1
+        count += promotion_weight * (pawn_attack_table[starting_square] & enemy_occupancies & allowed_mask).bit_count()
+
+    if en_passant_square != NO_SQUARE:
+        # The pawns that attack the en passant square are exactly those the enemy pawn table reaches from it.
+        enemy_attack_table = BLACK_PAWN_ATTACKS if is_white else WHITE_PAWN_ATTACKS
+        for starting_square in iterate_bits(pawn_bitboard & ep_rank_mask & enemy_attack_table[en_passant_square]):
+            if en_passant_is_legal(
+                piece_array_local,
+                is_white,
+                starting_square,
+                en_passant_square,
+                combined_occupancies,
+                king_state.king_square,
+                pins.get(starting_square, MAX_ULONG),
+                check_mask,
+            ):
+                count += 1
+
+    return count
+
+
+def count_moves_for_side(position: Position) -> int:
+    """Return ``len(generate_packed_moves(position, []))`` without building the moves.
+
+    Every piece contributes the popcount of its legal target mask, which is what
+    makes the last ply of perft cheap.
+    """
+
+    return count_moves_from_state(
+        position.piece_array,
+        position.white_to_play,
+        position.castle_rights,
+        position.ep,
+        position.white_occupancy,
+        position.black_occupancy,
+    )
+
+
+def count_moves_from_state(
+    piece_array_local: Sequence[int],
+    white_to_move: bool,
+    castle_rights: int,
+    en_passant_square: int,
+    white_occupancies: int,
+    black_occupancies: int,
+) -> int:
+    combined_occupancies = white_occupancies | black_occupancies
+
+    if white_to_move:
+        friendly_occ = white_occupancies
+        enemy_occ = black_occupancies
+    else:
+        friendly_occ = black_occupancies
+        enemy_occ = white_occupancies
+
+    king_state = analyze_king_state(piece_array_local, white_to_move, friendly_occ, enemy_occ)
 
-    def queen_attack_fn(square: int, occupancies: int) -> int:
-        return get_rook_moves_separate(square, occupancies) | get_bishop_moves_separate(square, occupancies)
+    if king_state.check_count == 1:
+        # Few moves answer a check, and the evasion generator finds them without scanning every piece.
+        return len(
+            generate_evasion_moves(
+                piece_array_local,
+                white_to_move,
+                king_state,
+                friendly_occ,
+                enemy_occ,
+                combined_occupancies,
+                en_passant_square,
+                [],
+            )
+        )
+
+    # At most eight king steps and two castles: cheaper to generate than to duplicate the safety checks.
+    king_moves = generate_king_moves(
+        piece_array_local,
+        king_state,
+        white_to_move,
+        friendly_occ,
+        enemy_occ,
+        combined_occupancies,
+        ~combined_occupancies & BOARD_MASK,
+        castle_rights,
+        king_state.check_count == 0,
+        [],
+    )
+    if king_state.check_count > 1:
+        return len(king_moves)
 
-    moves.extend(
-        generate_slider_moves(
-            piece_array_local[queen_piece],
-            queen_attack_fn,
-            queen_piece,
+    check_mask = MAX_ULONG
+    movable = ~friendly_occ & BOARD_MASK
+    pins = king_state.pin_lookup
+    own = WP if white_to_move else BP
+
+    return (
+        len(king_moves)
+        + count_leaper_moves(piece_array_local[own + 1], KNIGHT_ATTACKS, movable, pins)
+        + count_pawn_moves(
+            piece_array_local,
+            white_to_move,
             enemy_occ,
-            empty_occupancies,
             combined_occupancies,
             check_mask,
-            king_state.pin_lookup,
+            pins,
             king_state,
+            en_passant_square,
         )
+        + count_slider_moves(piece_array_local[own + 2], get_bishop_attacks, combined_occupancies, movable, pins)
+        + count_slider_moves(piece_array_local[own + 3], get_rook_attacks, combined_occupancies, movable, pins)
+        + count_slider_moves(piece_array_local[own + 4], get_queen_attacks, combined_occupancies, movable, pins)
     )
 
-    return moves
 
+def apply_move(position: Position, move: Move | int) -> MoveContext:
+    if isinstance(move, int):
+        starting = move & 63
+        target = (move >> MOVE_TARGET_SHIFT) & 63
+        tag = (move >> MOVE_TAG_SHIFT) & 31
+        piece = move >> MOVE_PIECE_SHIFT
+    else:
+        starting, target, tag, piece = move
+
+    effect = MOVE_TAG_EFFECTS[tag] if tag < len(MOVE_TAG_EFFECTS) else None
+    if effect is None:
+        msg = f"Unsupported move tag {tag}"
+        raise ValueError(msg)
+    promoted_piece, ep_victim, ep_victim_offset, rook, rook_from, rook_to, ep_offset = effect
+
+    piece_arr = position.piece_array
+    mailbox = position.mailbox
+
+    previous_ep = position.ep
+    previous_castle = position.castle_rights
+    previous_hash = position.hash_key
+    previous_halfmove_clock = position.halfmove_clock
+    key = previous_hash ^ SIDE_KEY
+    if previous_ep != NO_SQUARE:
+        key ^= EP_FILE_KEYS[previous_ep & 7]
+
+    start_mask = SQUARE_BBS[starting]
+    target_mask = SQUARE_BBS[target]
+    own_delta = start_mask | target_mask
+    enemy_delta = 0
+
+    capture_index = mailbox[target]
+    if capture_index != EMPTY:
+        piece_arr[capture_index] ^= target_mask
+        enemy_delta = target_mask
+        key ^= PIECE_KEYS[capture_index][target]
+    elif ep_victim >= 0:
+        capture_index = ep_victim
+        victim_square = target + ep_victim_offset
+        piece_arr[ep_victim] ^= SQUARE_BBS[victim_square]
+        enemy_delta = SQUARE_BBS[victim_square]
+        mailbox[victim_square] = EMPTY
+        key ^= PIECE_KEYS[ep_victim][victim_square]
+    else:
+        capture_index = -1
+
+    landing_piece = piece if promoted_piece < 0 else promoted_piece
+    piece_arr[piece] ^= start_mask
+    piece_arr[landing_piece] ^= target_mask
+    mailbox[starting] = EMPTY
+    mailbox[target] = landing_piece
+    key ^= PIECE_KEYS[piece][starting] ^ PIECE_KEYS[landing_piece][target]
+
+    if rook >= 0:
+        rook_delta = SQUARE_BBS[rook_from] | SQUARE_BBS[rook_to]
+        piece_arr[rook] ^= rook_delta
+        own_delta |= rook_delta
+        mailbox[rook_from] = EMPTY
+        mailbox[rook_to] = rook
+        key ^= PIECE_KEYS[rook][rook_from] ^ PIECE_KEYS[rook][rook_to]
+
+    if piece < BP:
+        position.white_occupancy ^= own_delta
+        position.black_occupancy ^= enemy_delta
+    else:
+        position.black_occupancy ^= own_delta
+        position.white_occupancy ^= enemy_delta
+    position.occupancy = position.white_occupancy | position.black_occupancy
 
-def apply_move(move: Move) -> MoveContext:
-    global white_to_play
-    global ep
+    castle = previous_castle & CASTLE_MASK[starting] & CASTLE_MASK[target]
+    key ^= CASTLE_MASK_KEYS[previous_castle ^ castle]
+    position.castle_rights = castle
 
-    previous_ep = ep
-    previous_castle = (
-        castle_rights[0],
-        castle_rights[1],
-        castle_rights[2],
-        castle_rights[3],
-    )
-    capture_index = -1
-
-    white_to_play = not white_to_play
-
-    piece_arr = piece_array
-    castle = castle_rights
-    start_mask = 1 << move.starting
-    target_mask = 1 << move.target
-    tag = move.tag
-
-    def add(piece_index: int, mask: int) -> None:
-        piece_arr[piece_index] |= mask
-
-    def remove(piece_index: int, mask: int) -> None:
-        piece_arr[piece_index] &= ~mask
-
-    ep = NO_SQUARE
-
-    if tag in (TAG_NONE, TAG_CHECK):
-        add(move.piece, target_mask)
-        remove(move.piece, start_mask)
-    elif tag in (TAG_CAPTURE, TAG_CHECK_CAPTURE):
-        add(move.piece, target_mask)
-        remove(move.piece, start_mask)
-        capture_index = locate_captured_piece(move.target, move.piece)
-        if capture_index != -1:
-            remove(capture_index, target_mask)
-    elif tag == TAG_WHITEEP:
-        add(move.piece, target_mask)
-        remove(move.piece, start_mask)
-        remove(BP, SQUARE_BBS[move.target + 8])
-        capture_index = BP
-    elif tag == TAG_BLACKEP:
-        add(move.piece, target_mask)
-        remove(move.piece, start_mask)
-        remove(WP, SQUARE_BBS[move.target - 8])
-        capture_index = WP
-    elif tag == TAG_WCASTLEKS:
-        add(WK, SQUARE_BBS[G1])
-        remove(WK, SQUARE_BBS[E1])
-        add(WR, SQUARE_BBS[F1])
-        remove(WR, SQUARE_BBS[H1])
-    elif tag == TAG_WCASTLEQS:
-        add(WK, SQUARE_BBS[C1])
-        remove(WK, SQUARE_BBS[E1])
-        add(WR, SQUARE_BBS[D1])
-        remove(WR, SQUARE_BBS[A1])
-    elif tag == TAG_BCASTLEKS:
-        add(BK, SQUARE_BBS[G8])
-        remove(BK, SQUARE_BBS[E8])
-        add(BR, SQUARE_BBS[F8])
-        remove(BR, SQUARE_BBS[H8])
-    elif tag == TAG_BCASTLEQS:
-        add(BK, SQUARE_BBS[C8])
-        remove(BK, SQUARE_BBS[E8])
-        add(BR, SQUARE_BBS[D8])
-        remove(BR, SQUARE_BBS[A8])
-    elif tag in PROMOTION_MAP:
-        promoted_piece = PROMOTION_MAP[tag]
-        add(promoted_piece, target_mask)
-        remove(move.piece, start_mask)
-    elif tag in CAPTURE_PROMOTION_MAP:
-        promoted_piece = CAPTURE_PROMOTION_MAP[tag]
-        add(promoted_piece, target_mask)
-        remove(move.piece, start_mask)
-        capture_index = locate_captured_piece(move.target, move.piece)
-        if capture_index != -1:
-            remove(capture_index, target_mask)
-    elif tag == TAG_DOUBLE_PAWN_WHITE:
-        add(move.piece, target_mask)
-        remove(move.piece, start_mask)
-        ep = move.target + 8
-    elif tag == TAG_DOUBLE_PAWN_BLACK:
-        add(move.piece, target_mask)
-        remove(move.piece, start_mask)
-        ep = move.target - 8
+    if ep_offset:
+        ep = target + ep_offset
+        key ^= EP_FILE_KEYS[ep & 7]
     else:
-        msg = f"Unsupported move tag {move.tag}"
-        raise ValueError(msg)
+        ep = NO_SQUARE
 
-    if move.piece == WK:
-        castle[WKS_CASTLE_RIGHTS] = False
-        castle[WQS_CASTLE_RIGHTS] = False
-    elif move.piece == BK:
-        castle[BKS_CASTLE_RIGHTS] = False
-        castle[BQS_CASTLE_RIGHTS] = False
-    elif move.piece == WR:
-        if castle[WKS_CASTLE_RIGHTS] and (piece_arr[WR] & SQUARE_BBS[H1]) == 0:
-            castle[WKS_CASTLE_RIGHTS] = False
-        if castle[WQS_CASTLE_RIGHTS] and (piece_arr[WR] & SQUARE_BBS[A1]) == 0:
-            castle[WQS_CASTLE_RIGHTS] = False
-    elif move.piece == BR:
-        if castle[BKS_CASTLE_RIGHTS] and (piece_arr[BR] & SQUARE_BBS[H8]) == 0:
-            castle[BKS_CASTLE_RIGHTS] = False
-        if castle[BQS_CASTLE_RIGHTS] and (piece_arr[BR] & SQUARE_BBS[A8]) == 0:
-            castle[BQS_CASTLE_RIGHTS] = False
-
-    return MoveContext(capture_index, previous_ep, previous_castle)
-
-
-def undo_move(move: Move, context: MoveContext) -> None:
-    global white_to_play
-    global ep
-
-    white_to_play = not white_to_play
-
-    piece_arr = piece_array
-    start_mask = 1 << move.starting
-    target_mask = 1 << move.target
-    tag = move.tag
-
-    def add(piece_index: int, mask: int) -> None:
-        piece_arr[piece_index] |= mask
-
-    def remove(piece_index: int, mask: int) -> None:
-        piece_arr[piece_index] &= ~mask
-
-    if tag in (TAG_NONE, TAG_CHECK):
-        add(move.piece, start_mask)
-        remove(move.piece, target_mask)
-    elif tag in (TAG_CAPTURE, TAG_CHECK_CAPTURE):
-        add(move.piece, start_mask)
-        remove(move.piece, target_mask)
-        if context.captured_piece_index != -1:
-            add(context.captured_piece_index, target_mask)
-    elif tag == TAG_WHITEEP:
-        add(move.piece, start_mask)
-        remove(move.piece, target_mask)
-        add(BP, SQUARE_BBS[move.target + 8])
-    elif tag == TAG_BLACKEP:
-        add(move.piece, start_mask)
-        remove(move.piece, target_mask)
-        add(WP, SQUARE_BBS[move.target - 8])
-    elif tag == TAG_WCASTLEKS:
-        add(WK, SQUARE_BBS[E1])
-        remove(WK, SQUARE_BBS[G1])
-        add(WR, SQUARE_BBS[H1])
-        remove(WR, SQUARE_BBS[F1])
-    elif tag == TAG_WCASTLEQS:
-        add(WK, SQUARE_BBS[E1])
-        remove(WK, SQUARE_BBS[C1])
-        add(WR, SQUARE_BBS[A1])
-        remove(WR, SQUARE_BBS[D1])
-    elif tag == TAG_BCASTLEKS:
-        add(BK, SQUARE_BBS[E8])
-        remove(BK, SQUARE_BBS[G8])
-        add(BR, SQUARE_BBS[H8])
-        remove(BR, SQUARE_BBS[F8])
-    elif tag == TAG_BCASTLEQS:
-        add(BK, SQUARE_BBS[E8])
-        remove(BK, SQUARE_BBS[C8])
-        add(BR, SQUARE_BBS[A8])
-        remove(BR, SQUARE_BBS[D8])
-    elif tag in PROMOTION_MAP:
-        promoted_piece = PROMOTION_MAP[tag]
-        add(move.piece, start_mask)
-        remove(promoted_piece, target_mask)
-    elif tag in CAPTURE_PROMOTION_MAP:
-        promoted_piece = CAPTURE_PROMOTION_MAP[tag]
-        add(move.piece, start_mask)
-        remove(promoted_piece, target_mask)
-        if context.captured_piece_index != -1:
-            add(context.captured_piece_index, target_mask)
-    elif tag in (TAG_DOUBLE_PAWN_WHITE, TAG_DOUBLE_PAWN_BLACK):
-        add(move.piece, start_mask)
-        remove(move.piece, target_mask)
+    if piece in (WP, BP) or capture_index != -1:
+        position.halfmove_clock = 0
     else:
-        msg = f"Unsupported move tag {move.tag}"
-        raise ValueError(msg)
+        position.halfmove_clock += 1
+    position.white_to_play = not position.white_to_play
+    # The side to move has already flipped: white to play again means black just moved.
+    if position.white_to_play:
+        position.fullmove_number += 1
+
+    position.ep = ep
+    position.hash_key = key
+    if VERIFY_HASH:
+        verify_hash(position)
+    return MoveContext(capture_index, previous_ep, previous_castle, previous_hash, previous_halfmove_clock)
+
+
+def undo_move(position: Position, move: Move | int, context: MoveContext) -> None:
+    if isinstance(move, int):
+        starting = move & 63
+        target = (move >> MOVE_TARGET_SHIFT) & 63
+        tag = (move >> MOVE_TAG_SHIFT) & 31
+        piece = move >> MOVE_PIECE_SHIFT
+    else:
+        starting, target, tag, piece = move
 
-    castle_rights[0], castle_rights[1], castle_rights[2], castle_rights[3] = context.previous_castle_rights
-    ep = context.previous_ep
+    effect = MOVE_TAG_EFFECTS[tag] if tag < len(MOVE_TAG_EFFECTS) else None
+    if effect is None:
+        msg = f"Unsupported move tag {tag}"
+        raise ValueError(msg)
+    promoted_piece, ep_victim, ep_victim_offset, rook, rook_from, rook_to, _ep_offset = effect
+
+    piece_arr = position.piece_array
+    mailbox = position.mailbox
+
+    start_mask = SQUARE_BBS[starting]
+    target_mask = SQUARE_BBS[target]
+    own_delta = start_mask | target_mask
+    enemy_delta = 0
+
+    landing_piece = piece if promoted_piece < 0 else promoted_piece
+    piece_arr[piece] ^= start_mask
+    piece_arr[landing_piece] ^= target_mask
+    mailbox[starting] = piece
+    mailbox[target] = EMPTY
+
+    captured = context.captured_piece_index
+    if ep_victim >= 0:
+        victim_square = target + ep_victim_offset
+        piece_arr[ep_victim] ^= SQUARE_BBS[victim_square]
+        enemy_delta = SQUARE_BBS[victim_square]
+        mailbox[victim_square] = ep_victim
+    elif captured != -1:
+        piece_arr[captured] ^= target_mask
+        enemy_delta = target_mask
+        mailbox[target] = captured
+
+    if rook >= 0:
+        rook_delta = SQUARE_BBS[rook_from] | SQUARE_BBS[rook_to]
+        piece_arr[rook] ^= rook_delta
+        own_delta |= rook_delta
+        mailbox[rook_to] = EMPTY
+        mailbox[rook_from] = rook
+
+    if piece < BP:
+        position.white_occupancy ^= own_delta
+        position.black_occupancy ^= enemy_delta
+    else:
+        position.black_occupancy ^= own_delta
+        position.white_occupancy ^= enemy_delta
+    position.occupancy = position.white_occupancy | position.black_occupancy
+
+    position.white_to_play = not position.white_to_play
+    position.castle_rights = context.previous_castle_rights
+    position.ep = context.previous_ep
+    position.hash_key = context.previous_hash
+    position.halfmove_clock = context.previous_halfmove_clock
+    if not position.white_to_play:
+        position.fullmove_number -= 1
+    if VERIFY_HASH:
+        verify_hash(position)
+
+
+def verify_hash(position: Position) -> None:
+    """Recompute the Zobrist key from scratch and raise if the incremental key has drifted."""
+
+    expected = compute_hash(position.piece_array, position.white_to_play, position.castle_rights, position.ep)
+    if position.hash_key != expected:
+        msg = f"Hash mismatch: incremental {position.hash_key:#018x}, recomputed {expected:#018x}"
+        raise ValueError(msg)
 
 
 def print_move_no_nl(starting: int, target_square: int, tag: int):  # starting
@@ -1080,13 +1744,191 @@ def get_bishop_moves_separate(square, combined_occ):
     return combined_attacks
 
 
+_NOT_FILE_A: int = BOARD_MASK ^ FILE_A_BITBOARD
+_NOT_FILE_H: int = BOARD_MASK ^ FILE_H_BITBOARD
+_NOT_FILE_AB: int = BOARD_MASK ^ (FILE_A_BITBOARD | FILE_B_BITBOARD)
+_NOT_FILE_GH: int = BOARD_MASK ^ (FILE_G_BITBOARD | FILE_H_BITBOARD)
+EMPTY_BOARD_BISHOP_ATTACKS: list[int] = [get_bishop_attacks(square, 0) for square in range(64)]
+EMPTY_BOARD_ROOK_ATTACKS: list[int] = [get_rook_attacks(square, 0) for square in range(64)]
+
+
+def attack_map(piece_array_local: Sequence[int], by_white: bool, occupancy: int, targets: int = BOARD_MASK) -> int:
+    """Return the squares attacked by one side, with sliders stopped by ``occupancy``.
+
+    Pawns and knights are shifted as whole sets (index + 1 is one file east,
+    index + 8 one rank south); the file masks stop them wrapping around the board edge.
+    Sliders whose empty-board lines miss ``targets`` are skipped, so the result is
+    only complete on ``targets``; king safety asks about a handful of squares.
+    """
+
+    base = WP if by_white else BP
+    pawns = piece_array_local[base]
+    if by_white:
+        attacks = (pawns & _NOT_FILE_A) >> 9 | (pawns & _NOT_FILE_H) >> 7
+    else:
+        attacks = ((pawns & _NOT_FILE_A) << 7 | (pawns & _NOT_FILE_H) << 9) & BOARD_MASK
+
+    knights = piece_array_local[base + 1]
+    if knights:
+        attacks |= (
+            (
+                (knights & _NOT_FILE_H) << 17
+                | (knights & _NOT_FILE_A) << 15
+                | (knights & _NOT_FILE_GH) << 10
+                | (knights & _NOT_FILE_AB) << 6
+            )
+            & BOARD_MASK
+            | (knights & _NOT_FILE_A) >> 17
+            | (knights & _NOT_FILE_H) >> 15
+            | (knights & _NOT_FILE_AB) >> 10
+            | (knights & _NOT_FILE_GH) >> 6
+        )
+
+    king = piece_array_local[base + 5]
+    if king:
+        attacks |= KING_ATTACKS[king.bit_length() - 1]
+
+    # Plain loops rather than ``iterate_bits``: this runs at every node.
+    queens = piece_array_local[base + 4]
+    sliders = piece_array_local[base + 2] | queens
+    while sliders:
+        lsb = sliders & -sliders
+        square = lsb.bit_length() - 1
+        if EMPTY_BOARD_BISHOP_ATTACKS[square] & targets:
+            attacks |= get_bishop_attacks(square, occupancy)
+        sliders ^= lsb
+    sliders = piece_array_local[base + 3] | queens
+    while sliders:
+        lsb = sliders & -sliders
+        square = lsb.bit_length() - 1
+        if EMPTY_BOARD_ROOK_ATTACKS[square] & targets:
+            attacks |= get_rook_attacks(square, occupancy)
+        sliders ^= lsb
+    return attacks
+
+
+def attacked_squares(position: Position, by_white: bool) -> int:
+    """Return the bitboard of squares the white (``by_white``) or black pieces attack."""
+
+    return attack_map(position.piece_array, by_white, position.occupancy)
+
+
+def attackers_to(piece_array_local: Sequence[int], square: int, occupancy: int) -> int:
+    """Return the pieces of both sides that attack ``square``, with sliders stopped by ``occupancy``."""
+
+    return (
+        piece_array_local[WP] & BLACK_PAWN_ATTACKS[square]
+        | piece_array_local[BP] & WHITE_PAWN_ATTACKS[square]
+        | (piece_array_local[WN] | piece_array_local[BN]) & KNIGHT_ATTACKS[square]
+        | (piece_array_local[WK] | piece_array_local[BK]) & KING_ATTACKS[square]
+        | (piece_array_local[WB] | piece_array_local[WQ] | piece_array_local[BB] | piece_array_local[BQ])
+        & get_bishop_attacks(square, occupancy)
+        | (piece_array_local[WR] | piece_array_local[WQ] | piece_array_local[BR] | piece_array_local[BQ])
+        & get_rook_attacks(square, occupancy)
+    )
+
+
+# Exchange values by piece kind (pawn..king); the king is priced so that it is never traded.
+SEE_VALUES: tuple[int, ...] = (100, 320, 330, 500, 900, 20_000)
+
+
+def uncovered_attackers(target: int, removed: int, occupancy: int, diagonal: int, straight: int) -> int:
+    """Return the sliders that now reach ``target`` through the ``removed`` square (x-rays).
+
+    ``occupancy`` no longer holds ``removed``; ``diagonal`` and ``straight`` are
+    the bishop-like and rook-like sliders of both sides.
+    """
+
+    if EMPTY_BOARD_BISHOP_ATTACKS[target] & removed:
+        candidates = diagonal & EMPTY_BOARD_BISHOP_ATTACKS[target] & occupancy
+    elif EMPTY_BOARD_ROOK_ATTACKS[target] & removed:
+        candidates = straight & EMPTY_BOARD_ROOK_ATTACKS[target] & occupancy
+    else:
+        return 0
+
+    between = INBETWEEN_BITBOARDS[target]
+    uncovered = 0
+    while candidates:
+        lowest = candidates & -candidates
+        ray = between[lowest.bit_length() - 1]
+        # The line from the target runs through the removed square and is clear up to the slider.
+        if ray & removed and ray & occupancy == lowest:
+            uncovered |= lowest
+        candidates ^= lowest
+    return uncovered
+
+
+def static_exchange_eval(position: Position, move: Move | int) -> int:
+    """Return the material ``move`` wins or loses once the exchange on its target square is played out.
+
+    Both sides recapture with their least valuable attacker and either may stop
+    when going on would lose material. Sliders behind a piece that joins the
+    exchange come in once it has left. Pins are ignored, and a king only
+    recaptures a square the other side no longer attacks. A quiet move scores
+    0, or minus its own value if it simply hangs the piece.
+    """
+
+    if isinstance(move, int):
+        starting = move & 63
+        target = (move >> MOVE_TARGET_SHIFT) & 63
+        tag = (move >> MOVE_TAG_SHIFT) & 31
+        piece = move >> MOVE_PIECE_SHIFT
+    else:
+        starting, target, tag, piece = move
+
+    piece_array = position.piece_array
+    occupancy = position.occupancy ^ SQUARE_BBS[starting]
+    victim = position.mailbox[target]
+    gain = 0 if victim == EMPTY else SEE_VALUES[victim % 6]
+    if tag in (TAG_WHITEEP, TAG_BLACKEP):
+        gain = SEE_VALUES[0]
+        occupancy ^= SQUARE_BBS[target + 8 if tag == TAG_WHITEEP else target - 8]
+    on_target = SEE_VALUES[piece % 6]
+    promoted = PROMOTION_MAP.get(tag, CAPTURE_PROMOTION_MAP.get(tag))
+    if promoted is not None:
+        on_target = SEE_VALUES[promoted % 6]
+        gain += on_target - SEE_VALUES[0]
+
+    diagonal = piece_array[WB] | piece_array[WQ] | piece_array[BB] | piece_array[BQ]
+    straight = piece_array[WR] | piece_array[WQ] | piece_array[BR] | piece_array[BQ]
+    # The mover left its square before this lookup, so sliders behind it are already included.
+    attackers = attackers_to(piece_array, target, occupancy) & occupancy
+
+    # gains[d] is what the side making capture d has won if the exchange stops after it.
+    gains = [gain]
+    white = piece < BP
+    while True:
+        white = not white
+        side = attackers & (position.white_occupancy if white else position.black_occupancy)
+        if not side:
+            break
+        base = WP if white else BP
+        kind = 0
+        while not piece_array[base + kind] & side:
+            kind += 1
+        if kind == 5 and attackers & ~side:
+            break
+
+        gains.append(on_target - gains[-1])
+        on_target = SEE_VALUES[kind]
+        lowest = piece_array[base + kind] & side
+        lowest &= -lowest
+        occupancy ^= lowest
+        attackers ^= lowest
+        attackers |= uncovered_attackers(target, lowest, occupancy, diagonal, straight)
+
+    # Unwind: each side only goes on with the exchange if that beats stopping.
+    while len(gains) > 1:
+        last = gains.pop()
+        gains[-1] = min(gains[-1], -last)
+    return gains[0]
+
+
 def is_square_attacked_by_black(
     square: int,
     occupancy: int,
-    pieces: Sequence[int] | None = None,
+    pieces: Sequence[int],
 ) -> bool:
-    pieces = piece_array if pieces is None else pieces
-
     if (pieces[BP] & WHITE_PAWN_ATTACKS[square]) != 0:
         return True
 
@@ -1096,14 +1938,14 @@ def is_square_attacked_by_black(
     if (pieces[BK] & KING_ATTACKS[square]) != 0:
         return True
 
-    bishop_attacks: int = get_bishop_moves_separate(square, occupancy)
+    bishop_attacks: int = get_bishop_attacks(square, occupancy)
     if (pieces[BB] & bishop_attacks) != 0:
         return True
 
     if (pieces[BQ] & bishop_attacks) != 0:
         return True
 
-    rook_attacks: int = get_rook_moves_separate(square, occupancy)
+    rook_attacks: int = get_rook_attacks(square, occupancy)
     if (pieces[BR] & rook_attacks) != 0:
         return True
 
@@ -1113,10 +1955,8 @@ def is_square_attacked_by_black(
 def is_square_attacked_by_white(
     square: int,
     occupancy: int,
-    pieces: Sequence[int] | None = None,
+    pieces: Sequence[int],
 ) -> bool:
-    pieces = piece_array if pieces is None else pieces
-
     if (pieces[WP] & BLACK_PAWN_ATTACKS[square]) != 0:
         return True
 
@@ -1126,14 +1966,14 @@ def is_square_attacked_by_white(
     if (pieces[WK] & KING_ATTACKS[square]) != 0:
         return True
 
-    bishop_attacks: int = get_bishop_moves_separate(square, occupancy)
+    bishop_attacks: int = get_bishop_attacks(square, occupancy)
     if (pieces[WB] & bishop_attacks) != 0:
         return True
 
     if (pieces[WQ] & bishop_attacks) != 0:
         return True
 
-    rook_attacks: int = get_rook_moves_separate(square, occupancy)
+    rook_attacks: int = get_rook_attacks(square, occupancy)
     if (pieces[WR] & rook_attacks) != 0:
         return True
 
@@ -1160,81 +2000,41 @@ def bitscan_forward(temp_bitboard: int) -> int:
     return (lsb.bit_length() - 1) if lsb else -1
 
 
-def set_starting_position():
-    global ep
-    global white_to_play
-    ep = NO_SQUARE
-    white_to_play = True
-    castle_rights[0] = True
-    castle_rights[1] = True
-    castle_rights[2] = True
-    castle_rights[3] = True
-    piece_array[WP] = WP_STARTING_POSITIONS
-    piece_array[WN] = WN_STARTING_POSITIONS
-    piece_array[WB] = WB_STARTING_POSITIONS
-    piece_array[WR] = WR_STARTING_POSITIONS
-    piece_array[WQ] = WQ_STARTING_POSITION
-    piece_array[WK] = WK_STARTING_POSITION
-    piece_array[BP] = BP_STARTING_POSITIONS
-    piece_array[BN] = BN_STARTING_POSITIONS
-    piece_array[BB] = BB_STARTING_POSITIONS
-    piece_array[BR] = BR_STARTING_POSITIONS
-    piece_array[BQ] = BQ_STARTING_POSITION
-    piece_array[BK] = BK_STARTING_POSITION
-
-
-class Board:
-    __slots__ = ("castle_rights", "ep", "piece_array", "white_to_play")
-
-    def __init__(self):
-        # Corresponds to piece_array
-        self.piece_array = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
-        # Corresponds to is_white
-        self.white_to_play = True
-        # Corresponds to castle_rights
-        self.castle_rights = [True, True, True, True]
-        self.ep = NO_SQUARE
-
-
-def set_starting_position_struct(board: Board):
-    board.ep = NO_SQUARE
-    board.white_to_play = True
-    board.castle_rights[0] = True
-    board.castle_rights[1] = True
-    board.castle_rights[2] = True
-    board.castle_rights[3] = True
-    board.piece_array[WP] = WP_STARTING_POSITIONS
-    board.piece_array[WN] = WN_STARTING_POSITIONS
-    board.piece_array[WB] = WB_STARTING_POSITIONS
-    board.piece_array[WR] = WR_STARTING_POSITIONS
-    board.piece_array[WQ] = WQ_STARTING_POSITION
-    board.piece_array[WK] = WK_STARTING_POSITION
-    board.piece_array[BP] = BP_STARTING_POSITIONS
-    board.piece_array[BN] = BN_STARTING_POSITIONS
-    board.piece_array[BB] = BB_STARTING_POSITIONS
-    board.piece_array[BR] = BR_STARTING_POSITIONS
-    board.piece_array[BQ] = BQ_STARTING_POSITION
-    board.piece_array[BK] = BK_STARTING_POSITION
+def set_starting_position(position: Position) -> None:
+    position.ep = NO_SQUARE
+    position.white_to_play = True
+    position.castle_rights = CASTLE_ALL
+    position.piece_array[WP] = WP_STARTING_POSITIONS
+    position.piece_array[WN] = WN_STARTING_POSITIONS
+    position.piece_array[WB] = WB_STARTING_POSITIONS
+    position.piece_array[WR] = WR_STARTING_POSITIONS
+    position.piece_array[WQ] = WQ_STARTING_POSITION
+    position.piece_array[WK] = WK_STARTING_POSITION
+    position.piece_array[BP] = BP_STARTING_POSITIONS
+    position.piece_array[BN] = BN_STARTING_POSITIONS
+    position.piece_array[BB] = BB_STARTING_POSITIONS
+    position.piece_array[BR] = BR_STARTING_POSITIONS
+    position.piece_array[BQ] = BQ_STARTING_POSITION
+    position.piece_array[BK] = BK_STARTING_POSITION
+    position.halfmove_clock = 0
+    position.fullmove_number = 1
+    position.refresh()
 
 
 def is_occupied(bitboard: int, square: int) -> bool:
     return (bitboard & SQUARE_BBS[square]) != 0
 
 
-def get_occupied_index(square: int) -> int:
-    for i in range(12):
-        if is_occupied(piece_array[i], square):
-            return i
-
-    return EMPTY
+def get_occupied_index(mailbox: Sequence[int], square: int) -> int:
+    return mailbox[square]
 
 
-def print_board():
+def print_board(position: Position):
     print("Board:")
     board_array = [0] * 64
 
     for i in range(64):
-        board_array[i] = get_occupied_index(i)
+        board_array[i] = get_occupied_index(position.mailbox, i)
 
     for rank in range(8):
         print("   ", end="")
@@ -1244,70 +2044,151 @@ def print_board():
         print()
     print()
 
-    print(f"White to play: {white_to_play}")
+    print(f"White to play: {position.white_to_play}")
 
-    print(f"Castle: {castle_rights[0]} {castle_rights[1]} {castle_rights[2]} {castle_rights[3]}")
-    print(f"ep: {ep}")
-    print(f"ply: {board_ply}")
+    castle_rights = position.castle_rights
+    print(f"Castle: {' '.join(str(bool(castle_rights >> index & 1)) for index in range(4))}")
+    print(f"ep: {position.ep}")
+    print(f"ply: {position.board_ply}")
     print()
     print()
 
 
-def perft_inline(depth: int, ply: int) -> int:
-    global white_to_play
-    global ep
+def perft_inline(position: Position, depth: int, ply: int) -> int:
+    if depth == 1:
+        return count_moves_for_side(position)
 
-    white_occupancies: int = (
-        piece_array[WP]
-        | piece_array[WN]
-        | piece_array[WB]
-        | piece_array[WR]
-        | piece_array[WQ]
-        | piece_array[WK]
-    )
-    black_occupancies: int = (
-        piece_array[BP]
-        | piece_array[BN]
-        | piece_array[BB]
-        | piece_array[BR]
-        | piece_array[BQ]
-        | piece_array[BK]
-    )
+    move_list = generate_packed_moves(position, [])
 
-    combined_occupancies: int = white_occupancies | black_occupancies
+    nodes: int = 0
+
+    for move in move_list:
+        move_context = apply_move(position, move)
+        prior_nodes = nodes
+        nodes += perft_inline(position, depth - 1, ply + 1)
+        undo_move(position, move, move_context)
+
+        if ply == 0:
+            starting, target, tag, _piece = decode_move(move)
+            print_move_no_nl(starting, target, tag)
+            print(f": {nodes - prior_nodes}")
+
+    return nodes
+
+
+PERFT_REPLACEMENT_POLICIES: tuple[str, ...] = ("depth-preferred", "always")
 
-    move_list = generate_moves_for_side(
-        piece_array,
-        white_to_play,
-        castle_rights,
-        ep,
-        white_occupancies,
-        black_occupancies,
-        combined_occupancies,
-    )
+
+class PerftTable:
+    """Fixed-size perft transposition table of ``(key, depth, count)`` entries.
+
+    The three fields live in parallel flat arrays sized to a power of two that fits
+    in ``megabytes``; a key maps to the slot given by its low bits. With the
+    ``depth-preferred`` policy an entry is only overwritten by a subtree at least as
+    deep, with ``always`` the newest subtree wins.
+    """
+
+    ENTRY_BYTES = 17  # 8-byte key, 1-byte depth, 8-byte count
+
+    __slots__ = ("counts", "depth_preferred", "depths", "hits", "keys", "mask", "misses")
+
+    def __init__(self, megabytes: float = 16, replacement: str = "depth-preferred"):
+        if replacement not in PERFT_REPLACEMENT_POLICIES:
+            msg = f"Unknown replacement policy {replacement!r}"
+            raise ValueError(msg)
+        entries = int(megabytes * 1024 * 1024) // self.ENTRY_BYTES
+        if entries < 1:
+            msg = f"Hash budget of {megabytes} MB is too small"
+            raise ValueError(msg)
+        capacity = 1 << (entries.bit_length() - 1)
+
+        self.keys = array("Q", bytes(8 * capacity))
+        self.depths = array("B", bytes(capacity))
+        self.counts = array("Q", bytes(8 * capacity))
+        self.mask = capacity - 1
+        self.depth_preferred = replacement == "depth-preferred"
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return self.mask + 1
+
+    def probe(self, key: int, depth: int) -> int:
+        """Return the stored count for ``key`` at ``depth``, or -1 on a miss."""
+
+        index = key & self.mask
+        # Empty slots have depth 0, which is never probed, so they always miss.
+        if self.keys[index] == key and self.depths[index] == depth:
+            self.hits += 1
+            return self.counts[index]
+        self.misses += 1
+        return -1
+
+    def store(self, key: int, depth: int, count: int) -> None:
+        index = key & self.mask
+        if self.depth_preferred and self.depths[index] > depth:
+            return
+        self.keys[index] = key
+        self.depths[index] = depth
+        self.counts[index] = count
+
+
+def perft_hashed(position: Position, depth: int, table: PerftTable, ply: int = 0) -> int:
+    """``perft_inline`` that reuses subtree counts for positions already seen at the same depth."""
+
+    # Probe before generating: move generation is the expensive part, even at the leaves.
+    # The root is never probed so the divide output is always complete.
+    if ply > 0:
+        cached = table.probe(position.hash_key, depth)
+        if cached >= 0:
+            return cached
 
     if depth == 1:
-        return len(move_list)
+        count = count_moves_for_side(position)
+        table.store(position.hash_key, depth, count)
+        return count
+
+    move_list = generate_packed_moves(position, [])
 
     nodes: int = 0
 
     for move in move_list:
-        move_context = apply_move(move)
+        move_context = apply_move(position, move)
         prior_nodes = nodes
-        nodes += perft_inline(depth - 1, ply + 1)
-        undo_move(move, move_context)
+        nodes += perft_hashed(position, depth - 1, table, ply + 1)
+        undo_move(position, move, move_context)
 
         if ply == 0:
-            print_move_no_nl(move.starting, move.target, move.tag)
+            starting, target, tag, _piece = decode_move(move)
+            print_move_no_nl(starting, target, tag)
             print(f": {nodes - prior_nodes}")
 
+    table.store(position.hash_key, depth, nodes)
+    return nodes
+
+
+def run_perft_hashed(position: Position, depth: int, megabytes: float = 16, replacement: str = "depth-preferred"):
+    table = PerftTable(megabytes, replacement)
+    timestamp_start = time.monotonic_ns()
+
+    nodes: int = perft_hashed(position, depth, table)
+
+    timestamp_end = time.monotonic_ns()
+    elapsed = timestamp_end - timestamp_start
+
+    probes = table.hits + table.misses
+    hit_rate = 100 * table.hits / probes if probes else 0.0
+    print(f"Nodes: {nodes}")
+    print(f"Elapsed time: {elapsed / 1_000_000} ms")
+    print(f"Hash entries: {len(table)} ({replacement})")
+    print(f"Hash hits: {table.hits}, misses: {table.misses} ({hit_rate:.1f}% hit rate)")
     return nodes
 
 
-def run_perft_inline(depth: int):
+def run_perft_inline(position: Position, depth: int):
     timestamp_start = time.monotonic_ns()
 
-    nodes: int = perft_inline(depth, 0)
+    nodes: int = perft_inline(position, depth, 0)
 
     timestamp_end = time.monotonic_ns()
     elapsed = timestamp_end - timestamp_start
@@ -1317,8 +2198,8 @@ def run_perft_inline(depth: int):
 
 
 if __name__ == "__main__":
-    set_starting_position()
-    print_board()
+    position = Position()
+    set_starting_position(position)
+    print_board(position)
 
-    run_perft_inline(6)
-    # run_perft_inline_struct(6) # noqa: ERA001
+    run_perft_inline(position, 6)
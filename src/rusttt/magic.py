@@ -0,0 +1,202 @@
+"""Magic-bitboard slider attack tables.
+
+For every square the relevant blockers (the ray squares short of the board
+edge) are multiplied by a per-square magic number. The top bits of the product
+index a flat attack table, so a rook or bishop attack set costs one multiply,
+one shift and one index. ``get_rook_moves_separate`` and
+``get_bishop_moves_separate`` in ``rusttt.logic`` remain as the ray-scan
+reference implementations.
+"""
+
+import zlib
+from collections.abc import Sequence
+
+import numpy as np
+
+from rusttt.constants import (
+    BISHOP_ATTACKS,
+    BISHOP_DOWN_LEFT,
+    BISHOP_DOWN_RIGHT,
+    BISHOP_UP_LEFT,
+    BISHOP_UP_RIGHT,
+    INBETWEEN_BITBOARDS,
+    ROOK_ATTACKS,
+    ROOK_DOWN,
+    ROOK_LEFT,
+    ROOK_RIGHT,
+    ROOK_UP,
+)
+from rusttt.tables import load_or_build
+
+BOARD_MASK: int = (1 << 64) - 1
+
+# Found with a seeded sparse-random search; every entry maps the full blocker
+# subset of its square without destructive collisions.
+# fmt: off
+ROOK_MAGICS: list[int] = [
+    0x1680008040082010, 0x0540002002401000, 0x8100104020000900, 0x5480048010000800,
+    0x0A0008A002009004, 0x0300010008020400, 0x4280010000800600, 0x0E0001004400802A,
+    0xC000800038804000, 0x0800404010002000, 0x0021004020001102, 0x0102000840201200,
+    0x004A002084081200, 0x0F82000502001008, 0x0003000200010004, 0xA040800851002480,
+    0x8226208008400880, 0x4042020020408110, 0x0010220012004080, 0x0060808008001000,
+    0x0208004040040200, 0x1420808004000201, 0x00008C0022011810, 0x4160020000904124,
+    0x14848020800C4000, 0x0120100140002043, 0x0401004100102000, 0x0182001200084021,
+    0x0000050100080011, 0x2040020080800400, 0x0100220400981041, 0x054804020020438D,
+    0x0018400020800490, 0x0830002002404000, 0x0824200105004010, 0x1000801000800800,
+    0x8000040080800800, 0x0040409008010420, 0x4000025004000108, 0x0822006102000084,
+    0x1100208040008000, 0x0800400100830026, 0x0004408200120026, 0x0C03001001A10048,
+    0x40080051002D0018, 0x1002001004020008, 0x0008100801040082, 0x2828808044020021,
+    0x0200208001005500, 0x2C002010014000C0, 0x3002004010802200, 0x0000100100082100,
+    0x0200040008008080, 0x0204002010080401, 0x0008018802100400, 0x410080440100A200,
+    0x4000234080099101, 0x0000201200410482, 0x0822008208201042, 0x0041208900351001,
+    0x440A00481C312002, 0x0441009814000241, 0x0000501086080924, 0x0010090020440882,
+]
+
+BISHOP_MAGICS: list[int] = [
+    0x0008012404040021, 0x02B0012800809400, 0x3C04010222000010, 0x9018204640089890,
+    0x2082021108080080, 0x81088211400B408A, 0x0002020220040010, 0x0800809080A02020,
+    0xA0004010110A1882, 0x0104828208110100, 0x0250100440404401, 0x8440040410802000,
+    0x8212145041080221, 0x0004620802082005, 0x2C8020A098084000, 0x20000080A0903010,
+    0x2040021030012140, 0x54820005102A0208, 0x2050122A44004140, 0x2128010404101340,
+    0x1044203A02010104, 0x0198100A08040410, 0xC890960908086208, 0x8120800200442280,
+    0x4023408060040400, 0x8001290030021800, 0x20CC010010050C22, 0x0080802002020200,
+    0x0010030010200800, 0x8000820008221000, 0xA084004009080200, 0x1006008001424800,
+    0x800108220040C400, 0x0024100800044102, 0x1040441200100220, 0x3004040400180210,
+    0x0441020208140100, 0x402008024000E400, 0x01022214108208A4, 0x8008030020050490,
+    0x0508028221081040, 0x0000480211084800, 0x4011001082001022, 0x120180A124000800,
+    0x8022022009040200, 0x0001010102010100, 0x202001420220048A, 0x0830010210886020,
+    0x00830C0242C04898, 0x00084C0084500280, 0x4124042402081C00, 0x0000040020880041,
+    0x0000041202020008, 0x4148401042208220, 0x8208200102021040, 0x0020010400809000,
+    0x0414260050041040, 0x0420110422010400, 0x4310800021080801, 0x2020800148208810,
+    0x0040020010020880, 0x200E021120D20420, 0x000009100C880844, 0x030A08022C940500,
+]
+# fmt: on
+
+# Rays running towards A8 (decreasing square index) are blocked by their highest
+# set bit, rays running towards H1 by their lowest.
+ROOK_RAYS_TOWARDS_A8 = (ROOK_ATTACKS[ROOK_UP], ROOK_ATTACKS[ROOK_LEFT])
+ROOK_RAYS_TOWARDS_H1 = (ROOK_ATTACKS[ROOK_DOWN], ROOK_ATTACKS[ROOK_RIGHT])
+BISHOP_RAYS_TOWARDS_A8 = (BISHOP_ATTACKS[BISHOP_UP_LEFT], BISHOP_ATTACKS[BISHOP_UP_RIGHT])
+BISHOP_RAYS_TOWARDS_H1 = (BISHOP_ATTACKS[BISHOP_DOWN_LEFT], BISHOP_ATTACKS[BISHOP_DOWN_RIGHT])
+
+
+def slider_attacks(
+    square: int,
+    occupancy: int,
+    rays_towards_a8: Sequence[Sequence[int]],
+    rays_towards_h1: Sequence[Sequence[int]],
+) -> int:
+    """Return the attack set along the given rays, stopping at the first blocker."""
+
+    attacks = 0
+    for ray in rays_towards_a8:
+        blockers = ray[square] & occupancy
+        attacks |= INBETWEEN_BITBOARDS[square][blockers.bit_length() - 1] if blockers else ray[square]
+    for ray in rays_towards_h1:
+        blockers = ray[square] & occupancy
+        attacks |= INBETWEEN_BITBOARDS[square][(blockers & -blockers).bit_length() - 1] if blockers else ray[square]
+    return attacks
+
+
+def relevant_mask(
+    square: int,
+    rays_towards_a8: Sequence[Sequence[int]],
+    rays_towards_h1: Sequence[Sequence[int]],
+) -> int:
+    """Return the ray squares whose occupancy can change the attack set (edges excluded)."""
+
+    mask = 0
+    for ray in rays_towards_a8:
+        bits = ray[square]
+        mask |= bits & ~(bits & -bits)
+    for ray in rays_towards_h1:
+        bits = ray[square]
+        mask |= bits & ~(1 << (bits.bit_length() - 1)) if bits else 0
+    return mask
+
+
+def build_tables(
+    magics: Sequence[int],
+    rays_towards_a8: Sequence[Sequence[int]],
+    rays_towards_h1: Sequence[Sequence[int]],
+) -> tuple[list[int], list[int], list[int], list[int]]:
+    """Return ``(masks, shifts, offsets, attacks)`` for one slider type.
+
+    ``attacks`` is a flat table; the entries for a square start at
+    ``offsets[square]`` and span ``1 << (64 - shifts[square])`` slots.
+    """
+
+    masks: list[int] = []
+    shifts: list[int] = []
+    offsets: list[int] = []
+    attacks: list[int] = []
+
+    for square in range(64):
+        mask = relevant_mask(square, rays_towards_a8, rays_towards_h1)
+        shift = 64 - mask.bit_count()
+        offset = len(attacks)
+        attacks.extend([0] * (1 << mask.bit_count()))
+
+        subset = 0
+        while True:
+            index = ((subset * magics[square]) & BOARD_MASK) >> shift
+            attacks[offset + index] = slider_attacks(square, subset, rays_towards_a8, rays_towards_h1)
+            subset = (subset - mask) & mask
+            if subset == 0:
+                break
+
+        masks.append(mask)
+        shifts.append(shift)
+        offsets.append(offset)
+
+    return masks, shifts, offsets, attacks
+
+
+def build_magic_arrays() -> dict[str, np.ndarray]:
+    arrays: dict[str, np.ndarray] = {}
+    for prefix, magics, rays_towards_a8, rays_towards_h1 in (
+        ("rook", ROOK_MAGICS, ROOK_RAYS_TOWARDS_A8, ROOK_RAYS_TOWARDS_H1),
+        ("bishop", BISHOP_MAGICS, BISHOP_RAYS_TOWARDS_A8, BISHOP_RAYS_TOWARDS_H1),
+    ):
+        masks, shifts, offsets, attacks = build_tables(magics, rays_towards_a8, rays_towards_h1)
+        arrays[f"{prefix}_magics"] = np.array(magics, dtype=np.uint64)
+        arrays[f"{prefix}_masks"] = np.array(masks, dtype=np.uint64)
+        arrays[f"{prefix}_shifts"] = np.array(shifts, dtype=np.uint64)
+        arrays[f"{prefix}_offsets"] = np.array(offsets, dtype=np.uint64)
+        arrays[f"{prefix}_attacks"] = np.array(attacks, dtype=np.uint64)
+    return arrays
+
+
+# The cached tables are only valid for the magic numbers they were built from.
+MAGIC_TABLES_VERSION = f"1-{zlib.crc32(repr((ROOK_MAGICS, BISHOP_MAGICS)).encode()):08x}"
+
+# uint64 arrays (memory-mapped when the cache is available) for the compiled engine.
+TABLES: dict[str, np.ndarray] = load_or_build("magic", MAGIC_TABLES_VERSION, build_magic_arrays)
+
+# Plain int lists for the pure-Python lookups below.
+ROOK_MASKS: list[int] = TABLES["rook_masks"].tolist()
+ROOK_SHIFTS: list[int] = TABLES["rook_shifts"].tolist()
+ROOK_OFFSETS: list[int] = TABLES["rook_offsets"].tolist()
+ROOK_TABLE: list[int] = TABLES["rook_attacks"].tolist()
+BISHOP_MASKS: list[int] = TABLES["bishop_masks"].tolist()
+BISHOP_SHIFTS: list[int] = TABLES["bishop_shifts"].tolist()
+BISHOP_OFFSETS: list[int] = TABLES["bishop_offsets"].tolist()
+BISHOP_TABLE: list[int] = TABLES["bishop_attacks"].tolist()
+
+
+def get_rook_attacks(square: int, occupancy: int) -> int:
+    return ROOK_TABLE[
+        ROOK_OFFSETS[square]
+        + ((((occupancy & ROOK_MASKS[square]) * ROOK_MAGICS[square]) & BOARD_MASK) >> ROOK_SHIFTS[square])
+    ]
+
+
+def get_bishop_attacks(square: int, occupancy: int) -> int:
+    return BISHOP_TABLE[
+        BISHOP_OFFSETS[square]
+        + ((((occupancy & BISHOP_MASKS[square]) * BISHOP_MAGICS[square]) & BOARD_MASK) >> BISHOP_SHIFTS[square])
+    ]
+
+
+def get_queen_attacks(square: int, occupancy: int) -> int:
+    return get_rook_attacks(square, occupancy) | get_bishop_attacks(square, occupancy)
@@ -0,0 +1,139 @@
+"""Legal-move cache keyed by the position's Zobrist key.
+
+Callers that ask for the moves of the same positions again and again (opening
+positions, positions revisited across games) get the packed move list back
+from a bounded cache instead of running the generator a second time.
+
+Two eviction policies are available. ``lru`` keeps the entries in an
+``OrderedDict`` ordered by last use and drops the least recently used one.
+``clock`` keeps them in a fixed ring of slots with one reference bit each. A
+hit sets the bit, and the hand sweeping the ring for a victim clears set bits
+and evicts the first entry whose bit is already clear. Entries that are never
+hit again go first, and a hit costs no reordering.
+"""
+
+from collections import OrderedDict
+
+from rusttt.logic import Position, generate_packed_moves
+
+MOVE_CACHE_POLICIES: tuple[str, ...] = ("lru", "clock")
+
+
+class MoveCache:
+    """Bounded map from a position key to the tuple of its packed legal moves."""
+
+    __slots__ = (
+        "capacity",
+        "hand",
+        "hits",
+        "misses",
+        "policy",
+        "recent",
+        "referenced",
+        "slot_keys",
+        "slot_moves",
+        "slots",
+    )
+
+    def __init__(self, capacity: int = 4096, policy: str = "lru"):
+        if policy not in MOVE_CACHE_POLICIES:
+            msg = f"Unknown eviction policy {policy!r}"
+            raise ValueError(msg)
+        if capacity < 1:
+            msg = f"Cache capacity must be positive, got {capacity}"
+            raise ValueError(msg)
+
+        self.capacity = capacity
+        self.policy = policy
+        # lru: key -> moves, least recently used first.
+        self.recent: OrderedDict[int, tuple[int, ...]] = OrderedDict()
+        # clock: key -> slot in the ring below.
+        self.slots: dict[int, int] = {}
+        self.slot_keys: list[int] = []
+        self.slot_moves: list[tuple[int, ...]] = []
+        self.referenced = bytearray(capacity)
+        self.hand = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.recent) if self.policy == "lru" else len(self.slots)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self.recent or key in self.slots
+
+    @property
+    def hit_rate(self) -> float:
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+    def clear(self) -> None:
+        """Drop every entry and reset the statistics."""
+
+        self.recent.clear()
+        self.slots.clear()
+        self.slot_keys.clear()
+        self.slot_moves.clear()
+        self.referenced = bytearray(self.capacity)
+        self.hand = 0
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, key: int) -> tuple[int, ...] | None:
+        """Return the cached moves for ``key``, or ``None`` on a miss."""
+
+        if self.policy == "lru":
+            moves = self.recent.get(key)
+            if moves is not None:
+                self.recent.move_to_end(key)
+        else:
+            slot = self.slots.get(key)
+            moves = None
+            if slot is not None:
+                moves = self.slot_moves[slot]
+                self.referenced[slot] = 1
+
+        if moves is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return moves
+
+    def store(self, key: int, moves: tuple[int, ...]) -> None:
+        if self.policy == "lru":
+            self.recent[key] = moves
+            self.recent.move_to_end(key)
+            if len(self.recent) > self.capacity:
+                self.recent.popitem(last=False)
+            return
+
+        slot = self.slots.get(key)
+        if slot is None:
+            slot = self._free_slot()
+            self.slots[key] = slot
+            self.slot_keys[slot] = key
+        self.slot_moves[slot] = moves
+
+    def moves(self, position: Position) -> tuple[int, ...]:
+        """Return the packed legal moves of the side to move, generating them only on a miss."""
+
+        key = position.hash_key
+        moves = self.probe(key)
+        if moves is None:
+            moves = tuple(generate_packed_moves(position, []))
+            self.store(key, moves)
+        return moves
+
+    def _free_slot(self) -> int:
+        if len(self.slot_keys) < self.capacity:
+            self.slot_keys.append(0)
+            self.slot_moves.append(())
+            return len(self.slot_keys) - 1
+
+        while self.referenced[self.hand]:
+            self.referenced[self.hand] = 0
+            self.hand = (self.hand + 1) % self.capacity
+        slot = self.hand
+        del self.slots[self.slot_keys[slot]]
+        self.hand = (self.hand + 1) % self.capacity
+        return slot
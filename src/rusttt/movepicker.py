@@ -0,0 +1,254 @@
+"""Staged, lazy legal-move generation for search.
+
+A ``MovePicker`` hands out the moves of one position in stages: the hash move,
+captures (most valuable victim first, then least valuable attacker), quiet
+promotions and finally the remaining quiet moves. A stage is generated only
+once the previous one has run out, so a search that cuts off on an early move
+never pays for the quiet moves.
+
+Each stage reuses the regular piece generators with restricted target sets.
+The king and the pieces get only the enemy or only the empty squares, and
+pawns get a narrowed check mask. The stages together yield exactly the moves
+of ``generate_packed_moves``, each once.
+"""
+
+from collections.abc import Iterator
+
+from rusttt.constants import (
+    BP,
+    EMPTY,
+    KNIGHT_ATTACKS,
+    NO_SQUARE,
+    RANK_1_BITBOARD,
+    RANK_8_BITBOARD,
+    SQUARE_BBS,
+    TAG_B_BISHOP_PROMOTION,
+    TAG_B_CAPTURE_BISHOP_PROMOTION,
+    TAG_B_CAPTURE_KNIGHT_PROMOTION,
+    TAG_B_CAPTURE_QUEEN_PROMOTION,
+    TAG_B_CAPTURE_ROOK_PROMOTION,
+    TAG_B_KNIGHT_PROMOTION,
+    TAG_B_QUEEN_PROMOTION,
+    TAG_B_ROOK_PROMOTION,
+    TAG_BLACKEP,
+    TAG_CAPTURE,
+    TAG_W_BISHOP_PROMOTION,
+    TAG_W_CAPTURE_BISHOP_PROMOTION,
+    TAG_W_CAPTURE_KNIGHT_PROMOTION,
+    TAG_W_CAPTURE_QUEEN_PROMOTION,
+    TAG_W_CAPTURE_ROOK_PROMOTION,
+    TAG_W_KNIGHT_PROMOTION,
+    TAG_W_QUEEN_PROMOTION,
+    TAG_W_ROOK_PROMOTION,
+    TAG_WHITEEP,
+    WP,
+)
+from rusttt.logic import (
+    BOARD_MASK,
+    MAX_ULONG,
+    MOVE_PIECE_SHIFT,
+    MOVE_TAG_SHIFT,
+    MOVE_TARGET_SHIFT,
+    Position,
+    analyze_king_state,
+    generate_king_moves,
+    generate_leaper_moves,
+    generate_pawn_moves,
+    generate_slider_moves,
+)
+from rusttt.magic import get_bishop_attacks, get_queen_attacks, get_rook_attacks
+
+STAGE_HASH_MOVE = 0
+STAGE_CAPTURES = 1
+STAGE_PROMOTIONS = 2
+STAGE_QUIETS = 3
+STAGE_DONE = 4
+
+CAPTURE_TAGS: frozenset[int] = frozenset(
+    {
+        TAG_CAPTURE,
+        TAG_WHITEEP,
+        TAG_BLACKEP,
+        TAG_W_CAPTURE_QUEEN_PROMOTION,
+        TAG_W_CAPTURE_ROOK_PROMOTION,
+        TAG_W_CAPTURE_BISHOP_PROMOTION,
+        TAG_W_CAPTURE_KNIGHT_PROMOTION,
+        TAG_B_CAPTURE_QUEEN_PROMOTION,
+        TAG_B_CAPTURE_ROOK_PROMOTION,
+        TAG_B_CAPTURE_BISHOP_PROMOTION,
+        TAG_B_CAPTURE_KNIGHT_PROMOTION,
+    }
+)
+QUIET_PROMOTION_TAGS: frozenset[int] = frozenset(
+    {
+        TAG_W_QUEEN_PROMOTION,
+        TAG_W_ROOK_PROMOTION,
+        TAG_W_BISHOP_PROMOTION,
+        TAG_W_KNIGHT_PROMOTION,
+        TAG_B_QUEEN_PROMOTION,
+        TAG_B_ROOK_PROMOTION,
+        TAG_B_BISHOP_PROMOTION,
+        TAG_B_KNIGHT_PROMOTION,
+    }
+)
+
+
+def move_stage(move: int) -> int:
+    """Return the stage (captures, promotions or quiets) a packed move is generated in."""
+
+    tag = (move >> MOVE_TAG_SHIFT) & 31
+    if tag in CAPTURE_TAGS:
+        return STAGE_CAPTURES
+    if tag in QUIET_PROMOTION_TAGS:
+        return STAGE_PROMOTIONS
+    return STAGE_QUIETS
+
+
+class MovePicker:
+    """Iterate over the legal moves of ``position`` stage by stage.
+
+    The picker reads the position each time a new stage starts, so a caller that
+    plays the yielded move must undo it before asking for the next one.
+    ``stage`` tells which stage the last yielded move came from.
+    """
+
+    __slots__ = (
+        "check_mask",
+        "empty",
+        "enemy",
+        "friendly",
+        "hash_move",
+        "king_state",
+        "position",
+        "stage",
+    )
+
+    def __init__(self, position: Position, hash_move: int = 0):
+        self.position = position
+        self.hash_move = hash_move
+        self.stage = STAGE_HASH_MOVE
+
+        if position.white_to_play:
+            self.friendly, self.enemy = position.white_occupancy, position.black_occupancy
+        else:
+            self.friendly, self.enemy = position.black_occupancy, position.white_occupancy
+        self.empty = ~position.occupancy & BOARD_MASK
+        self.king_state = analyze_king_state(position.piece_array, position.white_to_play, self.friendly, self.enemy)
+        self.check_mask = self.king_state.check_mask if self.king_state.check_count == 1 else MAX_ULONG
+
+    def __iter__(self) -> Iterator[int]:
+        hash_move = self.hash_move
+        if hash_move:
+            # Only yield the hash move if it is legal here: generate the moves of its piece for its stage.
+            if hash_move in self.stage_moves(move_stage(hash_move), SQUARE_BBS[hash_move & 63]):
+                yield hash_move
+            else:
+                hash_move = 0
+
+        for stage in (STAGE_CAPTURES, STAGE_PROMOTIONS, STAGE_QUIETS):
+            self.stage = stage
+            moves = self.captures() if stage == STAGE_CAPTURES else self.stage_moves(stage)
+            for move in moves:
+                if move != hash_move:
+                    yield move
+        self.stage = STAGE_DONE
+
+    def stage_moves(self, stage: int, from_mask: int = BOARD_MASK) -> list[int]:
+        """Return the legal moves of one stage, for the pieces standing on ``from_mask``."""
+
+        position = self.position
+        piece_array = position.piece_array
+        white = position.white_to_play
+        king_state = self.king_state
+        own = WP if white else BP
+        moves: list[int] = []
+
+        if stage == STAGE_CAPTURES:
+            enemy, empty = self.enemy, 0
+            ep = position.ep
+            # The ep square joins the capture targets so an en passant capture can still block a check.
+            pawn_targets = self.enemy | (SQUARE_BBS[ep] if ep != NO_SQUARE else 0)
+        elif stage == STAGE_PROMOTIONS:
+            enemy, empty = 0, 0
+            ep = NO_SQUARE
+            pawn_targets = self.empty & (RANK_8_BITBOARD | RANK_1_BITBOARD)
+        else:
+            enemy, empty = 0, self.empty
+            ep = NO_SQUARE
+            pawn_targets = self.empty & ~(RANK_8_BITBOARD | RANK_1_BITBOARD)
+
+        if (enemy or empty) and piece_array[own + 5] & from_mask:
+            generate_king_moves(
+                piece_array,
+                king_state,
+                white,
+                self.friendly,
+                enemy,
+                position.occupancy,
+                empty,
+                position.castle_rights,
+                stage == STAGE_QUIETS and king_state.check_count == 0,
+                moves,
+            )
+        if king_state.check_count > 1:
+            return moves
+
+        pins = king_state.pin_lookup
+        pawns = piece_array[own] & from_mask
+        if pawns:
+            pawn_array = piece_array
+            if pawns != piece_array[own]:
+                pawn_array = list(piece_array)
+                pawn_array[own] = pawns
+            generate_pawn_moves(
+                pawn_array,
+                white,
+                self.enemy,
+                position.occupancy,
+                self.check_mask & pawn_targets,
+                pins,
+                king_state,
+                ep,
+                moves,
+            )
+        if stage == STAGE_PROMOTIONS:
+            return moves
+
+        generate_leaper_moves(
+            piece_array[own + 1] & from_mask,
+            KNIGHT_ATTACKS,
+            own + 1,
+            enemy,
+            empty,
+            self.check_mask,
+            pins,
+            king_state,
+            moves,
+        )
+        for offset, attack_fn in ((2, get_bishop_attacks), (3, get_rook_attacks), (4, get_queen_attacks)):
+            generate_slider_moves(
+                piece_array[own + offset] & from_mask,
+                attack_fn,
+                own + offset,
+                enemy,
+                empty,
+                position.occupancy,
+                self.check_mask,
+                pins,
+                king_state,
+                moves,
+            )
+        return moves
+
+    def captures(self) -> list[int]:
+        """Return the legal captures only, most valuable victim first, for a capture search."""
+
+        moves = self.stage_moves(STAGE_CAPTURES)
+        moves.sort(key=self._mvv_lva)
+        return moves
+
+    def _mvv_lva(self, move: int) -> int:
+        victim = self.position.mailbox[(move >> MOVE_TARGET_SHIFT) & 63]
+        # En passant lands on an empty square; the victim is a pawn.
+        victim_type = 0 if victim == EMPTY else victim % 6
+        return (move >> MOVE_PIECE_SHIFT) % 6 - 8 * victim_type
@@ -0,0 +1,116 @@
+"""Perft split across worker processes.
+
+The position is expanded in the parent down to a split ply, every position at
+that ply becomes one task, and a ``ProcessPoolExecutor`` counts the tasks. The
+counts are summed back per root move, so the output matches ``run_perft_inline``.
+Splitting below the root gives hundreds of small tasks instead of about twenty
+uneven ones, which keeps every worker busy until the end.
+"""
+
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from rusttt.logic import (
+    Move,
+    Position,
+    apply_move,
+    generate_moves_for_side,
+    perft_inline,
+    print_move_no_nl,
+    undo_move,
+)
+
+BACKENDS: tuple[str, ...] = ("numba", "python")
+# Workers start from a clean interpreter: forking a parent that has already run a
+# numba ``parallel=True`` kernel copies a thread pool the child cannot use.
+POOL_CONTEXT = multiprocessing.get_context("forkserver")
+
+
+def count_nodes(position: Position, depth: int, backend: str) -> int:
+    """Count the leaves ``depth`` plies below ``position``; runs inside the workers."""
+
+    if depth <= 0:
+        return 1
+    if backend == "python":
+        # ply 1 keeps perft_inline from printing a divide of its own.
+        return perft_inline(position, depth, 1)
+
+    from rusttt.jit import perft, position_arrays
+
+    return perft(*position_arrays(position), depth)
+
+
+def split_tasks(position: Position, depth: int, split_ply: int) -> list[tuple[int, Position, int]]:
+    """Return ``(root_index, position, remaining_depth)`` for every node ``split_ply`` plies down."""
+
+    tasks: list[tuple[int, Position, int]] = []
+
+    def expand(root_index: int, ply: int) -> None:
+        if ply == split_ply:
+            tasks.append((root_index, position.copy(), depth - ply))
+            return
+        for move in generate_moves_for_side(position):
+            context = apply_move(position, move)
+            expand(root_index, ply + 1)
+            undo_move(position, move, context)
+
+    for root_index, move in enumerate(generate_moves_for_side(position)):
+        context = apply_move(position, move)
+        expand(root_index, 1)
+        undo_move(position, move, context)
+    return tasks
+
+
+def perft_parallel(
+    position: Position,
+    depth: int,
+    jobs: int,
+    backend: str = "numba",
+    split_ply: int | None = None,
+) -> list[tuple[Move, int]]:
+    """Return ``(move, nodes)`` for every root move, counted by ``jobs`` worker processes.
+
+    By default the tree is split two plies down when ``depth`` allows it.
+    """
+
+    if backend not in BACKENDS:
+        msg = f"Unknown backend {backend!r}"
+        raise ValueError(msg)
+    if depth < 1:
+        msg = f"Depth must be at least 1, got {depth}"
+        raise ValueError(msg)
+    if split_ply is None:
+        split_ply = 2 if depth >= 3 else 1
+    split_ply = max(1, min(split_ply, depth))
+
+    root_moves = generate_moves_for_side(position)
+    counts = [0] * len(root_moves)
+    tasks = split_tasks(position, depth, split_ply)
+
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=POOL_CONTEXT) as executor:
+        futures = {
+            executor.submit(count_nodes, task_position, remaining, backend): root_index
+            for root_index, task_position, remaining in tasks
+        }
+        for future in as_completed(futures):
+            counts[futures[future]] += future.result()
+
+    return list(zip(root_moves, counts, strict=True))
+
+
+def run_perft_parallel(position: Position, depth: int, jobs: int, backend: str = "numba") -> int:
+    timestamp_start = time.monotonic_ns()
+
+    nodes = 0
+    for move, move_nodes in perft_parallel(position, depth, jobs, backend):
+        print_move_no_nl(move.starting, move.target, move.tag)
+        print(f": {move_nodes}")
+        nodes += move_nodes
+
+    timestamp_end = time.monotonic_ns()
+    elapsed = timestamp_end - timestamp_start
+
+    print(f"Nodes: {nodes}")
+    print(f"Elapsed time: {elapsed / 1_000_000} ms")
+    return nodes
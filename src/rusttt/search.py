@@ -0,0 +1,497 @@
+"""Negamax alpha-beta search with iterative deepening.
+
+``search`` deepens one ply at a time until it hits a depth, node or time limit
+and returns the best move, its score and the principal variation of the last
+iteration that finished. Every searched node is recorded in a
+``TranspositionTable``: its move is tried first, through the ``MovePicker``
+hash-move slot, when the position comes up again, and its bound ends the
+search of a transposition outright when it was searched deep enough. Once the
+score is known roughly, the root is searched in a narrow aspiration window
+around it, widened only when the score falls outside.
+
+Where the main search runs out of depth, a quiescence search plays on with
+captures only until the position is quiet, so a line is never scored in the
+middle of an exchange. The side to move may always stand pat on the static
+score. Captures that ``static_exchange_eval`` finds losing are never tried,
+which removes most of the quiescence tree.
+
+Scores are centipawns from the side to move's point of view. A forced mate is
+``MATE_SCORE`` minus its distance in plies. The evaluation counts material and
+piece-square bonuses only, which is enough to rank analysis lines.
+
+Limits are checked every ``LIMIT_CHECK_INTERVAL`` nodes, not at every node, so
+the clock is not read in the hot path. The first iteration always finishes, so
+a search that had any legal move always returns one.
+"""
+
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+
+from rusttt.logic import (
+    Position,
+    apply_move,
+    generate_packed_moves,
+    move_name,
+    static_exchange_eval,
+    undo_move,
+)
+from rusttt.movepicker import MovePicker
+from rusttt.transposition import BOUND_EXACT, BOUND_LOWER, BOUND_UPPER, TranspositionTable
+
+MAX_PLY = 64
+MATE_SCORE = 32_000
+# Scores above this are mates found within the search horizon.
+MATE_BOUND = MATE_SCORE - MAX_PLY
+SCORE_INFINITE = 32_767
+
+# Half-width of the first aspiration window in centipawns; it doubles on every fail.
+ASPIRATION_WINDOW = 50
+ASPIRATION_MIN_DEPTH = 3
+
+LIMIT_CHECK_INTERVAL = 1024
+
+# Depth searched by the command line when no limit is given.
+DEFAULT_DEPTH = 5
+DEFAULT_HASH_MB = 16
+
+# Material in piece index order WP..WK.
+PIECE_VALUES: tuple[int, ...] = (100, 320, 330, 500, 900, 0)
+
+# Piece-square bonuses from white's side, laid out like the board: A8 first, H1 last.
+# fmt: off
+PAWN_SQUARES = (
+     0,   0,   0,   0,   0,   0,   0,   0,
+    50,  50,  50,  50,  50,  50,  50,  50,
+    10,  10,  20,  30,  30,  20,  10,  10,
+     5,   5,  10,  25,  25,  10,   5,   5,
+     0,   0,   0,  20,  20,   0,   0,   0,
+     5,  -5, -10,   0,   0, -10,  -5,   5,
+     5,  10,  10, -20, -20,  10,  10,   5,
+     0,   0,   0,   0,   0,   0,   0,   0,
+)
+KNIGHT_SQUARES = (
+   -50, -40, -30, -30, -30, -30, -40, -50,
+   -40, -20,   0,   0,   0,   0, -20, -40,
+   -30,   0,  10,  15,  15,  10,   0, -30,
+   -30,   5,  15,  20,  20,  15,   5, -30,
+   -30,   0,  15,  20,  20,  15,   0, -30,
+   -30,   5,  10,  15,  15,  10,   5, -30,
+   -40, -20,   0,   5,   5,   0, -20, -40,
+   -50, -40, -30, -30, -30, -30, -40, -50,
+)
+BISHOP_SQUARES = (
+   -20, -10, -10, -10, -10, -10, -10, -20,
+   -10,   0,   0,   0,   0,   0,   0, -10,
+   -10,   0,   5,  10,  10,   5,   0, -10,
+   -10,   5,   5,  10,  10,   5,   5, -10,
+   -10,   0,  10,  10,  10,  10,   0, -10,
+   -10,  10,  10,  10,  10,  10,  10, -10,
+   -10,   5,   0,   0,   0,   0,   5, -10,
+   -20, -10, -10, -10, -10, -10, -10, -20,
+)
+ROOK_SQUARES = (
+     0,   0,   0,   0,   0,   0,   0,   0,
+     5,  10,  10,  10,  10,  10,  10,   5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+     0,   0,   0,   5,   5,   0,   0,   0,
+)
+QUEEN_SQUARES = (
+   -20, -10, -10,  -5,  -5, -10, -10, -20,
+   -10,   0,   0,   0,   0,   0,   0, -10,
+   -10,   0,   5,   5,   5,   5,   0, -10,
+    -5,   0,   5,   5,   5,   5,   0,  -5,
+     0,   0,   5,   5,   5,   5,   0,  -5,
+   -10,   5,   5,   5,   5,   5,   0, -10,
+   -10,   0,   5,   0,   0,   0,   0, -10,
+   -20, -10, -10,  -5,  -5, -10, -10, -20,
+)
+KING_SQUARES = (
+   -30, -40, -40, -50, -50, -40, -40, -30,
+   -30, -40, -40, -50, -50, -40, -40, -30,
+   -30, -40, -40, -50, -50, -40, -40, -30,
+   -30, -40, -40, -50, -50, -40, -40, -30,
+   -20, -30, -30, -40, -40, -30, -30, -20,
+   -10, -20, -20, -20, -20, -20, -20, -10,
+    20,  20,   0,   0,   0,   0,  20,  20,
+    20,  30,  10,   0,   0,  10,  30,  20,
+)
+# fmt: on
+
+_WHITE_SQUARE_TABLES = (PAWN_SQUARES, KNIGHT_SQUARES, BISHOP_SQUARES, ROOK_SQUARES, QUEEN_SQUARES, KING_SQUARES)
+
+# Material plus square bonus for every piece index and square, signed for white.
+# Black reads the white table mirrored top to bottom (square ^ 56).
+PIECE_SQUARE_SCORES: tuple[tuple[int, ...], ...] = tuple(
+    tuple(PIECE_VALUES[kind] + table[square] for square in range(64)) for kind, table in enumerate(_WHITE_SQUARE_TABLES)
+) + tuple(
+    tuple(-(PIECE_VALUES[kind] + table[square ^ 56]) for square in range(64))
+    for kind, table in enumerate(_WHITE_SQUARE_TABLES)
+)
+
+
+def evaluate(position: Position) -> int:
+    """Return the static score of ``position`` for the side to move."""
+
+    score = 0
+    for piece, bitboard in enumerate(position.piece_array):
+        table = PIECE_SQUARE_SCORES[piece]
+        while bitboard:
+            lowest = bitboard & -bitboard
+            score += table[lowest.bit_length() - 1]
+            bitboard ^= lowest
+    return score if position.white_to_play else -score
+
+
+def score_name(score: int) -> str:
+    """Return a score the way UCI reports it: ``cp 35``, or ``mate 3`` / ``mate -2`` in moves."""
+
+    if score > MATE_BOUND:
+        return f"mate {(MATE_SCORE - score + 1) // 2}"
+    if score < -MATE_BOUND:
+        return f"mate {-((MATE_SCORE + score) // 2)}"
+    return f"cp {score}"
+
+
+def score_to_table(score: int, ply: int) -> int:
+    """Make a mate score relative to the node rather than the root before it is stored."""
+
+    if score > MATE_BOUND:
+        return score + ply
+    if score < -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def score_from_table(score: int, ply: int) -> int:
+    if score > MATE_BOUND:
+        return score - ply
+    if score < -MATE_BOUND:
+        return score + ply
+    return score
+
+
+@dataclass(slots=True)
+class SearchResult:
+    """The outcome of the deepest finished iteration, plus the work spent so far."""
+
+    best_move: int
+    score: int
+    depth: int
+    pv: tuple[int, ...]
+    nodes: int
+    elapsed: float
+    hashfull: int = 0
+
+    @property
+    def nps(self) -> int:
+        return int(self.nodes / self.elapsed) if self.elapsed > 0 else 0
+
+    def info_line(self) -> str:
+        pv = " ".join(move_name(move) for move in self.pv)
+        return (
+            f"depth {self.depth} score {score_name(self.score)} nodes {self.nodes} nps {self.nps} "
+            f"hashfull {self.hashfull} time {int(self.elapsed * 1000)} pv {pv}"
+        ).rstrip()
+
+
+class Searcher:
+    """One search over ``position``, which is played on and restored in place.
+
+    ``history`` holds the keys of the positions before the root, oldest first,
+    so repetitions of the game so far are scored as draws too.
+    """
+
+    __slots__ = (
+        "deadline",
+        "finished_depth",
+        "keys",
+        "max_nodes",
+        "next_check",
+        "nodes",
+        "position",
+        "pv",
+        "stopped",
+        "table",
+    )
+
+    def __init__(
+        self,
+        position: Position,
+        max_nodes: int | None = None,
+        deadline: float | None = None,
+        history: Sequence[int] = (),
+        table: TranspositionTable | None = None,
+    ):
+        self.position = position
+        self.table = TranspositionTable(DEFAULT_HASH_MB) if table is None else table
+        self.max_nodes = max_nodes
+        self.deadline = deadline
+        self.keys = [*history, position.hash_key]
+        self.nodes = 0
+        self.next_check = 0
+        self.stopped = False
+        self.finished_depth = 0
+        self.pv: list[tuple[int, ...]] = [()] * (MAX_PLY + 1)
+
+    def check_limits(self) -> None:
+        self.next_check = self.nodes + LIMIT_CHECK_INTERVAL
+        if self.max_nodes is not None:
+            self.next_check = min(self.next_check, self.max_nodes)
+        # Always finish the first iteration so there is a move to return.
+        if not self.finished_depth:
+            return
+        if (self.max_nodes is not None and self.nodes >= self.max_nodes) or (
+            self.deadline is not None and time.monotonic() >= self.deadline
+        ):
+            self.stopped = True
+
+    def is_repetition(self) -> bool:
+        keys = self.keys
+        key = keys[-1]
+        # Only positions since the last capture or pawn move can repeat, and only with the same side to move.
+        oldest = max(len(keys) - 1 - self.position.halfmove_clock, 0)
+        return any(keys[index] == key for index in range(len(keys) - 3, oldest - 1, -2))
+
+    def negamax(self, depth: int, ply: int, alpha: int, beta: int) -> int:
+        """Return the fail-soft score of the current position, searched ``depth`` plies deep."""
+
+        if depth <= 0:
+            return self.quiescence(ply, alpha, beta)
+
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self.check_limits()
+            if self.stopped:
+                return 0
+        pv = self.pv
+        pv[ply] = ()
+
+        position = self.position
+        if ply and (position.halfmove_clock >= 100 or self.is_repetition()):
+            return 0
+        if ply >= MAX_PLY:
+            return evaluate(position)
+
+        key = position.hash_key
+        hash_move = 0
+        entry = self.table.probe(key)
+        if entry is not None:
+            hash_move, table_score, table_depth, bound = entry
+            # The root always searches, so there is a best move and a PV to report.
+            if ply and table_depth >= depth:
+                table_score = score_from_table(table_score, ply)
+                if bound == BOUND_EXACT or (table_score >= beta if bound == BOUND_LOWER else table_score <= alpha):
+                    return table_score
+
+        picker = MovePicker(position, hash_move)
+        keys = self.keys
+        original_alpha = alpha
+        best = -SCORE_INFINITE
+        best_move = 0
+        for move in picker:
+            context = apply_move(position, move)
+            keys.append(position.hash_key)
+            score = -self.negamax(depth - 1, ply + 1, -beta, -alpha)
+            keys.pop()
+            undo_move(position, move, context)
+            if self.stopped:
+                return 0
+
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    best_move = move
+                    pv[ply] = (move, *pv[ply + 1])
+                    if score >= beta:
+                        break
+
+        if best == -SCORE_INFINITE:
+            best = -MATE_SCORE + ply if picker.king_state.check_count else 0
+            bound = BOUND_EXACT
+        elif best >= beta:
+            bound = BOUND_LOWER
+        else:
+            bound = BOUND_EXACT if best > original_alpha else BOUND_UPPER
+        self.table.store(key, best_move, score_to_table(best, ply), depth, bound)
+        return best
+
+    def quiescence(self, ply: int, alpha: int, beta: int) -> int:
+        """Return the fail-soft score of the current position once the captures on the board are resolved.
+
+        In check every evasion is searched, since standing pat is not an option.
+        """
+
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self.check_limits()
+            if self.stopped:
+                return 0
+        self.pv[ply] = ()
+
+        position = self.position
+        if ply and (position.halfmove_clock >= 100 or self.is_repetition()):
+            return 0
+        if ply >= MAX_PLY:
+            return evaluate(position)
+
+        picker = MovePicker(position)
+        in_check = picker.king_state.check_count
+        if in_check:
+            best = -SCORE_INFINITE
+            moves = picker
+        else:
+            best = evaluate(position)
+            if best >= beta:
+                return best
+            alpha = max(alpha, best)
+            moves = picker.captures()
+
+        keys = self.keys
+        for move in moves:
+            if not in_check and static_exchange_eval(position, move) < 0:
+                continue
+            context = apply_move(position, move)
+            keys.append(position.hash_key)
+            score = -self.quiescence(ply + 1, -beta, -alpha)
+            keys.pop()
+            undo_move(position, move, context)
+            if self.stopped:
+                return 0
+
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if score >= beta:
+                        break
+
+        if best == -SCORE_INFINITE:
+            return -MATE_SCORE + ply
+        return best
+
+    def extend_pv(self, pv: tuple[int, ...], depth: int) -> tuple[int, ...]:
+        """Complete a PV cut short by a table hit with the stored best moves, up to ``depth`` plies."""
+
+        position = self.position
+        played = []
+        for move in pv:
+            played.append((move, apply_move(position, move)))
+        extension: list[int] = []
+        while len(pv) + len(extension) < depth:
+            entry = self.table.probe(position.hash_key)
+            if entry is None or entry[3] != BOUND_EXACT or entry[0] not in generate_packed_moves(position, []):
+                break
+            extension.append(entry[0])
+            played.append((entry[0], apply_move(position, entry[0])))
+        for move, context in reversed(played):
+            undo_move(position, move, context)
+        return (*pv, *extension)
+
+    def search_root(self, depth: int, guess: int) -> int:
+        """Search the root ``depth`` plies deep, in an aspiration window around ``guess`` once deep enough."""
+
+        if depth < ASPIRATION_MIN_DEPTH or abs(guess) > MATE_BOUND:
+            return self.negamax(depth, 0, -SCORE_INFINITE, SCORE_INFINITE)
+
+        delta = ASPIRATION_WINDOW
+        alpha, beta = guess - delta, guess + delta
+        while True:
+            score = self.negamax(depth, 0, alpha, beta)
+            if self.stopped:
+                return score
+            if score <= alpha:
+                alpha = max(alpha - delta, -SCORE_INFINITE)
+            elif score >= beta:
+                beta = min(beta + delta, SCORE_INFINITE)
+            else:
+                return score
+            delta *= 2
+
+    def iterate(
+        self,
+        max_depth: int,
+        started: float,
+        on_iteration: Callable[[SearchResult], None] | None = None,
+    ) -> SearchResult:
+        result = SearchResult(0, 0, 0, (), 0, 0.0)
+        for depth in range(1, min(max_depth, MAX_PLY) + 1):
+            score = self.search_root(depth, result.score)
+            if self.stopped:
+                break
+            self.finished_depth = depth
+            pv = self.extend_pv(self.pv[0], depth)
+            result = SearchResult(
+                pv[0] if pv else 0,
+                score,
+                depth,
+                pv,
+                self.nodes,
+                time.monotonic() - started,
+                self.table.hashfull(),
+            )
+            if on_iteration is not None:
+                on_iteration(result)
+            # No legal move at the root: mate or stalemate, nothing deeper to find.
+            if not result.pv or (self.deadline is not None and time.monotonic() >= self.deadline):
+                break
+
+        result.nodes = self.nodes
+        result.elapsed = time.monotonic() - started
+        return result
+
+
+def search(
+    position: Position,
+    depth: int | None = None,
+    nodes: int | None = None,
+    movetime: float | None = None,
+    history: Sequence[int] = (),
+    on_iteration: Callable[[SearchResult], None] | None = None,
+    table: TranspositionTable | None = None,
+) -> SearchResult:
+    """Search ``position`` by iterative deepening until a depth, node or time (seconds) limit.
+
+    ``on_iteration`` is called with the result of every finished iteration. Pass
+    the same ``table`` to consecutive searches to keep what they learned; without
+    one, a ``DEFAULT_HASH_MB`` table is used for this search only. The position is
+    left as it was passed in.
+    """
+
+    if depth is None and nodes is None and movetime is None:
+        msg = "search needs a depth, node or time limit"
+        raise ValueError(msg)
+    if depth is not None and depth < 1:
+        msg = f"Search depth must be positive, got {depth}"
+        raise ValueError(msg)
+
+    started = time.monotonic()
+    deadline = None if movetime is None else started + movetime
+    if table is not None:
+        table.new_search()
+    searcher = Searcher(position, nodes, deadline, history, table)
+    return searcher.iterate(MAX_PLY if depth is None else depth, started, on_iteration)
+
+
+def run_search(
+    position: Position,
+    depth: int | None = None,
+    nodes: int | None = None,
+    movetime: float | None = None,
+    hash_mb: float = DEFAULT_HASH_MB,
+):
+    result = search(
+        position,
+        depth,
+        nodes,
+        movetime,
+        on_iteration=lambda info: print(f"info {info.info_line()}"),
+        table=TranspositionTable(hash_mb),
+    )
+    print(f"bestmove {move_name(result.best_move) if result.best_move else '(none)'}")
+    return result
@@ -0,0 +1,149 @@
+"""Perft test suites stored as EPD.
+
+Each record is a position followed by the expected node counts, e.g.::
+
+    rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - ;D1 20 ;D2 400 ;D3 8902
+
+The file is read lazily and positions are checked by a process pool with a
+bounded number of records in flight, so suites of any size run in constant
+memory. Results come back in file order.
+"""
+
+import os
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from rusttt.logic import Position
+from rusttt.parallel import BACKENDS, POOL_CONTEXT, count_nodes
+
+
+@dataclass(slots=True)
+class SuiteEntry:
+    line_number: int
+    fen: str
+    expected: dict[int, int]
+
+
+@dataclass(slots=True)
+class SuiteResult:
+    entry: SuiteEntry
+    counts: dict[int, int]
+    elapsed_ns: int
+
+    @property
+    def passed(self) -> bool:
+        return all(self.counts[depth] == self.entry.expected[depth] for depth in self.counts)
+
+    @property
+    def nodes(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes * 1_000_000_000 / self.elapsed_ns if self.elapsed_ns else 0.0
+
+
+def parse_epd_line(line: str, line_number: int = 0) -> SuiteEntry | None:
+    """Parse one EPD perft record; blank lines and ``#`` comments return ``None``."""
+
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+
+    fen, *operations = (part.strip() for part in line.split(";"))
+    expected: dict[int, int] = {}
+    for operation in operations:
+        if not operation:
+            continue
+        name, _, value = operation.partition(" ")
+        if len(name) < 2 or name[0] != "D" or not name[1:].isdigit() or not value.strip().isdigit():
+            msg = f"line {line_number}: invalid perft operation {operation!r}"
+            raise ValueError(msg)
+        expected[int(name[1:])] = int(value)
+
+    if not expected:
+        msg = f"line {line_number}: no D<n> node counts"
+        raise ValueError(msg)
+    return SuiteEntry(line_number, fen, expected)
+
+
+def read_epd(lines: Iterable[str]) -> Iterator[SuiteEntry]:
+    for line_number, line in enumerate(lines, start=1):
+        entry = parse_epd_line(line, line_number)
+        if entry is not None:
+            yield entry
+
+
+def check_entry(entry: SuiteEntry, max_depth: int | None, backend: str) -> SuiteResult:
+    """Run perft for every expected depth up to ``max_depth``; runs inside the workers."""
+
+    position = Position.from_fen(entry.fen)
+    counts: dict[int, int] = {}
+    timestamp_start = time.monotonic_ns()
+    for depth in sorted(entry.expected):
+        if max_depth is not None and depth > max_depth:
+            break
+        counts[depth] = count_nodes(position, depth, backend)
+    return SuiteResult(entry, counts, time.monotonic_ns() - timestamp_start)
+
+
+def check_suite(
+    entries: Iterable[SuiteEntry],
+    jobs: int,
+    max_depth: int | None = None,
+    backend: str = "numba",
+) -> Iterator[SuiteResult]:
+    """Yield a result for every entry, in input order, using ``jobs`` worker processes."""
+
+    if backend not in BACKENDS:
+        msg = f"Unknown backend {backend!r}"
+        raise ValueError(msg)
+    if jobs == 1:
+        for entry in entries:
+            yield check_entry(entry, max_depth, backend)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=POOL_CONTEXT) as executor:
+        pending: deque[Future[SuiteResult]] = deque()
+        for entry in entries:
+            pending.append(executor.submit(check_entry, entry, max_depth, backend))
+            # Keep every worker fed without reading the whole file up front.
+            if len(pending) >= 4 * jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def run_perft_suite(path: Path, jobs: int | None = None, max_depth: int | None = None, backend: str = "numba") -> bool:
+    """Check every record in the EPD file at ``path``, print a report and return whether all passed."""
+
+    jobs = jobs or os.cpu_count() or 1
+    timestamp_start = time.monotonic_ns()
+
+    total = passed = nodes = 0
+    with path.open() as lines:
+        for result in check_suite(read_epd(lines), jobs, max_depth, backend):
+            total += 1
+            nodes += result.nodes
+            depths = max(result.counts, default=0)
+            status = "PASS" if result.passed else "FAIL"
+            if result.passed:
+                passed += 1
+            print(
+                f"{status} line {result.entry.line_number}: D1-D{depths} {result.nodes} nodes, "
+                f"{result.nodes_per_second:,.0f} nps  {result.entry.fen}"
+            )
+            for depth, count in result.counts.items():
+                if count != result.entry.expected[depth]:
+                    print(f"    D{depth}: expected {result.entry.expected[depth]}, got {count}")
+
+    elapsed = time.monotonic_ns() - timestamp_start
+    print(f"Passed: {passed}/{total}")
+    print(f"Nodes: {nodes}")
+    print(f"Elapsed time: {elapsed / 1_000_000} ms")
+    print(f"Nodes/second: {nodes * 1_000_000_000 / elapsed if elapsed else 0.0:,.0f}")
+    return passed == total
@@ -0,0 +1,164 @@
+"""Generated lookup tables with a persistent, memory-mapped on-disk cache.
+
+Tables are built once per version and written as ``.npy`` files under the cache
+directory (``$RUSTTT_CACHE_DIR``, else ``$XDG_CACHE_HOME/rusttt``, else
+``~/.cache/rusttt``). Later imports memory-map those files instead of
+rebuilding, so every process on a machine shares the same pages. When the cache
+cannot be written the tables are simply built in memory.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+
+# stdlib logging rather than structlog: this module is on the import path of every
+# worker process and structlog alone costs tens of milliseconds to import.
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_ENV = "RUSTTT_CACHE_DIR"
+
+# Bump when the geometry builders below change what they produce.
+GEOMETRY_VERSION = "1"
+
+# Square 0 is A8 and square 63 is H1, so "up" (towards rank 8) is -8.
+# Direction order matches ROOK_UP/RIGHT/DOWN/LEFT and
+# BISHOP_UP_LEFT/UP_RIGHT/DOWN_LEFT/DOWN_RIGHT in ``rusttt.constants``.
+ROOK_DIRECTIONS: tuple[tuple[int, int], ...] = ((-1, 0), (0, 1), (1, 0), (0, -1))
+BISHOP_DIRECTIONS: tuple[tuple[int, int], ...] = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+KNIGHT_OFFSETS: tuple[tuple[int, int], ...] = (
+    (-2, -1),
+    (-2, 1),
+    (-1, -2),
+    (-1, 2),
+    (1, -2),
+    (1, 2),
+    (2, -1),
+    (2, 1),
+)
+KING_OFFSETS: tuple[tuple[int, int], ...] = ROOK_DIRECTIONS + BISHOP_DIRECTIONS
+
+
+def cache_dir() -> Path:
+    configured = os.environ.get(CACHE_DIR_ENV)
+    if configured:
+        return Path(configured)
+    xdg_cache = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg_cache) if xdg_cache else Path.home() / ".cache"
+    return base / "rusttt"
+
+
+def _read(directory: Path, names: list[str]) -> dict[str, np.ndarray]:
+    return {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in names}
+
+
+def _write(directory: Path, arrays: dict[str, np.ndarray]) -> None:
+    """Write ``arrays`` into ``directory`` atomically (all files or none)."""
+
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=f".{directory.name}-", dir=directory.parent))
+    try:
+        for name, array in arrays.items():
+            np.save(staging / f"{name}.npy", array)
+        (staging / "MANIFEST").write_text("\n".join(arrays))
+        staging.rename(directory)
+    except OSError:
+        # Another process may have published the same version first.
+        shutil.rmtree(staging, ignore_errors=True)
+        if not (directory / "MANIFEST").exists():
+            raise
+
+
+def load_or_build(
+    name: str,
+    version: str,
+    build: Callable[[], dict[str, np.ndarray]],
+) -> dict[str, np.ndarray]:
+    """Return the table set ``name`` at ``version``, memory-mapped from the cache when present.
+
+    The arrays returned from the cache are read-only.
+    """
+
+    directory = cache_dir() / f"{name}-v{version}"
+    manifest = directory / "MANIFEST"
+
+    if manifest.exists():
+        try:
+            return _read(directory, manifest.read_text().split())
+        except (OSError, ValueError):
+            logger.debug("discarding unreadable table cache %s", directory)
+            shutil.rmtree(directory, ignore_errors=True)
+
+    arrays = build()
+    try:
+        _write(directory, arrays)
+        return _read(directory, list(arrays))
+    except OSError:
+        logger.debug("table cache %s not writable, using in-memory tables", directory)
+        return arrays
+
+
+def _on_board(rank: int, file: int) -> bool:
+    return 0 <= rank < 8 and 0 <= file < 8
+
+
+def _offset_targets(square: int, offsets: tuple[tuple[int, int], ...]) -> int:
+    rank, file = divmod(square, 8)
+    targets = 0
+    for rank_delta, file_delta in offsets:
+        if _on_board(rank + rank_delta, file + file_delta):
+            targets |= 1 << ((rank + rank_delta) * 8 + file + file_delta)
+    return targets
+
+
+def _ray(square: int, direction: tuple[int, int]) -> list[int]:
+    """Return the squares from ``square`` (exclusive) to the board edge."""
+
+    rank, file = divmod(square, 8)
+    rank_delta, file_delta = direction
+    squares: list[int] = []
+    rank += rank_delta
+    file += file_delta
+    while _on_board(rank, file):
+        squares.append(rank * 8 + file)
+        rank += rank_delta
+        file += file_delta
+    return squares
+
+
+def build_geometry() -> dict[str, np.ndarray]:
+    """Build the occupancy-independent tables: leaper attacks, rays and in-between masks."""
+
+    square_bbs = [1 << square for square in range(64)]
+    king = [_offset_targets(square, KING_OFFSETS) for square in range(64)]
+    knight = [_offset_targets(square, KNIGHT_OFFSETS) for square in range(64)]
+    # Pawns on their promotion rank never occur, so their attack sets stay empty.
+    white_pawn = [_offset_targets(square, ((-1, -1), (-1, 1))) if square >= 8 else 0 for square in range(64)]
+    black_pawn = [_offset_targets(square, ((1, -1), (1, 1))) if square < 56 else 0 for square in range(64)]
+
+    rook_rays = [[0] * 64 for _ in ROOK_DIRECTIONS]
+    bishop_rays = [[0] * 64 for _ in BISHOP_DIRECTIONS]
+    inbetween = [[0] * 64 for _ in range(64)]
+    for square in range(64):
+        for rays, directions in ((rook_rays, ROOK_DIRECTIONS), (bishop_rays, BISHOP_DIRECTIONS)):
+            for index, direction in enumerate(directions):
+                path = 0
+                for target in _ray(square, direction):
+                    path |= 1 << target
+                    inbetween[square][target] = path
+                rays[index][square] = path
+
+    return {
+        "square_bbs": np.array(square_bbs, dtype=np.uint64),
+        "king_attacks": np.array(king, dtype=np.uint64),
+        "knight_attacks": np.array(knight, dtype=np.uint64),
+        "white_pawn_attacks": np.array(white_pawn, dtype=np.uint64),
+        "black_pawn_attacks": np.array(black_pawn, dtype=np.uint64),
+        "rook_rays": np.array(rook_rays, dtype=np.uint64),
+        "bishop_rays": np.array(bishop_rays, dtype=np.uint64),
+        "inbetween": np.array(inbetween, dtype=np.uint64),
+    }
@@ -0,0 +1,173 @@
+"""Fixed-size transposition table for search.
+
+The table is one ``uint64`` numpy array of ``bucket_count x 4`` entries and
+never grows. It is sized to the largest bucket count that fits the budget it
+was created with, with one bucket held back to align the array. A bucket is 32
+bytes and starts on a 32-byte boundary, so one probe touches a single cache
+line.
+
+Every entry packs one searched position into 64 bits:
+
+====  ======  ===============================================================
+bits  field   meaning
+====  ======  ===============================================================
+0     key16   top 16 bits of the Zobrist key, to tell positions in a bucket apart
+16    move    best move in the ``encode_move`` packing (21 bits), 0 for none
+37    score   search score + 32768 (16 bits)
+53    depth   remaining depth the score was searched to (6 bits)
+59    bound   ``BOUND_UPPER``, ``BOUND_LOWER`` or ``BOUND_EXACT``; 0 marks an empty slot
+61    age     generation of the search that stored it (3 bits)
+====  ======  ===============================================================
+
+The bucket comes from the low 32 bits of the key, scaled onto the bucket
+count by a multiply and shift, so any budget is usable, not only powers of
+two. Those bits are independent of the top 16 bits that are stored.
+
+Probes and stores go through a flat ``memoryview`` of the array, which reads
+and writes plain ints instead of boxing numpy scalars.
+
+``new_search`` starts a new generation. When a bucket is full, the new
+position replaces the entry with the lowest ``depth - 8 * age distance``, so
+entries from earlier searches go first and deep entries are kept.
+"""
+
+import numpy as np
+
+from rusttt.logic import Move, encode_move
+
+BOUND_NONE = 0
+BOUND_UPPER = 1
+BOUND_LOWER = 2
+BOUND_EXACT = BOUND_UPPER | BOUND_LOWER
+
+BUCKET_SIZE = 4
+ENTRY_BYTES = 8
+BUCKET_BYTES = BUCKET_SIZE * ENTRY_BYTES
+
+MOVE_SHIFT = 16
+SCORE_SHIFT = 37
+DEPTH_SHIFT = 53
+BOUND_SHIFT = 59
+AGE_SHIFT = 61
+
+MOVE_MASK = (1 << 21) - 1
+SCORE_OFFSET = 1 << 15
+MAX_DEPTH = 63
+GENERATIONS = 8
+
+# hashfull reads the first this many entries, the way UCI engines sample it.
+HASHFULL_SAMPLE = 1000
+
+
+def pack_entry(check: int, move: int, score: int, depth: int, bound: int, age: int) -> int:
+    return (
+        check
+        | move << MOVE_SHIFT
+        | (score + SCORE_OFFSET) << SCORE_SHIFT
+        | depth << DEPTH_SHIFT
+        | bound << BOUND_SHIFT
+        | age << AGE_SHIFT
+    )
+
+
+class TranspositionTable:
+    """Bucketed map from a position key to ``(move, score, depth, bound)``."""
+
+    __slots__ = ("bucket_count", "buffer", "entries", "generation", "slots")
+
+    def __init__(self, megabytes: float = 16):
+        bucket_count = int(megabytes * 1024 * 1024) // BUCKET_BYTES - 1
+        if bucket_count < 1:
+            msg = f"Hash budget of {megabytes} MB is too small"
+            raise ValueError(msg)
+        self.bucket_count = bucket_count
+        # numpy only promises 16-byte alignment; skip ahead to the first bucket boundary.
+        self.buffer = np.zeros((bucket_count + 1) * BUCKET_SIZE, dtype=np.uint64)
+        offset = (-self.buffer.ctypes.data % BUCKET_BYTES) // ENTRY_BYTES
+        self.entries = self.buffer[offset : offset + bucket_count * BUCKET_SIZE].reshape(bucket_count, BUCKET_SIZE)
+        self.slots = memoryview(self.entries.reshape(-1)).cast("B").cast("Q")
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return self.bucket_count * BUCKET_SIZE
+
+    @property
+    def nbytes(self) -> int:
+        return self.buffer.nbytes
+
+    def clear(self) -> None:
+        self.entries.fill(0)
+        self.generation = 0
+
+    def new_search(self) -> None:
+        """Start a new generation; entries stored before it become the first to be replaced."""
+
+        self.generation = (self.generation + 1) % GENERATIONS
+
+    def bucket_start(self, key: int) -> int:
+        """Return the flat index of the first entry of ``key``'s bucket."""
+
+        return (((key & 0xFFFFFFFF) * self.bucket_count) >> 32) * BUCKET_SIZE
+
+    def probe(self, key: int) -> tuple[int, int, int, int] | None:
+        """Return ``(move, score, depth, bound)`` stored for ``key``, or ``None`` on a miss."""
+
+        slots = self.slots
+        start = self.bucket_start(key)
+        check = key >> 48
+        for index in range(start, start + BUCKET_SIZE):
+            entry = slots[index]
+            if entry & 0xFFFF == check and entry >> BOUND_SHIFT & 3:
+                if entry >> AGE_SHIFT != self.generation:
+                    # Used by this search: age it like a fresh store so it is not evicted first.
+                    entry = (entry & ((1 << AGE_SHIFT) - 1)) | self.generation << AGE_SHIFT
+                    slots[index] = entry
+                return (
+                    entry >> MOVE_SHIFT & MOVE_MASK,
+                    (entry >> SCORE_SHIFT & 0xFFFF) - SCORE_OFFSET,
+                    entry >> DEPTH_SHIFT & MAX_DEPTH,
+                    entry >> BOUND_SHIFT & 3,
+                )
+        return None
+
+    def store(self, key: int, move: Move | int, score: int, depth: int, bound: int) -> None:
+        """Record a searched position; a ``move`` of 0 keeps the move already stored for ``key``."""
+
+        if not isinstance(move, int):
+            move = encode_move(*move)
+        depth = min(max(depth, 0), MAX_DEPTH)
+        generation = self.generation
+        slots = self.slots
+        start = self.bucket_start(key)
+        check = key >> 48
+
+        victim = start
+        victim_value = MAX_DEPTH + 1
+        for index in range(start, start + BUCKET_SIZE):
+            entry = slots[index]
+            if not entry >> BOUND_SHIFT & 3:
+                # Slots fill in order, so the first empty one means the key is not stored yet.
+                victim = index
+                break
+            entry_depth = entry >> DEPTH_SHIFT & MAX_DEPTH
+            if entry & 0xFFFF == check:
+                # Keep a clearly deeper bound from this search rather than a shallower one.
+                if bound != BOUND_EXACT and entry >> AGE_SHIFT == generation and depth + 2 <= entry_depth:
+                    return
+                if not move:
+                    move = entry >> MOVE_SHIFT & MOVE_MASK
+                victim = index
+                break
+            value = entry_depth - 8 * ((generation - (entry >> AGE_SHIFT)) % GENERATIONS)
+            if value < victim_value:
+                victim, victim_value = index, value
+
+        slots[victim] = pack_entry(check, move, score, depth, bound, generation)
+
+    def hashfull(self) -> int:
+        """Return how full the table is, in permille, counting only entries of the current generation."""
+
+        sample = self.entries.reshape(-1)[:HASHFULL_SAMPLE]
+        used = (sample >> np.uint64(BOUND_SHIFT) & np.uint64(3)) != 0
+        current = (sample >> np.uint64(AGE_SHIFT)) == self.generation
+        return int(np.count_nonzero(used & current)) * 1000 // len(sample)
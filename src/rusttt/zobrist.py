@@ -0,0 +1,72 @@
+"""Zobrist keys for position hashing.
+
+A position's key is the XOR of one random 64-bit number per (piece, square)
+pair present, one for black to move, one per castle right still held and one
+for the file of the en passant square. ``CASTLE_MASK_KEYS`` folds the castle
+keys for every 4-bit rights mask, so a rights change costs one XOR. Keys come from a fixed-seed splitmix64
+stream so hashes are stable across processes and runs.
+"""
+
+from collections.abc import Sequence
+
+import numpy as np
+
+from rusttt.constants import NO_SQUARE
+
+BOARD_MASK: int = (1 << 64) - 1
+
+ZOBRIST_SEED: int = 0x52555354545421
+
+
+def _splitmix64(seed: int, count: int) -> list[int]:
+    values: list[int] = []
+    state = seed
+    for _ in range(count):
+        state = (state + 0x9E3779B97F4A7C15) & BOARD_MASK
+        z = state
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & BOARD_MASK
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & BOARD_MASK
+        values.append(z ^ (z >> 31))
+    return values
+
+
+_keys = _splitmix64(ZOBRIST_SEED, 12 * 64 + 1 + 4 + 8)
+
+PIECE_KEYS: list[list[int]] = [_keys[piece * 64 : (piece + 1) * 64] for piece in range(12)]
+SIDE_KEY: int = _keys[12 * 64]
+CASTLE_KEYS: list[int] = _keys[12 * 64 + 1 : 12 * 64 + 5]
+EP_FILE_KEYS: list[int] = _keys[12 * 64 + 5 :]
+CASTLE_MASK_KEYS: list[int] = [0] * 16
+for _mask in range(1, 16):
+    _lowest = (_mask & -_mask).bit_length() - 1
+    CASTLE_MASK_KEYS[_mask] = CASTLE_MASK_KEYS[_mask & (_mask - 1)] ^ CASTLE_KEYS[_lowest]
+
+# The same keys as arrays, for the compiled backends.
+PIECE_KEY_TABLE: np.ndarray = np.array(PIECE_KEYS, dtype=np.uint64)
+CASTLE_KEY_TABLE: np.ndarray = np.array(CASTLE_KEYS, dtype=np.uint64)
+EP_FILE_KEY_TABLE: np.ndarray = np.array(EP_FILE_KEYS, dtype=np.uint64)
+
+
+def compute_hash(
+    piece_array: Sequence[int],
+    white_to_play: bool,
+    castle_rights: int,
+    ep: int,
+) -> int:
+    """Compute a position key from scratch."""
+
+    key = 0
+    for piece in range(12):
+        bitboard = piece_array[piece]
+        piece_keys = PIECE_KEYS[piece]
+        while bitboard:
+            lsb = bitboard & -bitboard
+            key ^= piece_keys[lsb.bit_length() - 1]
+            bitboard ^= lsb
+
+    if not white_to_play:
+        key ^= SIDE_KEY
+    key ^= CASTLE_MASK_KEYS[castle_rights]
+    if ep != NO_SQUARE:
+        key ^= EP_FILE_KEYS[ep & 7]
+    return key
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from typing import List
+
+import numpy as np
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from rusttt import constants as const
+from rusttt import batch, jit, logic
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+FENS = [
+    const.STARTING_FEN,
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+    "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+    "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3",
+    "7k/6Q1/6K1/8/8/8/8/8 b - - 0 1",
+]
+
+
+def positions() -> List[logic.Position]:
+    return [logic.Position.from_fen(fen) for fen in FENS]
+
+
+# ---------------------------------------------------------------------------
+# Deterministic unit tests
+# ---------------------------------------------------------------------------
+
+
+def test_batch_arrays_layout() -> None:
+    boards, white_to_play, castle_rights, en_passant = batch.batch_arrays(positions())
+    assert boards.shape == (len(FENS), 12)
+    assert boards.dtype == np.uint64
+    assert white_to_play.tolist()[-1] == 0
+    assert castle_rights[0] == const.CASTLE_ALL
+    assert en_passant[5] == const.F6
+
+
+def test_batch_count_moves_matches_single_positions() -> None:
+    counts = batch.batch_count_moves(*batch.batch_arrays(positions()))
+    assert counts.tolist() == [logic.count_moves_for_side(position) for position in positions()]
+    assert counts[-1] == 0
+
+
+def test_batch_generate_moves_splits_by_offsets() -> None:
+    moves, offsets = batch.batch_generate_moves(*batch.batch_arrays(positions()))
+    assert offsets[0] == 0
+    assert offsets[-1] == len(moves)
+    for index, position in enumerate(positions()):
+        expected = jit.legal_moves(*jit.position_arrays(position))
+        assert moves[offsets[index] : offsets[index + 1]].tolist() == expected
+
+
+def test_batch_spans_several_chunks() -> None:
+    boards, white_to_play, castle_rights, en_passant = batch.batch_arrays(positions())
+    repeats = batch.BATCH_CHUNK // len(FENS) + 2
+    counts = batch.batch_count_moves(
+        np.tile(boards, (repeats, 1)),
+        np.tile(white_to_play, repeats),
+        np.tile(castle_rights, repeats),
+        np.tile(en_passant, repeats),
+    )
+    assert counts.tolist() == batch.batch_count_moves(boards, white_to_play, castle_rights, en_passant).tolist() * repeats
+
+
+def test_empty_batch() -> None:
+    moves, offsets = batch.batch_generate_moves(*batch.batch_arrays([]))
+    assert len(moves) == 0
+    assert offsets.tolist() == [0]
+
+
+def test_batch_rejects_mismatched_shapes() -> None:
+    boards, white_to_play, castle_rights, en_passant = batch.batch_arrays(positions())
+    with pytest.raises(ValueError, match=r"\(N, 12\)"):
+        batch.batch_count_moves(boards[:, :11], white_to_play, castle_rights, en_passant)
+    with pytest.raises(ValueError, match="en_passant"):
+        batch.batch_count_moves(boards, white_to_play, castle_rights, en_passant[:-1])
+
+
+# ---------------------------------------------------------------------------
+# Hypothesis property-based tests
+# ---------------------------------------------------------------------------
+
+
+@settings(max_examples=25, deadline=None)
+@given(st.lists(st.integers(min_value=0, max_value=255), min_size=1, max_size=12))
+def test_batch_of_random_line_matches_generator(choices: List[int]) -> None:
+    position = logic.Position.from_fen(const.STARTING_FEN)
+    line = [position.copy()]
+    for choice in choices:
+        moves = logic.generate_packed_moves(position, [])
+        if not moves:
+            break
+        logic.apply_move(position, moves[choice % len(moves)])
+        line.append(position.copy())
+
+    moves, offsets = batch.batch_generate_moves(*batch.batch_arrays(line))
+    for index, visited in enumerate(line):
+        assert sorted(moves[offsets[index] : offsets[index + 1]].tolist()) == sorted(
+            logic.generate_packed_moves(visited, [])
+        )
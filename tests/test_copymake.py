@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from typing import List
+
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from rusttt import constants as const
+from rusttt import copymake, logic
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+PERFT_SUITE = [
+    ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", [48, 2039, 97862]),
+    ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812]),
+    ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", [6, 264, 9467]),
+    ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379]),
+]
+
+
+def board_for(fen: str) -> list[int]:
+    return copymake.compact_board(logic.Position.from_fen(fen))
+
+
+def played(fen: str, move: int) -> logic.Position:
+    position = logic.Position.from_fen(fen)
+    logic.apply_move(position, move)
+    return position
+
+
+# ---------------------------------------------------------------------------
+# Deterministic unit tests
+# ---------------------------------------------------------------------------
+
+
+def test_compact_board_layout() -> None:
+    board = board_for(const.STARTING_FEN)
+    assert len(board) == copymake.BOARD_SIZE
+    assert board[copymake.WHITE_OCCUPANCY] == const.RANK_1_BITBOARD | const.RANK_2_BITBOARD
+    assert board[copymake.BLACK_OCCUPANCY] == const.RANK_7_BITBOARD | const.RANK_8_BITBOARD
+    assert board[copymake.OCCUPANCY] == board[copymake.WHITE_OCCUPANCY] | board[copymake.BLACK_OCCUPANCY]
+    assert board[copymake.STATE] == copymake.pack_state(True, 15, const.NO_SQUARE)
+
+
+@pytest.mark.parametrize(("fen", "expected"), PERFT_SUITE)
+def test_perft_copy_make_suite_positions(fen: str, expected: List[int]) -> None:
+    board = board_for(fen)
+    for depth, nodes in enumerate(expected, start=1):
+        assert copymake.perft_copy_make(board, depth) == nodes
+
+
+def test_perft_copy_make_depth_zero_is_one() -> None:
+    assert copymake.perft_copy_make(board_for(const.STARTING_FEN), 0) == 1
+
+
+@pytest.mark.parametrize(("fen", "_expected"), PERFT_SUITE)
+def test_make_child_matches_apply_move(fen: str, _expected: List[int]) -> None:
+    board = board_for(fen)
+    before = board.copy()
+    for move in copymake.generate_board_moves(board, []):
+        child = copymake.make_child(board, move)
+        expected = played(fen, move)
+        assert child == copymake.compact_board(expected)
+        assert copymake.to_position(child).to_fen().split()[:4] == expected.to_fen().split()[:4]
+    assert board == before
+
+
+def test_make_child_drops_castle_rights_when_a_rook_is_captured() -> None:
+    fen = "r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1"
+    move = logic.encode_move(const.H1, const.H8, const.TAG_CAPTURE, const.WR)
+    child = copymake.make_child(board_for(fen), move)
+    castle = (child[copymake.STATE] >> copymake.STATE_CASTLE_SHIFT) & const.CASTLE_ALL
+    assert castle == const.CASTLE_WQS | const.CASTLE_BQS
+
+
+def test_run_perft_copy_make_prints_divide(capsys: pytest.CaptureFixture[str]) -> None:
+    assert copymake.run_perft_copy_make(logic.Position.from_fen(const.STARTING_FEN), 2) == 400
+    out = capsys.readouterr().out
+    assert "e2e4: 20" in out
+    assert "Nodes: 400" in out
+
+
+# ---------------------------------------------------------------------------
+# Hypothesis property-based tests
+# ---------------------------------------------------------------------------
+
+
+@settings(max_examples=25, deadline=None)
+@given(st.lists(st.integers(min_value=0, max_value=255), min_size=1, max_size=6))
+def test_random_lines_match_make_unmake(choices: List[int]) -> None:
+    position = logic.Position.from_fen(const.STARTING_FEN)
+    board = copymake.compact_board(position)
+    for choice in choices:
+        moves = logic.generate_packed_moves(position, [])
+        assert copymake.generate_board_moves(board, []) == moves
+        if not moves:
+            break
+        move = moves[choice % len(moves)]
+        logic.apply_move(position, move)
+        board = copymake.make_child(board, move)
+        assert board == copymake.compact_board(position)
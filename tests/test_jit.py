@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+from typing import List
+
+import numpy as np
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from rusttt import constants as const
+from rusttt import jit, logic
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def square_mask(square: int) -> int:
+    return const.SQUARE_BBS[square]
+
+
+def position_for(
+    pieces: dict[int, list[int]],
+    *,
+    white_to_play: bool = True,
+    castle_rights: int = 0,
+    en_passant: int = const.NO_SQUARE,
+) -> logic.Position:
+    position = logic.Position()
+    for piece, squares in pieces.items():
+        for square in squares:
+            position.piece_array[piece] |= square_mask(square)
+    position.castle_rights = castle_rights
+    position.white_to_play = white_to_play
+    position.ep = en_passant
+    position.refresh()
+    return position
+
+
+def python_perft(position: logic.Position, depth: int) -> int:
+    return logic.perft_inline(position.copy(), depth, 1)
+
+
+STARTING_POSITION = logic.Position()
+logic.set_starting_position(STARTING_POSITION)
+
+SPECIAL_POSITIONS = [
+    # castling on both wings for both sides
+    position_for(
+        {
+            const.WK: [const.E1],
+            const.WR: [const.A1, const.H1],
+            const.BK: [const.E8],
+            const.BR: [const.A8, const.H8],
+        },
+        castle_rights=const.CASTLE_ALL,
+    ),
+    # en passant available, with the king on the capture rank
+    position_for(
+        {
+            const.WK: [const.A5],
+            const.WP: [const.E5],
+            const.BP: [const.D5],
+            const.BR: [const.H5],
+            const.BK: [const.E8],
+        },
+        en_passant=const.D6,
+    ),
+    # promotions with and without capture
+    position_for(
+        {
+            const.WK: [const.E1],
+            const.WP: [const.A7, const.G7],
+            const.BN: [const.B8],
+            const.BK: [const.H5],
+            const.BP: [const.B2],
+        },
+        white_to_play=False,
+    ),
+]
+
+
+# ---------------------------------------------------------------------------
+# Deterministic unit tests
+# ---------------------------------------------------------------------------
+
+
+def test_position_arrays_packs_state() -> None:
+    board, state = jit.position_arrays(STARTING_POSITION)
+    assert board.dtype == np.uint64
+    assert board.shape == (12,)
+    assert state[jit.STATE_WHITE_TO_PLAY] == 1
+    assert state[jit.STATE_CASTLE] == const.CASTLE_ALL
+    assert state[jit.STATE_EP] == const.NO_SQUARE
+
+
+@pytest.mark.parametrize(
+    ("depth", "expected"),
+    [(0, 1), (1, 20), (2, 400), (3, 8902), (4, 197281)],
+)
+def test_perft_starting_position(depth: int, expected: int) -> None:
+    board, state = jit.position_arrays(STARTING_POSITION)
+    assert jit.perft(board, state, depth) == expected
+
+
+@pytest.mark.parametrize("position", SPECIAL_POSITIONS)
+def test_perft_matches_python_reference(position: logic.Position) -> None:
+    board, state = jit.position_arrays(position)
+    for depth in (1, 2, 3):
+        assert jit.perft(board, state, depth) == python_perft(position, depth)
+
+
+@pytest.mark.parametrize(
+    ("fen", "expected"),
+    [
+        ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", [48, 2039, 97862]),
+        ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238]),
+        ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", [6, 264, 9467]),
+        ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379]),
+        ("r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", [46, 2079, 89890]),
+    ],
+)
+def test_perft_suite_positions(fen: str, expected: List[int]) -> None:
+    board, state = jit.position_arrays(logic.Position.from_fen(fen))
+    for depth, nodes in enumerate(expected, start=1):
+        assert jit.perft(board, state, depth) == nodes
+
+
+@pytest.mark.parametrize("depth", [1, 2, 3, 4])
+def test_perft_copy_make_matches_perft(depth: int) -> None:
+    for position in (STARTING_POSITION, *SPECIAL_POSITIONS):
+        board, state = jit.position_arrays(position)
+        assert jit.perft_copy_make(board, state, depth) == jit.perft(board, state, depth)
+
+
+def test_perft_copy_make_leaves_arrays_untouched() -> None:
+    board, state = jit.position_arrays(STARTING_POSITION)
+    assert jit.perft_copy_make(board, state, 3) == 8902
+    assert np.array_equal(board, jit.position_arrays(STARTING_POSITION)[0])
+    assert state[jit.STATE_CASTLE] == const.CASTLE_ALL
+
+
+def test_make_and_undo_restore_every_root_move() -> None:
+    for position in (STARTING_POSITION, *SPECIAL_POSITIONS):
+        board, state = jit.position_arrays(position)
+        board_before = board.copy()
+        state_before = state.copy()
+        for move in jit.legal_moves(board, state):
+            castle = state[jit.STATE_CASTLE]
+            ep = state[jit.STATE_EP]
+            captured = jit.make_move(board, state, move)
+            jit.undo_move(board, state, move, captured, castle, ep)
+            assert np.array_equal(board, board_before)
+            assert np.array_equal(state, state_before)
+
+
+def test_make_move_double_push_sets_en_passant() -> None:
+    board, state = jit.position_arrays(STARTING_POSITION)
+    move = logic.encode_move(const.E2, const.E4, const.TAG_DOUBLE_PAWN_WHITE, const.WP)
+    jit.make_move(board, state, move)
+    assert state[jit.STATE_EP] == const.E3
+    assert state[jit.STATE_WHITE_TO_PLAY] == 0
+    assert int(board[const.WP]) & square_mask(const.E4)
+
+
+def test_perft_divide_sums_to_perft() -> None:
+    board, state = jit.position_arrays(STARTING_POSITION)
+    divide = jit.perft_divide(board, state, 3)
+    assert len(divide) == 20
+    assert sum(nodes for _move, nodes in divide) == 8902
+
+
+@pytest.mark.parametrize(
+    ("fen", "depth", "expected"),
+    [
+        (const.STARTING_FEN, 4, jit.PerftStats(197281, 1576, 0, 0, 0, 469, 0, 0, 8)),
+        (
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+            3,
+            jit.PerftStats(97862, 17102, 45, 3162, 0, 993, 0, 0, 1),
+        ),
+        ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", 4, jit.PerftStats(43238, 3348, 123, 0, 0, 1680, 106, 0, 17)),
+    ],
+)
+def test_perft_detailed_matches_published_tables(fen: str, depth: int, expected: jit.PerftStats) -> None:
+    board, state = jit.position_arrays(logic.Position.from_fen(fen))
+    assert jit.perft_detailed(board, state, depth) == expected
+
+
+@pytest.mark.parametrize("position", SPECIAL_POSITIONS)
+def test_perft_detailed_nodes_match_perft(position: logic.Position) -> None:
+    board, state = jit.position_arrays(position)
+    for depth in (1, 2, 3):
+        stats = jit.perft_detailed(board, state, depth)
+        assert stats.nodes == jit.perft(board, state, depth)
+        assert stats.discovered_checks + stats.double_checks <= stats.checks
+        assert stats.checkmates <= stats.checks
+
+
+def test_perft_detailed_depth_zero_is_one_node() -> None:
+    board, state = jit.position_arrays(STARTING_POSITION)
+    assert jit.perft_detailed(board, state, 0) == jit.PerftStats(nodes=1)
+
+
+def test_attackers_to_finds_every_checker() -> None:
+    board, state = jit.position_arrays(logic.Position.from_fen("4k3/8/8/8/4r3/5n2/8/4K3 w - - 0 1"))
+    occupancy = np.bitwise_or.reduce(board)
+    attackers = int(jit.attackers_to(board, const.E1, occupancy, 1))
+    assert attackers == square_mask(const.E4) | square_mask(const.F3)
+    assert jit.attackers_to(board, const.E8, occupancy, 0) == 0
+
+
+@pytest.mark.parametrize("copy_make", [False, True])
+def test_run_perft_jit_prints_divide(capsys: pytest.CaptureFixture[str], copy_make: bool) -> None:
+    assert jit.run_perft_jit(STARTING_POSITION, 2, copy_make) == 400
+    out = capsys.readouterr().out
+    assert "e2e4: 20" in out
+    assert "Nodes: 400" in out
+
+
+# ---------------------------------------------------------------------------
+# Hypothesis property-based tests
+# ---------------------------------------------------------------------------
+
+
+bitboard_strategy = st.integers(min_value=0, max_value=(1 << 64) - 1)
+non_zero_bitboard_strategy = st.integers(min_value=1, max_value=(1 << 64) - 1)
+square_strategy = st.integers(min_value=0, max_value=63)
+
+
+@settings(deadline=None)
+@given(bitboard=non_zero_bitboard_strategy)
+def test_bitscan_and_popcount_match_python(bitboard: int) -> None:
+    value = np.uint64(bitboard)
+    assert jit.bitscan_forward(value) == (bitboard & -bitboard).bit_length() - 1
+    assert jit.popcount(value) == bitboard.bit_count()
+
+
+@settings(deadline=None)
+@given(square=square_strategy, occupancy=bitboard_strategy)
+def test_slider_attacks_match_reference(square: int, occupancy: int) -> None:
+    value = np.uint64(occupancy)
+    assert int(jit.rook_attacks(square, value)) == logic.get_rook_moves_separate(square, occupancy)
+    assert int(jit.bishop_attacks(square, value)) == logic.get_bishop_moves_separate(square, occupancy)
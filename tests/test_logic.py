@@ -3,7 +3,7 @@ from __future__ import annotations
 from typing import Dict, Iterable, Iterator, List
 
 import pytest
-from hypothesis import HealthCheck, given, settings
+from hypothesis import HealthCheck, assume, given, settings
 from hypothesis import strategies as st
 
 from rusttt import constants as const
@@ -33,11 +33,6 @@ def iter_squares(bitboard: int) -> Iterator[int]:
         bitboard ^= lsb
 
 
-def clear_board() -> None:
-    for idx in range(len(logic.piece_array)):
-        logic.piece_array[idx] = 0
-
-
 def empty_piece_array() -> List[int]:
     return [0] * 12
 
@@ -57,22 +52,46 @@ def load_position(
     pieces: Dict[int, Iterable[int]],
     *,
     white_to_play: bool = True,
-    castle_rights: List[bool] | None = None,
+    castle_rights: int = 0,
     en_passant: int = const.NO_SQUARE,
-) -> None:
-    clear_board()
+) -> logic.Position:
+    position = logic.Position()
     for piece, squares in pieces.items():
         mask = 0
         for square in squares:
             mask |= square_mask(square)
-        logic.piece_array[piece] = mask
+        position.piece_array[piece] = mask
+
+    position.castle_rights = castle_rights
+    position.white_to_play = white_to_play
+    position.ep = en_passant
+    position.refresh()
+    return position
+
+
+def position_from(
+    piece_array: List[int],
+    white_to_play: bool,
+    castle_rights: int,
+    en_passant: int = const.NO_SQUARE,
+) -> logic.Position:
+    position = logic.Position()
+    position.piece_array = piece_array
+    position.white_to_play = white_to_play
+    position.castle_rights = castle_rights
+    position.ep = en_passant
+    position.refresh()
+    return position
 
-    if castle_rights is None:
-        castle_rights = [False, False, False, False]
 
-    logic.castle_rights[:] = castle_rights
-    logic.white_to_play = white_to_play
-    logic.ep = en_passant
+def cached_state(position: logic.Position) -> tuple[int, int, int, List[int]]:
+    return position.white_occupancy, position.black_occupancy, position.occupancy, position.mailbox.copy()
+
+
+def fresh_state(position: logic.Position) -> tuple[int, int, int, List[int]]:
+    fresh = position.copy()
+    fresh.refresh()
+    return cached_state(fresh)
 
 
 def combined_occupancy(piece_array: List[int]) -> int:
@@ -234,23 +253,12 @@ def naive_square_attacked_by_black(piece_array: List[int], occupancy: int, squar
 
 
 @pytest.fixture(autouse=True)
-def reset_globals() -> Iterator[None]:
-    piece_snapshot = logic.piece_array.copy()
-    castle_snapshot = logic.castle_rights.copy()
-    white_turn = logic.white_to_play
-    en_passant = logic.ep
-    ply = logic.board_ply
+def python_bitscan() -> Iterator[None]:
     original_bitscan = logic.bitscan_forward
-    python_bitscan = getattr(logic.bitscan_forward, "py_func", logic.bitscan_forward)
-    logic.bitscan_forward = python_bitscan
+    logic.bitscan_forward = getattr(logic.bitscan_forward, "py_func", logic.bitscan_forward)
     try:
         yield
     finally:
-        logic.piece_array[:] = piece_snapshot
-        logic.castle_rights[:] = castle_snapshot
-        logic.white_to_play = white_turn
-        logic.ep = en_passant
-        logic.board_ply = ply
         logic.bitscan_forward = original_bitscan
 
 
@@ -306,47 +314,140 @@ def test_print_move_no_nl_knight_promotion_suffix(capsys: pytest.CaptureFixture[
     assert captured.out == "a7a8n"
 
 
-def test_set_starting_position_initializes_globals() -> None:
-    logic.set_starting_position()
-    assert logic.white_to_play is True
-    assert logic.ep == const.NO_SQUARE
-    assert logic.castle_rights == [True, True, True, True]
-    assert logic.piece_array[const.WP] == const.WP_STARTING_POSITIONS
-    assert logic.piece_array[const.BK] == const.BK_STARTING_POSITION
+def test_set_starting_position_initializes_position() -> None:
+    position = logic.Position()
+    logic.set_starting_position(position)
+    assert position.white_to_play is True
+    assert position.ep == const.NO_SQUARE
+    assert position.castle_rights == const.CASTLE_ALL
+    assert position.piece_array[const.WP] == const.WP_STARTING_POSITIONS
+    assert position.piece_array[const.BK] == const.BK_STARTING_POSITION
 
 
 def test_board_initial_state() -> None:
     board = logic.Board()
     assert board.piece_array == [0] * 12
     assert board.white_to_play is True
-    assert board.castle_rights == [True, True, True, True]
+    assert board.castle_rights == const.CASTLE_ALL
     assert board.ep == const.NO_SQUARE
 
 
-def test_set_starting_position_struct_matches_globals() -> None:
+def test_set_starting_position_on_board_alias() -> None:
     board = logic.Board()
-    logic.set_starting_position_struct(board)
+    logic.set_starting_position(board)
     assert board.piece_array[const.WP] == const.WP_STARTING_POSITIONS
     assert board.piece_array[const.BP] == const.BP_STARTING_POSITIONS
     assert board.white_to_play is True
-    assert board.castle_rights == [True, True, True, True]
+    assert board.castle_rights == const.CASTLE_ALL
     assert board.ep == const.NO_SQUARE
 
 
+def test_positions_are_independent() -> None:
+    first = logic.Position()
+    logic.set_starting_position(first)
+    second = first.copy()
+    move = logic.Move(const.E2, const.E4, const.TAG_DOUBLE_PAWN_WHITE, const.WP)
+    logic.apply_move(second, move)
+    assert first.piece_array[const.WP] == const.WP_STARTING_POSITIONS
+    assert first.white_to_play is True
+    assert second.white_to_play is False
+    assert second.ep == const.E3
+
+
+PERFT_SUITE_FENS = [
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+    "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+    "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+    "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3",
+]
+
+
+def test_from_fen_starting_position_matches_set_starting_position() -> None:
+    expected = logic.Position()
+    logic.set_starting_position(expected)
+    position = logic.Position.from_fen(const.STARTING_FEN)
+    assert position.piece_array == expected.piece_array
+    assert position.white_to_play is True
+    assert position.castle_rights == const.CASTLE_ALL
+    assert position.ep == const.NO_SQUARE
+    assert position.hash_key == expected.hash_key
+    assert expected.to_fen() == const.STARTING_FEN
+
+
+@pytest.mark.parametrize("fen", PERFT_SUITE_FENS)
+def test_fen_round_trip(fen: str) -> None:
+    position = logic.Position.from_fen(fen)
+    assert position.to_fen() == fen
+    logic.verify_hash(position)
+
+
+def test_from_fen_reads_every_field() -> None:
+    position = logic.Position.from_fen("4k3/8/8/3pP3/8/8/8/4K2R w Kq d6 3 42")
+    assert position.piece_array[const.WP] == square_mask(const.E5)
+    assert position.piece_array[const.BP] == square_mask(const.D5)
+    assert position.piece_array[const.WR] == square_mask(const.H1)
+    assert position.castle_rights == const.CASTLE_WKS | const.CASTLE_BQS
+    assert position.ep == const.D6
+    assert (position.halfmove_clock, position.fullmove_number) == (3, 42)
+
+
+def test_from_fen_accepts_epd_style_four_fields() -> None:
+    position = logic.Position.from_fen("4k3/8/8/8/8/8/8/4K3 b - -")
+    assert position.white_to_play is False
+    assert position.castle_rights == 0
+    assert (position.halfmove_clock, position.fullmove_number) == (0, 1)
+
+
+@pytest.mark.parametrize(
+    "fen",
+    [
+        "",
+        "8/8/8/8/8/8/8 w - - 0 1",
+        "9/8/8/8/8/8/8/8 w - - 0 1",
+        "7x/8/8/8/8/8/8/8 w - - 0 1",
+        "8/8/8/8/8/8/8/8 x - - 0 1",
+        "8/8/8/8/8/8/8/8 w KX - 0 1",
+        "8/8/8/8/8/8/8/8 w - e4 0 1",
+        "8/8/8/8/8/8/8/8 w - - zero 1",
+    ],
+)
+def test_from_fen_rejects_malformed_input(fen: str) -> None:
+    with pytest.raises(ValueError):
+        logic.Position.from_fen(fen)
+
+
+def test_move_counters_follow_apply_and_undo() -> None:
+    position = logic.Position.from_fen(const.STARTING_FEN)
+    knight = logic.Move(const.G1, const.F3, const.TAG_NONE, const.WN)
+    reply = logic.Move(const.E7, const.E5, const.TAG_DOUBLE_PAWN_BLACK, const.BP)
+
+    knight_context = logic.apply_move(position, knight)
+    assert (position.halfmove_clock, position.fullmove_number) == (1, 1)
+    reply_context = logic.apply_move(position, reply)
+    assert (position.halfmove_clock, position.fullmove_number) == (0, 2)
+    assert position.to_fen() == "rnbqkbnr/pppp1ppp/8/4p3/8/5N2/PPPPPPPP/RNBQKB1R w KQkq e6 0 2"
+
+    logic.undo_move(position, reply, reply_context)
+    assert (position.halfmove_clock, position.fullmove_number) == (1, 1)
+    logic.undo_move(position, knight, knight_context)
+    assert position.to_fen() == const.STARTING_FEN
+
+
 def test_is_occupied_checks_bitboard_membership() -> None:
     assert logic.is_occupied(const.SQUARE_BBS[const.E4], const.E4) is True
     assert logic.is_occupied(const.SQUARE_BBS[const.E4], const.D4) is False
 
 
 def test_get_occupied_index_identifies_piece() -> None:
-    clear_board()
-    logic.piece_array[const.WQ] = const.SQUARE_BBS[const.E4]
-    assert logic.get_occupied_index(const.E4) == const.WQ
+    piece_array = empty_piece_array()
+    piece_array[const.WQ] = const.SQUARE_BBS[const.E4]
+    assert logic.get_occupied_index(logic.build_mailbox(piece_array), const.E4) == const.WQ
 
 
 def test_get_occupied_index_returns_empty_when_square_free() -> None:
-    clear_board()
-    assert logic.get_occupied_index(const.E4) == const.EMPTY
+    assert logic.get_occupied_index(logic.build_mailbox(empty_piece_array()), const.E4) == const.EMPTY
 
 
 def test_pin_mask_for_square_returns_ray_mask() -> None:
@@ -358,10 +459,11 @@ def test_pin_mask_for_square_returns_ray_mask() -> None:
 
 
 def test_locate_captured_piece_identifies_target() -> None:
-    clear_board()
-    logic.piece_array[const.BQ] = square_mask(const.D4)
-    assert logic.locate_captured_piece(const.D4, const.WP) == const.BQ
-    assert logic.locate_captured_piece(const.C4, const.WP) == -1
+    piece_array = empty_piece_array()
+    piece_array[const.BQ] = square_mask(const.D4)
+    mailbox = logic.build_mailbox(piece_array)
+    assert logic.locate_captured_piece(mailbox, const.D4) == const.BQ
+    assert logic.locate_captured_piece(mailbox, const.C4) == -1
 
 
 def test_scan_slider_checks_and_pins_detects_check_and_pin() -> None:
@@ -483,25 +585,77 @@ def test_get_bishop_moves_separate_respects_blockers() -> None:
     assert logic.get_bishop_moves_separate(const.D5, blockers) == expected
 
 
+def test_packed_move_round_trip() -> None:
+    packed = logic.encode_move(const.E7, const.E8, const.TAG_W_QUEEN_PROMOTION, const.WP)
+    assert packed == const.E7 | const.E8 << 6 | const.TAG_W_QUEEN_PROMOTION << 12 | const.WP << 17
+    assert logic.decode_move(packed) == (const.E7, const.E8, const.TAG_W_QUEEN_PROMOTION, const.WP)
+    move = logic.Move.from_packed(packed)
+    assert move == logic.Move(const.E7, const.E8, const.TAG_W_QUEEN_PROMOTION, const.WP)
+    assert move.packed == packed
+
+
+def test_generate_packed_moves_appends_to_buffer() -> None:
+    position = logic.Position.from_fen(const.STARTING_FEN)
+    buffer = [-1]
+    assert logic.generate_packed_moves(position, buffer) is buffer
+    assert buffer[0] == -1
+    assert [logic.Move.from_packed(move) for move in buffer[1:]] == logic.generate_moves_for_side(position)
+    assert len(buffer) == 21
+
+
+def test_apply_and_undo_accept_packed_moves() -> None:
+    position = logic.Position.from_fen("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+    for packed in logic.generate_packed_moves(position, []):
+        expected = position.copy()
+        logic.apply_move(expected, logic.Move.from_packed(packed))
+        before = position.to_fen()
+        context = logic.apply_move(position, packed)
+        assert position.to_fen() == expected.to_fen()
+        assert position.hash_key == expected.hash_key
+        logic.undo_move(position, packed, context)
+        assert position.to_fen() == before
+
+
+def test_en_passant_can_capture_the_checking_pawn() -> None:
+    position = logic.Position.from_fen("8/8/8/2k5/3Pp3/8/8/4K3 b - d3 0 1")
+    moves = logic.generate_moves_for_side(position)
+    assert logic.Move(const.E4, const.D3, const.TAG_BLACKEP, const.BP) in moves
+    assert logic.count_moves_for_side(position) == len(moves) == 9
+
+
+def test_en_passant_rejected_when_it_exposes_the_king_on_the_rank() -> None:
+    position = logic.Position.from_fen("8/8/8/KPp4r/8/8/8/4k3 w - c6 0 1")
+    moves = logic.generate_moves_for_side(position)
+    assert all(move.tag != const.TAG_WHITEEP for move in moves)
+    assert logic.count_moves_for_side(position) == len(moves)
+
+
+@pytest.mark.parametrize("fen", PERFT_SUITE_FENS)
+def test_count_moves_matches_generation_two_plies_deep(fen: str) -> None:
+    position = logic.Position.from_fen(fen)
+    for move in logic.generate_packed_moves(position, []):
+        context = logic.apply_move(position, move)
+        assert logic.count_moves_for_side(position) == len(logic.generate_packed_moves(position, []))
+        logic.undo_move(position, move, context)
+    assert logic.count_moves_for_side(position) == len(logic.generate_packed_moves(position, []))
+
+
+def test_count_pawn_moves_weights_promotions() -> None:
+    # b7 pushes or takes a8/c8; g7 is pinned along the diagonal and may only take h8.
+    position = logic.Position.from_fen("r1n4b/1P4P1/5K2/8/8/8/8/k7 w - - 0 1")
+    moves = logic.generate_moves_for_side(position)
+    assert logic.count_moves_for_side(position) == len(moves)
+    pawn_moves = [move for move in moves if move.piece == const.WP]
+    assert len(pawn_moves) == 4 * 4
+
+
 def test_generate_moves_allows_castling_when_path_clear() -> None:
     piece_array = [0] * 12
     piece_array[const.WK] = square_mask(const.E1)
     piece_array[const.WR] = square_mask(const.H1)
     piece_array[const.BK] = square_mask(const.E8)
 
-    white_occ = white_occupancy(piece_array)
-    black_occ = black_occupancy(piece_array)
-    combined = white_occ | black_occ
-
-    moves = logic.generate_moves_for_side(
-        piece_array,
-        True,
-        [True, True, True, True],
-        const.NO_SQUARE,
-        white_occ,
-        black_occ,
-        combined,
-    )
+    moves = logic.generate_moves_for_side(position_from(piece_array, True, const.CASTLE_ALL))
 
     assert logic.Move(const.E1, const.G1, const.TAG_WCASTLEKS, const.WK) in moves
 
@@ -512,19 +666,7 @@ def test_generate_moves_allows_black_castling() -> None:
     piece_array[const.BR] = square_mask(const.H8) | square_mask(const.A8)
     piece_array[const.WK] = square_mask(const.E1)
 
-    white_occ = white_occupancy(piece_array)
-    black_occ = black_occupancy(piece_array)
-    combined = white_occ | black_occ
-
-    moves = logic.generate_moves_for_side(
-        piece_array,
-        False,
-        [True, True, True, True],
-        const.NO_SQUARE,
-        white_occ,
-        black_occ,
-        combined,
-    )
+    moves = logic.generate_moves_for_side(position_from(piece_array, False, const.CASTLE_ALL))
 
     assert logic.Move(const.E8, const.G8, const.TAG_BCASTLEKS, const.BK) in moves
     assert logic.Move(const.E8, const.C8, const.TAG_BCASTLEQS, const.BK) in moves
@@ -536,19 +678,7 @@ def test_generate_moves_double_check_limits_to_king_moves() -> None:
     piece_array[const.BR] = square_mask(const.E8)
     piece_array[const.BB] = square_mask(const.B4)
 
-    white_occ = white_occupancy(piece_array)
-    black_occ = black_occupancy(piece_array)
-    combined = white_occ | black_occ
-
-    moves = logic.generate_moves_for_side(
-        piece_array,
-        True,
-        [False, False, False, False],
-        const.NO_SQUARE,
-        white_occ,
-        black_occ,
-        combined,
-    )
+    moves = logic.generate_moves_for_side(position_from(piece_array, True, 0))
 
     assert moves  # at least one escape move
     assert all(move.piece == const.WK for move in moves)
@@ -564,7 +694,7 @@ def test_generate_leaper_moves_produces_capture_and_quiet() -> None:
         pins=[],
         pin_lookup={},
     )
-    moves = logic.generate_leaper_moves(
+    packed = logic.generate_leaper_moves(
         piece_array[const.WN],
         const.KNIGHT_ATTACKS,
         const.WN,
@@ -573,7 +703,9 @@ def test_generate_leaper_moves_produces_capture_and_quiet() -> None:
         check_mask=logic.MAX_ULONG,
         pins=king_state.pin_lookup,
         king_state=king_state,
+        moves=[],
     )
+    moves = [logic.Move.from_packed(move) for move in packed]
     assert logic.Move(const.C3, const.D5, const.TAG_CAPTURE, const.WN) in moves
     assert any(move.tag == const.TAG_NONE for move in moves)
 
@@ -588,7 +720,7 @@ def test_generate_leaper_moves_respects_pin() -> None:
         pins=[logic.Pin(const.C3, const.C8)],
         pin_lookup={const.C3: const.INBETWEEN_BITBOARDS[const.E2][const.C8]},
     )
-    moves = logic.generate_leaper_moves(
+    packed = logic.generate_leaper_moves(
         piece_array[const.WN],
         const.KNIGHT_ATTACKS,
         const.WN,
@@ -597,7 +729,9 @@ def test_generate_leaper_moves_respects_pin() -> None:
         check_mask=logic.MAX_ULONG,
         pins=king_state.pin_lookup,
         king_state=king_state,
+        moves=[],
     )
+    moves = [logic.Move.from_packed(move) for move in packed]
     assert moves == []
 
 
@@ -613,7 +747,7 @@ def test_generate_slider_moves_produces_capture_and_quiet() -> None:
     )
     enemy_occ = square_mask(const.H6)
     empty_mask = ~enemy_occ
-    moves = logic.generate_slider_moves(
+    packed = logic.generate_slider_moves(
         piece_array[const.WB],
         logic.get_bishop_moves_separate,
         const.WB,
@@ -623,7 +757,9 @@ def test_generate_slider_moves_produces_capture_and_quiet() -> None:
         logic.MAX_ULONG,
         king_state.pin_lookup,
         king_state,
+        [],
     )
+    moves = [logic.Move.from_packed(move) for move in packed]
     assert logic.Move(const.C1, const.H6, const.TAG_CAPTURE, const.WB) in moves
     assert any(move.tag == const.TAG_NONE for move in moves)
 
@@ -635,7 +771,7 @@ def test_generate_pawn_moves_white_promotion_and_capture() -> None:
     combined = enemy_occ | piece_array[const.WP]
     king_state = logic.KingState(const.E1, 0, logic.MAX_ULONG, [], {})
     king_state.pin_lookup = {}
-    moves = logic.generate_pawn_moves(
+    packed = logic.generate_pawn_moves(
         piece_array,
         True,
         enemy_occ,
@@ -644,7 +780,9 @@ def test_generate_pawn_moves_white_promotion_and_capture() -> None:
         [],
         king_state,
         const.NO_SQUARE,
+        [],
     )
+    moves = [logic.Move.from_packed(move) for move in packed]
     tags = {move.tag for move in moves}
     assert const.TAG_W_QUEEN_PROMOTION in tags
     assert const.TAG_W_CAPTURE_QUEEN_PROMOTION in tags
@@ -656,7 +794,7 @@ def test_generate_pawn_moves_black_promotion_capture() -> None:
     enemy_occ = square_mask(const.B1)
     combined = enemy_occ | piece_array[const.BP]
     king_state = logic.KingState(const.E8, 0, logic.MAX_ULONG, [], {})
-    moves = logic.generate_pawn_moves(
+    packed = logic.generate_pawn_moves(
         piece_array,
         False,
         enemy_occ,
@@ -665,134 +803,449 @@ def test_generate_pawn_moves_black_promotion_capture() -> None:
         [],
         king_state,
         const.NO_SQUARE,
+        [],
     )
+    moves = [logic.Move.from_packed(move) for move in packed]
     tags = {move.tag for move in moves}
     assert const.TAG_B_QUEEN_PROMOTION in tags
     assert const.TAG_B_CAPTURE_QUEEN_PROMOTION in tags
 
 
+def pawn_moves_for(fen: str) -> list[logic.Move]:
+    position = logic.Position.from_fen(fen)
+    return [move for move in logic.generate_moves_for_side(position) if move.piece in (const.WP, const.BP)]
+
+
+def test_generate_pawn_moves_pinned_pawns_stay_on_the_pin_ray() -> None:
+    # The e-pawn is pinned on the file and may push; the c-pawn is pinned on a diagonal and may only take the pinner.
+    moves = pawn_moves_for("4r2k/8/8/8/1b6/2P5/4P3/4K3 w - - 0 1")
+    assert {(move.starting, move.target) for move in moves} == {
+        (const.E2, const.E3),
+        (const.E2, const.E4),
+        (const.C3, const.B4),
+    }
+
+
+def test_generate_pawn_moves_double_push_needs_both_squares_empty() -> None:
+    moves = pawn_moves_for("4k3/8/8/8/3n4/8/3P4/4K3 w - - 0 1")
+    assert {(move.starting, move.target, move.tag) for move in moves} == {(const.D2, const.D3, const.TAG_NONE)}
+
+
+def test_generate_pawn_moves_only_block_or_capture_in_check() -> None:
+    moves = pawn_moves_for("4k3/8/8/8/1b6/P7/2P5/4K3 w - - 0 1")
+    assert {(move.starting, move.target) for move in moves} == {(const.C2, const.C3), (const.A3, const.B4)}
+
+
+@pytest.mark.parametrize(
+    "fen",
+    [
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+        "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3",
+    ],
+)
+def test_generate_pawn_moves_agrees_with_count(fen: str) -> None:
+    position = logic.Position.from_fen(fen)
+    for _ in range(2):
+        friendly, enemy = (
+            (position.white_occupancy, position.black_occupancy)
+            if position.white_to_play
+            else (position.black_occupancy, position.white_occupancy)
+        )
+        king_state = logic.analyze_king_state(position.piece_array, position.white_to_play, friendly, enemy)
+        check_mask = king_state.check_mask if king_state.check_count == 1 else logic.MAX_ULONG
+        arguments = (
+            position.piece_array,
+            position.white_to_play,
+            enemy,
+            position.occupancy,
+            check_mask,
+            king_state.pin_lookup,
+            king_state,
+            position.ep,
+        )
+        moves = logic.generate_pawn_moves(*arguments, [])
+        assert len(moves) == len(set(moves)) == logic.count_pawn_moves(*arguments)
+        position.white_to_play = not position.white_to_play
+        position.ep = const.NO_SQUARE
+        position.refresh()
+
+
+def evasions_for(fen: str) -> set[tuple[int, int, int]]:
+    position = logic.Position.from_fen(fen)
+    return {
+        (move.starting, move.target, move.tag)
+        for move in logic.generate_moves_for_side(position)
+        if move.piece not in (const.WK, const.BK)
+    }
+
+
+@pytest.mark.parametrize(
+    ("fen", "expected"),
+    [
+        # block with a double push
+        ("4k3/8/8/8/r6K/8/6P1/8 w - - 0 1", {(const.G2, const.G4, const.TAG_DOUBLE_PAWN_WHITE)}),
+        # en passant removes the checking pawn
+        ("8/8/8/3k4/4Pp2/8/8/4K3 b - e3 0 1", {(const.F4, const.E3, const.TAG_BLACKEP)}),
+        # block by promoting
+        (
+            "K6r/3P4/8/8/8/8/8/7k w - - 0 1",
+            {
+                (const.D7, const.D8, tag)
+                for tag in (
+                    const.TAG_W_QUEEN_PROMOTION,
+                    const.TAG_W_ROOK_PROMOTION,
+                    const.TAG_W_BISHOP_PROMOTION,
+                    const.TAG_W_KNIGHT_PROMOTION,
+                )
+            },
+        ),
+        # a pinned knight may not block, a free one may
+        ("4r1k1/8/8/8/8/4N3/3B4/4K2q w - - 0 1", set()),
+        ("6k1/8/8/8/8/8/3N4/4K2q w - - 0 1", {(const.D2, const.F1, const.TAG_NONE)}),
+        # a bishop may take the checker or block
+        (
+            "6k1/8/8/8/8/8/6B1/4K2q w - - 0 1",
+            {(const.G2, const.H1, const.TAG_CAPTURE), (const.G2, const.F1, const.TAG_NONE)},
+        ),
+    ],
+)
+def test_check_evasions_capture_or_block(fen: str, expected: set[tuple[int, int, int]]) -> None:
+    assert evasions_for(fen) == expected
+
+
 def test_apply_move_double_pawn_sets_ep_and_undo_restores() -> None:
-    load_position({const.WP: [const.E2]})
+    position = load_position({const.WP: [const.E2]})
     move = logic.Move(const.E2, const.E4, const.TAG_DOUBLE_PAWN_WHITE, const.WP)
 
-    context = logic.apply_move(move)
-    assert logic.piece_array[const.WP] == square_mask(const.E4)
-    assert logic.ep == const.E3
-    assert logic.white_to_play is False
+    context = logic.apply_move(position, move)
+    assert position.piece_array[const.WP] == square_mask(const.E4)
+    assert position.ep == const.E3
+    assert position.white_to_play is False
 
-    logic.undo_move(move, context)
-    assert logic.piece_array[const.WP] == square_mask(const.E2)
-    assert logic.ep == const.NO_SQUARE
-    assert logic.white_to_play is True
+    logic.undo_move(position, move, context)
+    assert position.piece_array[const.WP] == square_mask(const.E2)
+    assert position.ep == const.NO_SQUARE
+    assert position.white_to_play is True
 
 
 def test_apply_move_capture_and_undo_restores_piece() -> None:
-    load_position({const.WP: [const.E4], const.BP: [const.D5]})
+    position = load_position({const.WP: [const.E4], const.BP: [const.D5]})
     move = logic.Move(const.E4, const.D5, const.TAG_CAPTURE, const.WP)
 
-    context = logic.apply_move(move)
-    assert logic.piece_array[const.WP] == square_mask(const.D5)
-    assert logic.piece_array[const.BP] == 0
+    context = logic.apply_move(position, move)
+    assert position.piece_array[const.WP] == square_mask(const.D5)
+    assert position.piece_array[const.BP] == 0
 
-    logic.undo_move(move, context)
-    assert logic.piece_array[const.WP] == square_mask(const.E4)
-    assert logic.piece_array[const.BP] == square_mask(const.D5)
+    logic.undo_move(position, move, context)
+    assert position.piece_array[const.WP] == square_mask(const.E4)
+    assert position.piece_array[const.BP] == square_mask(const.D5)
 
 
 def test_apply_move_white_en_passant_capture_and_undo() -> None:
-    load_position({const.WP: [const.E5], const.BP: [const.D5]})
+    position = load_position({const.WP: [const.E5], const.BP: [const.D5]})
     move = logic.Move(const.E5, const.D6, const.TAG_WHITEEP, const.WP)
-    context = logic.apply_move(move)
-    assert logic.piece_array[const.WP] == square_mask(const.D6)
-    assert logic.piece_array[const.BP] == 0
-    logic.undo_move(move, context)
-    assert logic.piece_array[const.WP] == square_mask(const.E5)
-    assert logic.piece_array[const.BP] == square_mask(const.D5)
+    context = logic.apply_move(position, move)
+    assert position.piece_array[const.WP] == square_mask(const.D6)
+    assert position.piece_array[const.BP] == 0
+    logic.undo_move(position, move, context)
+    assert position.piece_array[const.WP] == square_mask(const.E5)
+    assert position.piece_array[const.BP] == square_mask(const.D5)
 
 
 def test_apply_move_black_en_passant_capture_and_undo() -> None:
-    load_position({const.BP: [const.D4], const.WP: [const.E4]}, white_to_play=False)
+    position = load_position({const.BP: [const.D4], const.WP: [const.E4]}, white_to_play=False)
     move = logic.Move(const.D4, const.E3, const.TAG_BLACKEP, const.BP)
-    context = logic.apply_move(move)
-    assert logic.piece_array[const.BP] == square_mask(const.E3)
-    assert logic.piece_array[const.WP] == 0
-    logic.undo_move(move, context)
-    assert logic.piece_array[const.BP] == square_mask(const.D4)
-    assert logic.piece_array[const.WP] == square_mask(const.E4)
+    context = logic.apply_move(position, move)
+    assert position.piece_array[const.BP] == square_mask(const.E3)
+    assert position.piece_array[const.WP] == 0
+    logic.undo_move(position, move, context)
+    assert position.piece_array[const.BP] == square_mask(const.D4)
+    assert position.piece_array[const.WP] == square_mask(const.E4)
 
 
 def test_apply_move_castle_and_undo_restores_state() -> None:
-    load_position(
+    position = load_position(
         {
             const.WK: [const.E1],
             const.WR: [const.H1],
             const.BK: [const.E8],
         },
-        castle_rights=[True, True, True, True],
+        castle_rights=const.CASTLE_ALL,
     )
 
     move = logic.Move(const.E1, const.G1, const.TAG_WCASTLEKS, const.WK)
 
-    context = logic.apply_move(move)
-    assert logic.piece_array[const.WK] == square_mask(const.G1)
-    assert logic.piece_array[const.WR] == square_mask(const.F1)
-    assert logic.castle_rights[const.WKS_CASTLE_RIGHTS] is False
-    assert logic.castle_rights[const.WQS_CASTLE_RIGHTS] is False
+    context = logic.apply_move(position, move)
+    assert position.piece_array[const.WK] == square_mask(const.G1)
+    assert position.piece_array[const.WR] == square_mask(const.F1)
+    assert position.castle_rights == const.CASTLE_BKS | const.CASTLE_BQS
 
-    logic.undo_move(move, context)
-    assert logic.piece_array[const.WK] == square_mask(const.E1)
-    assert logic.piece_array[const.WR] == square_mask(const.H1)
-    assert logic.castle_rights == [True, True, True, True]
+    logic.undo_move(position, move, context)
+    assert position.piece_array[const.WK] == square_mask(const.E1)
+    assert position.piece_array[const.WR] == square_mask(const.H1)
+    assert position.castle_rights == const.CASTLE_ALL
 
 
 def test_apply_move_promotion_and_undo_restores() -> None:
-    load_position({const.WP: [const.A7]}, castle_rights=[False, False, False, False])
+    position = load_position({const.WP: [const.A7]}, castle_rights=0)
     move = logic.Move(const.A7, const.A8, const.TAG_W_QUEEN_PROMOTION, const.WP)
-    context = logic.apply_move(move)
-    assert logic.piece_array[const.WQ] == square_mask(const.A8)
-    logic.undo_move(move, context)
-    assert logic.piece_array[const.WP] == square_mask(const.A7)
-    assert logic.piece_array[const.WQ] == 0
+    context = logic.apply_move(position, move)
+    assert position.piece_array[const.WQ] == square_mask(const.A8)
+    logic.undo_move(position, move, context)
+    assert position.piece_array[const.WP] == square_mask(const.A7)
+    assert position.piece_array[const.WQ] == 0
 
 
 def test_apply_move_capture_promotion_and_undo_restores() -> None:
-    load_position({const.WP: [const.A7], const.BN: [const.B8]}, castle_rights=[False, False, False, False])
+    position = load_position({const.WP: [const.A7], const.BN: [const.B8]}, castle_rights=0)
     move = logic.Move(const.A7, const.B8, const.TAG_W_CAPTURE_ROOK_PROMOTION, const.WP)
-    context = logic.apply_move(move)
-    assert logic.piece_array[const.WR] == square_mask(const.B8)
-    assert logic.piece_array[const.BN] == 0
-    logic.undo_move(move, context)
-    assert logic.piece_array[const.WP] == square_mask(const.A7)
-    assert logic.piece_array[const.BN] == square_mask(const.B8)
+    context = logic.apply_move(position, move)
+    assert position.piece_array[const.WR] == square_mask(const.B8)
+    assert position.piece_array[const.BN] == 0
+    logic.undo_move(position, move, context)
+    assert position.piece_array[const.WP] == square_mask(const.A7)
+    assert position.piece_array[const.BN] == square_mask(const.B8)
 
 
 def test_apply_move_black_promotion_variants() -> None:
-    load_position({const.BP: [const.A2]}, white_to_play=False, castle_rights=[False, False, False, False])
+    position = load_position({const.BP: [const.A2]}, white_to_play=False, castle_rights=0)
     move = logic.Move(const.A2, const.A1, const.TAG_B_KNIGHT_PROMOTION, const.BP)
-    context = logic.apply_move(move)
-    assert logic.piece_array[const.BN] == square_mask(const.A1)
-    logic.undo_move(move, context)
-    assert logic.piece_array[const.BP] == square_mask(const.A2)
-    assert logic.piece_array[const.BN] == 0
+    context = logic.apply_move(position, move)
+    assert position.piece_array[const.BN] == square_mask(const.A1)
+    logic.undo_move(position, move, context)
+    assert position.piece_array[const.BP] == square_mask(const.A2)
+    assert position.piece_array[const.BN] == 0
 
 
 def test_apply_move_unknown_tag_raises() -> None:
-    load_position({const.WP: [const.A2]})
+    position = load_position({const.WP: [const.A2]})
     with pytest.raises(ValueError):
-        logic.apply_move(logic.Move(const.A2, const.A3, 99, const.WP))
+        logic.apply_move(position, logic.Move(const.A2, const.A3, 99, const.WP))
+
+
+def test_move_tag_effects_cover_every_tag() -> None:
+    assert all(logic.MOVE_TAG_EFFECTS[tag] is not None for tag in range(const.TAG_CHECK_CAPTURE + 1))
+    assert logic.MOVE_TAG_EFFECTS[const.TAG_WCASTLEQS].rook_from == const.A1
+    assert logic.MOVE_TAG_EFFECTS[const.TAG_B_CAPTURE_ROOK_PROMOTION].promoted_piece == const.BR
+    assert logic.MOVE_TAG_EFFECTS[const.TAG_DOUBLE_PAWN_BLACK].ep_offset == -8
+
+
+def test_castle_mask_clears_rights_on_king_and_rook_squares() -> None:
+    assert logic.CASTLE_MASK[const.E1] == const.CASTLE_BKS | const.CASTLE_BQS
+    assert logic.CASTLE_MASK[const.A8] == const.CASTLE_ALL & ~const.CASTLE_BQS
+    untouched = set(range(64)) - {const.A1, const.E1, const.H1, const.A8, const.E8, const.H8}
+    assert all(logic.CASTLE_MASK[square] == const.CASTLE_ALL for square in untouched)
+
+
+def test_apply_move_capturing_a_rook_drops_its_castle_right() -> None:
+    position = logic.Position.from_fen("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+    move = logic.Move(const.H1, const.H8, const.TAG_CAPTURE, const.WR)
+    context = logic.apply_move(position, move)
+    assert position.castle_rights == const.CASTLE_WQS | const.CASTLE_BQS
+    assert position.to_fen() == "r3k2R/8/8/8/8/8/8/R3K3 b Qq - 0 1"
+    logic.verify_hash(position)
+    logic.undo_move(position, move, context)
+    assert position.to_fen() == "r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1"
+
+
+def test_apply_and_undo_keep_hash_in_sync_for_every_tag() -> None:
+    position = load_position(
+        {
+            const.WK: [const.E1],
+            const.WR: [const.A1, const.H1],
+            const.WP: [const.B7, const.E5],
+            const.BK: [const.E8],
+            const.BR: [const.A8, const.H8],
+            const.BN: [const.C8],
+            const.BP: [const.D5],
+        },
+        castle_rights=const.CASTLE_ALL,
+        en_passant=const.D6,
+    )
+    start_hash = position.hash_key
+    moves = logic.generate_moves_for_side(position)
+    tags = {move.tag for move in moves}
+    assert {const.TAG_WHITEEP, const.TAG_WCASTLEKS, const.TAG_W_CAPTURE_QUEEN_PROMOTION} <= tags
+
+    for move in moves:
+        context = logic.apply_move(position, move)
+        logic.verify_hash(position)
+        assert position.hash_key != start_hash
+        logic.undo_move(position, move, context)
+        assert position.hash_key == start_hash
+    logic.verify_hash(position)
+
+
+def test_hash_matches_across_transpositions() -> None:
+    first = logic.Position()
+    logic.set_starting_position(first)
+    second = first.copy()
+    start_hash = first.hash_key
+
+    for move in (
+        logic.Move(const.G1, const.F3, const.TAG_NONE, const.WN),
+        logic.Move(const.G8, const.F6, const.TAG_NONE, const.BN),
+        logic.Move(const.B1, const.C3, const.TAG_NONE, const.WN),
+    ):
+        logic.apply_move(first, move)
+    for move in (
+        logic.Move(const.B1, const.C3, const.TAG_NONE, const.WN),
+        logic.Move(const.G8, const.F6, const.TAG_NONE, const.BN),
+        logic.Move(const.G1, const.F3, const.TAG_NONE, const.WN),
+    ):
+        logic.apply_move(second, move)
+
+    assert first.hash_key == second.hash_key != start_hash
+    logic.verify_hash(first)
+
+
+def test_hash_distinguishes_side_castle_rights_and_ep() -> None:
+    position = load_position({const.WK: [const.E1], const.BK: [const.E8]})
+    base = position.hash_key
+    variants = [
+        load_position({const.WK: [const.E1], const.BK: [const.E8]}, white_to_play=False),
+        load_position({const.WK: [const.E1], const.BK: [const.E8]}, castle_rights=const.CASTLE_WKS),
+        load_position({const.WK: [const.E1], const.BK: [const.E8]}, en_passant=const.E3),
+    ]
+    keys = {base, *(variant.hash_key for variant in variants)}
+    assert len(keys) == 4
+
+
+def test_refresh_builds_occupancies_and_mailbox() -> None:
+    position = logic.Position.from_fen(const.STARTING_FEN)
+    assert position.white_occupancy == const.RANK_1_BITBOARD | const.RANK_2_BITBOARD
+    assert position.black_occupancy == const.RANK_7_BITBOARD | const.RANK_8_BITBOARD
+    assert position.occupancy == position.white_occupancy | position.black_occupancy
+    assert position.mailbox[const.E1] == const.WK
+    assert position.mailbox[const.D8] == const.BQ
+    assert position.mailbox[const.E4] == const.EMPTY
+    assert position.copy().mailbox is not position.mailbox
+
+
+def test_apply_and_undo_keep_occupancies_and_mailbox_for_every_tag() -> None:
+    position = load_position(
+        {
+            const.WK: [const.E1],
+            const.WR: [const.A1, const.H1],
+            const.WP: [const.B7, const.E5],
+            const.BK: [const.E8],
+            const.BR: [const.A8, const.H8],
+            const.BN: [const.C8],
+            const.BP: [const.D5],
+        },
+        castle_rights=const.CASTLE_ALL,
+        en_passant=const.D6,
+    )
+    before = cached_state(position)
+    for move in logic.generate_moves_for_side(position):
+        context = logic.apply_move(position, move)
+        assert cached_state(position) == fresh_state(position)
+        logic.undo_move(position, move, context)
+        assert cached_state(position) == before
+
+
+def test_verify_hash_detects_stale_key() -> None:
+    position = logic.Position()
+    logic.set_starting_position(position)
+    position.piece_array[const.WP] &= ~square_mask(const.E2)
+    with pytest.raises(ValueError, match="Hash mismatch"):
+        logic.verify_hash(position)
+    position.refresh_hash()
+    logic.verify_hash(position)
+
+
+def test_attacked_squares_from_start_position() -> None:
+    position = logic.Position()
+    logic.set_starting_position(position)
+    assert logic.attacked_squares(position, True) == const.RANK_3_BITBOARD | (
+        const.RANK_2_BITBOARD | const.RANK_1_BITBOARD
+    ) & ~(square_mask(const.A1) | square_mask(const.H1))
+    assert logic.attacked_squares(position, False) == const.RANK_6_BITBOARD | (
+        const.RANK_7_BITBOARD | const.RANK_8_BITBOARD
+    ) & ~(square_mask(const.A8) | square_mask(const.H8))
+
+
+def test_castling_blocked_by_attacked_transit_square() -> None:
+    position = logic.Position.from_fen("4k3/8/8/8/8/8/6r1/R3K2R w KQ - 0 1")
+    targets = {(move.starting, move.target) for move in logic.generate_moves_for_side(position)}
+    assert (const.E1, const.C1) in targets
+    assert (const.E1, const.G1) not in targets
+
+
+def test_perft_table_capacity_fits_budget() -> None:
+    table = logic.PerftTable(1)
+    assert len(table) & (len(table) - 1) == 0
+    assert len(table) * logic.PerftTable.ENTRY_BYTES <= 1024 * 1024 < 2 * len(table) * logic.PerftTable.ENTRY_BYTES
+
+
+def test_perft_table_rejects_bad_configuration() -> None:
+    with pytest.raises(ValueError, match="replacement policy"):
+        logic.PerftTable(1, "oldest")
+    with pytest.raises(ValueError, match="too small"):
+        logic.PerftTable(0)
+
+
+def test_perft_table_probe_and_store() -> None:
+    table = logic.PerftTable(0.001)
+    assert table.probe(12345, 3) == -1
+    table.store(12345, 3, 999)
+    assert table.probe(12345, 3) == 999
+    assert table.probe(12345, 2) == -1
+    assert (table.hits, table.misses) == (1, 2)
+
+
+@pytest.mark.parametrize(("replacement", "kept"), [("depth-preferred", 500), ("always", 7)])
+def test_perft_table_replacement_policy(replacement: str, kept: int) -> None:
+    table = logic.PerftTable(0.001, replacement)
+    colliding = 5 + len(table)
+    table.store(5, 4, 500)
+    table.store(colliding, 2, 7)
+    assert max(table.probe(5, 4), table.probe(colliding, 2)) == kept
+
+
+@pytest.mark.parametrize("replacement", logic.PERFT_REPLACEMENT_POLICIES)
+def test_perft_hashed_matches_perft_inline(replacement: str, capsys: pytest.CaptureFixture[str]) -> None:
+    # Knight moves transpose readily; a small table also forces slot collisions.
+    position = load_position(
+        {
+            const.WK: [const.E1],
+            const.WN: [const.B1, const.G1],
+            const.BK: [const.E8],
+            const.BN: [const.B8],
+        }
+    )
+    expected = logic.perft_inline(position.copy(), 4, 1)
+    table = logic.PerftTable(0.01, replacement)
+    assert logic.perft_hashed(position, 4, table) == expected
+    assert table.hits > 0
+    capsys.readouterr()
+
+
+def test_run_perft_hashed_reports_hits(capsys: pytest.CaptureFixture[str]) -> None:
+    position = logic.Position()
+    logic.set_starting_position(position)
+    assert logic.run_perft_hashed(position, 3, megabytes=1) == 8902
+    out = capsys.readouterr().out
+    assert "Nodes: 8902" in out
+    assert "Hash hits: " in out
 
 
 def test_print_board_outputs_expected_format(capsys: pytest.CaptureFixture[str]) -> None:
-    logic.set_starting_position()
-    logic.print_board()
+    position = logic.Position()
+    logic.set_starting_position(position)
+    logic.print_board(position)
     out = capsys.readouterr().out
     assert "Board:" in out
     assert "White to play" in out
 
 
 def test_perft_inline_depth_one_counts_moves() -> None:
-    logic.set_starting_position()
-    assert logic.perft_inline(1, 0) > 0
+    position = logic.Position()
+    logic.set_starting_position(position)
+    assert logic.perft_inline(position, 1, 0) > 0
 
 
 # ---------------------------------------------------------------------------
@@ -825,8 +1278,7 @@ def test_get_bishop_moves_matches_naive(square: int, occupancy: int) -> None:
 @given(piece_array=board_position_strategy(), square=square_strategy)
 def test_white_attack_detection_matches_naive(piece_array: List[int], square: int) -> None:
     occupancy = combined_occupancy(piece_array)
-    logic.piece_array[:] = piece_array
-    assert logic.is_square_attacked_by_white(square, occupancy) == naive_square_attacked_by_white(
+    assert logic.is_square_attacked_by_white(square, occupancy, piece_array) == naive_square_attacked_by_white(
         piece_array, occupancy, square
     )
 
@@ -835,7 +1287,48 @@ def test_white_attack_detection_matches_naive(piece_array: List[int], square: in
 @given(piece_array=board_position_strategy(), square=square_strategy)
 def test_black_attack_detection_matches_naive(piece_array: List[int], square: int) -> None:
     occupancy = combined_occupancy(piece_array)
-    logic.piece_array[:] = piece_array
-    assert logic.is_square_attacked_by_black(square, occupancy) == naive_square_attacked_by_black(
+    assert logic.is_square_attacked_by_black(square, occupancy, piece_array) == naive_square_attacked_by_black(
         piece_array, occupancy, square
     )
+
+
+@settings(deadline=None, suppress_health_check=[HealthCheck.function_scoped_fixture])
+@given(piece_array=board_position_strategy(), by_white=st.booleans())
+def test_attack_map_matches_square_by_square(piece_array: List[int], by_white: bool) -> None:
+    # The map assumes a single king per side, as in any real position.
+    assume(piece_array[const.WK if by_white else const.BK].bit_count() <= 1)
+    occupancy = combined_occupancy(piece_array)
+    is_attacked = naive_square_attacked_by_white if by_white else naive_square_attacked_by_black
+    expected = sum(square_mask(square) for square in range(64) if is_attacked(piece_array, occupancy, square))
+    assert logic.attack_map(piece_array, by_white, occupancy) == expected
+
+
+@settings(deadline=None, suppress_health_check=[HealthCheck.function_scoped_fixture])
+@given(piece_array=board_position_strategy(), targets=bitboard_strategy)
+def test_attack_map_is_exact_on_targets(piece_array: List[int], targets: int) -> None:
+    assume(piece_array[const.BK].bit_count() <= 1)
+    occupancy = combined_occupancy(piece_array)
+    full = logic.attack_map(piece_array, False, occupancy)
+    assert logic.attack_map(piece_array, False, occupancy, targets) & targets == full & targets
+
+
+@settings(max_examples=25, deadline=None, suppress_health_check=[HealthCheck.function_scoped_fixture])
+@given(choices=st.lists(st.integers(min_value=0, max_value=255), min_size=1, max_size=12))
+def test_hash_stays_in_sync_over_random_games(choices: List[int]) -> None:
+    position = logic.Position()
+    logic.set_starting_position(position)
+    history = []
+    for choice in choices:
+        moves = logic.generate_moves_for_side(position)
+        if not moves:
+            break
+        move = moves[choice % len(moves)]
+        history.append((move, position.hash_key, cached_state(position), logic.apply_move(position, move)))
+        logic.verify_hash(position)
+        assert cached_state(position) == fresh_state(position)
+
+    for move, key, state, context in reversed(history):
+        logic.undo_move(position, move, context)
+        assert position.hash_key == key
+        assert cached_state(position) == state
+    logic.verify_hash(position)
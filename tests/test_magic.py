@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from rusttt import constants as const
+from rusttt import logic, magic
+
+
+bitboard_strategy = st.integers(min_value=0, max_value=(1 << 64) - 1)
+square_strategy = st.integers(min_value=0, max_value=63)
+
+
+def test_relevant_masks_exclude_edges() -> None:
+    # a rook in the corner sees 6 + 6 relevant squares, one in the middle 10
+    assert magic.ROOK_MASKS[const.A8].bit_count() == 12
+    assert magic.ROOK_MASKS[const.E4].bit_count() == 10
+    assert magic.BISHOP_MASKS[const.A8].bit_count() == 6
+    assert magic.BISHOP_MASKS[const.D4].bit_count() == 9
+    for square in range(64):
+        assert not magic.ROOK_MASKS[square] & const.SQUARE_BBS[square]
+        assert not magic.BISHOP_MASKS[square] & const.SQUARE_BBS[square]
+
+
+def test_table_layout_is_contiguous() -> None:
+    for offsets, shifts, table in (
+        (magic.ROOK_OFFSETS, magic.ROOK_SHIFTS, magic.ROOK_TABLE),
+        (magic.BISHOP_OFFSETS, magic.BISHOP_SHIFTS, magic.BISHOP_TABLE),
+    ):
+        for square in range(63):
+            assert offsets[square + 1] - offsets[square] == 1 << (64 - shifts[square])
+        assert len(table) == offsets[63] + (1 << (64 - shifts[63]))
+
+
+def test_every_blocker_subset_maps_to_its_attack_set() -> None:
+    for square in (const.A1, const.D4, const.H8, const.B7):
+        mask = magic.ROOK_MASKS[square]
+        subset = 0
+        while True:
+            assert magic.get_rook_attacks(square, subset) == logic.get_rook_moves_separate(square, subset)
+            subset = (subset - mask) & mask
+            if subset == 0:
+                break
+
+
+def test_queen_attacks_combine_rook_and_bishop() -> None:
+    occupancy = const.SQUARE_BBS[const.D6] | const.SQUARE_BBS[const.F2]
+    assert magic.get_queen_attacks(const.D4, occupancy) == (
+        logic.get_rook_moves_separate(const.D4, occupancy) | logic.get_bishop_moves_separate(const.D4, occupancy)
+    )
+
+
+@settings(deadline=None)
+@given(square=square_strategy, occupancy=bitboard_strategy)
+def test_rook_attacks_match_reference(square: int, occupancy: int) -> None:
+    assert magic.get_rook_attacks(square, occupancy) == logic.get_rook_moves_separate(square, occupancy)
+
+
+@settings(deadline=None)
+@given(square=square_strategy, occupancy=bitboard_strategy)
+def test_bishop_attacks_match_reference(square: int, occupancy: int) -> None:
+    assert magic.get_bishop_attacks(square, occupancy) == logic.get_bishop_moves_separate(square, occupancy)
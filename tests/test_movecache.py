@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from typing import List
+
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from rusttt import constants as const
+from rusttt import logic, movecache
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+
+
+def moves_for(key: int) -> tuple[int, ...]:
+    return (key, key + 1)
+
+
+# ---------------------------------------------------------------------------
+# Deterministic unit tests
+# ---------------------------------------------------------------------------
+
+
+def test_move_cache_rejects_bad_configuration() -> None:
+    with pytest.raises(ValueError, match="eviction policy"):
+        movecache.MoveCache(16, "fifo")
+    with pytest.raises(ValueError, match="capacity"):
+        movecache.MoveCache(0)
+
+
+@pytest.mark.parametrize("policy", movecache.MOVE_CACHE_POLICIES)
+def test_moves_generate_once_per_position(policy: str) -> None:
+    cache = movecache.MoveCache(8, policy)
+    position = logic.Position.from_fen(KIWIPETE)
+    first = cache.moves(position)
+    assert list(first) == logic.generate_packed_moves(position, [])
+    assert cache.moves(position) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.hit_rate == 0.5
+
+
+@pytest.mark.parametrize("policy", movecache.MOVE_CACHE_POLICIES)
+def test_moves_cache_empty_move_lists(policy: str) -> None:
+    cache = movecache.MoveCache(8, policy)
+    mated = logic.Position.from_fen("7k/6Q1/6K1/8/8/8/8/8 b - - 0 1")
+    assert cache.moves(mated) == ()
+    assert cache.moves(mated) == ()
+    assert cache.hits == 1
+
+
+def test_lru_evicts_least_recently_used() -> None:
+    cache = movecache.MoveCache(2, "lru")
+    cache.store(1, moves_for(1))
+    cache.store(2, moves_for(2))
+    assert cache.probe(1) == moves_for(1)
+    cache.store(3, moves_for(3))
+    assert 1 in cache
+    assert 2 not in cache
+    assert len(cache) == 2
+
+
+def test_clock_gives_referenced_entries_a_second_chance() -> None:
+    cache = movecache.MoveCache(3, "clock")
+    for key in (1, 2, 3):
+        cache.store(key, moves_for(key))
+    assert cache.probe(1) == moves_for(1)
+    cache.store(4, moves_for(4))
+    assert 1 in cache
+    assert 2 not in cache
+    cache.store(5, moves_for(5))
+    assert 3 not in cache
+    assert len(cache) == 3
+
+
+@pytest.mark.parametrize("policy", movecache.MOVE_CACHE_POLICIES)
+def test_store_replaces_existing_entry(policy: str) -> None:
+    cache = movecache.MoveCache(2, policy)
+    cache.store(1, moves_for(1))
+    cache.store(1, moves_for(9))
+    assert len(cache) == 1
+    assert cache.probe(1) == moves_for(9)
+
+
+@pytest.mark.parametrize("policy", movecache.MOVE_CACHE_POLICIES)
+def test_clear_resets_entries_and_statistics(policy: str) -> None:
+    cache = movecache.MoveCache(2, policy)
+    cache.store(1, moves_for(1))
+    cache.probe(1)
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.probe(1) is None
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+# ---------------------------------------------------------------------------
+# Hypothesis property-based tests
+# ---------------------------------------------------------------------------
+
+
+@settings(max_examples=50, deadline=None)
+@given(
+    policy=st.sampled_from(movecache.MOVE_CACHE_POLICIES),
+    capacity=st.integers(min_value=1, max_value=6),
+    keys=st.lists(st.integers(min_value=0, max_value=10), max_size=60),
+)
+def test_cache_stays_bounded_and_consistent(policy: str, capacity: int, keys: List[int]) -> None:
+    cache = movecache.MoveCache(capacity, policy)
+    for key in keys:
+        cached = cache.probe(key)
+        if cached is None:
+            cache.store(key, moves_for(key))
+        else:
+            assert cached == moves_for(key)
+        assert key in cache
+        assert len(cache) <= capacity
+    assert cache.hits + cache.misses == len(keys)
+
+
+@settings(max_examples=25, deadline=None)
+@given(st.lists(st.integers(min_value=0, max_value=255), min_size=1, max_size=8))
+def test_cached_moves_match_generator_along_random_lines(choices: List[int]) -> None:
+    cache = movecache.MoveCache(4, "clock")
+    position = logic.Position.from_fen(const.STARTING_FEN)
+    for choice in choices:
+        moves = cache.moves(position)
+        assert list(moves) == logic.generate_packed_moves(position, [])
+        if not moves:
+            break
+        logic.apply_move(position, moves[choice % len(moves)])
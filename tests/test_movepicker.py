@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from typing import List
+
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from rusttt import constants as const
+from rusttt import logic, movepicker
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+FENS = [
+    const.STARTING_FEN,
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+    "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+    # en passant that blocks a bishop check
+    "8/8/8/k7/2Pp4/8/8/4B2K b - c3 0 1",
+    # double check: only king moves
+    "4k3/8/8/8/8/5n2/8/r3K3 w - - 0 1",
+]
+
+
+def staged(fen: str, hash_move: int = 0) -> tuple[list[int], list[int]]:
+    picker = movepicker.MovePicker(logic.Position.from_fen(fen), hash_move)
+    moves: list[int] = []
+    stages: list[int] = []
+    for move in picker:
+        moves.append(move)
+        stages.append(picker.stage)
+    return moves, stages
+
+
+def legal(fen: str) -> list[int]:
+    return logic.generate_packed_moves(logic.Position.from_fen(fen), [])
+
+
+# ---------------------------------------------------------------------------
+# Deterministic unit tests
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize("fen", FENS)
+def test_picker_yields_every_legal_move_once(fen: str) -> None:
+    moves, _stages = staged(fen)
+    assert sorted(moves) == sorted(legal(fen))
+
+
+@pytest.mark.parametrize("fen", FENS)
+def test_stages_come_in_order_and_match_move_kinds(fen: str) -> None:
+    moves, stages = staged(fen)
+    assert stages == sorted(stages)
+    assert stages == [movepicker.move_stage(move) for move in moves]
+
+
+def test_en_passant_block_is_a_capture() -> None:
+    fen = FENS[5]
+    moves, stages = staged(fen)
+    ep = logic.encode_move(const.D4, const.C3, const.TAG_BLACKEP, const.BP)
+    assert ep in moves
+    assert stages[moves.index(ep)] == movepicker.STAGE_CAPTURES
+
+
+def test_captures_are_ordered_most_valuable_victim_first() -> None:
+    fen = "4k3/8/8/3q1r2/4P3/8/8/4K3 w - - 0 1"
+    moves, _stages = staged(fen)
+    assert [logic.decode_move(move)[1] for move in moves[:2]] == [const.D5, const.F5]
+
+
+def test_legal_hash_move_comes_first_and_only_once() -> None:
+    fen = FENS[1]
+    quiet = logic.encode_move(const.E1, const.G1, const.TAG_WCASTLEKS, const.WK)
+    moves, stages = staged(fen, quiet)
+    assert moves[0] == quiet
+    assert stages[0] == movepicker.STAGE_HASH_MOVE
+    assert moves.count(quiet) == 1
+    assert sorted(moves) == sorted(legal(fen))
+
+
+@pytest.mark.parametrize(
+    "hash_move",
+    [
+        logic.encode_move(const.E2, const.E4, const.TAG_DOUBLE_PAWN_WHITE, const.WP),  # blocked pawn
+        logic.encode_move(const.E1, const.D2, const.TAG_NONE, const.WK),  # own piece on the target
+        logic.encode_move(const.A1, const.A8, const.TAG_CAPTURE, const.WQ),  # wrong piece
+        12345,
+    ],
+)
+def test_illegal_hash_move_is_ignored(hash_move: int) -> None:
+    fen = FENS[1]
+    moves, stages = staged(fen, hash_move)
+    assert movepicker.STAGE_HASH_MOVE not in stages
+    assert sorted(moves) == sorted(legal(fen))
+
+
+def test_quiets_are_not_generated_before_captures_run_out() -> None:
+    picker = movepicker.MovePicker(logic.Position.from_fen(FENS[1]))
+    iterator = iter(picker)
+    first = next(iterator)
+    assert movepicker.move_stage(first) == movepicker.STAGE_CAPTURES
+    assert picker.stage == movepicker.STAGE_CAPTURES
+
+
+def test_picker_reports_done_after_the_last_move() -> None:
+    picker = movepicker.MovePicker(logic.Position.from_fen("7k/6Q1/6K1/8/8/8/8/8 b - - 0 1"))
+    assert list(picker) == []
+    assert picker.stage == movepicker.STAGE_DONE
+
+
+# ---------------------------------------------------------------------------
+# Hypothesis property-based tests
+# ---------------------------------------------------------------------------
+
+
+@settings(max_examples=30, deadline=None)
+@given(
+    choices=st.lists(st.integers(min_value=0, max_value=255), min_size=1, max_size=10),
+    hash_choice=st.integers(min_value=0, max_value=255),
+)
+def test_picker_matches_generator_along_random_lines(choices: List[int], hash_choice: int) -> None:
+    position = logic.Position.from_fen(FENS[1])
+    for choice in choices:
+        moves = logic.generate_packed_moves(position, [])
+        if not moves:
+            break
+        hash_move = moves[hash_choice % len(moves)]
+        picked = []
+        for move in movepicker.MovePicker(position, hash_move):
+            # Play every move as a search would; the picker must not mind.
+            context = logic.apply_move(position, move)
+            logic.undo_move(position, move, context)
+            picked.append(move)
+        assert picked[0] == hash_move
+        assert sorted(picked) == sorted(moves)
+        logic.apply_move(position, moves[choice % len(moves)])
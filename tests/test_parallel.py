@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import pytest
+
+from rusttt import constants as const, logic, parallel
+
+
+def starting_position() -> logic.Position:
+    position = logic.Position()
+    logic.set_starting_position(position)
+    return position
+
+
+def test_split_tasks_cover_every_node_at_split_ply() -> None:
+    position = starting_position()
+    tasks = parallel.split_tasks(position, 4, 2)
+    assert len(tasks) == 400
+    assert {root_index for root_index, _position, _depth in tasks} == set(range(20))
+    assert all(depth == 2 for _root, _position, depth in tasks)
+    # The parent position is left untouched.
+    assert position.piece_array == starting_position().piece_array
+
+
+def test_count_nodes_depth_zero_is_one() -> None:
+    assert parallel.count_nodes(starting_position(), 0, "python") == 1
+
+
+@pytest.mark.parametrize("backend", parallel.BACKENDS)
+def test_perft_parallel_matches_divide(backend: str) -> None:
+    results = parallel.perft_parallel(starting_position(), 3, jobs=2, backend=backend)
+    assert len(results) == 20
+    assert sum(nodes for _move, nodes in results) == 8902
+    by_move = {(move.starting, move.target): nodes for move, nodes in results}
+    assert by_move[(const.E2, const.E4)] == 600
+
+
+@pytest.mark.parametrize("split_ply", [1, 2, 3])
+def test_perft_parallel_split_points_agree(split_ply: int) -> None:
+    results = parallel.perft_parallel(starting_position(), 3, jobs=2, backend="python", split_ply=split_ply)
+    assert sum(nodes for _move, nodes in results) == 8902
+
+
+def test_perft_parallel_rejects_bad_arguments() -> None:
+    with pytest.raises(ValueError, match="backend"):
+        parallel.perft_parallel(starting_position(), 3, jobs=2, backend="cuda")
+    with pytest.raises(ValueError, match="Depth"):
+        parallel.perft_parallel(starting_position(), 0, jobs=2)
+
+
+def test_run_perft_parallel_prints_merged_divide(capsys: pytest.CaptureFixture[str]) -> None:
+    assert parallel.run_perft_parallel(starting_position(), 2, jobs=2, backend="python") == 400
+    out = capsys.readouterr().out
+    assert "e2e4: 20" in out
+    assert "Nodes: 400" in out
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import time
+from typing import List
+
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from rusttt import constants as const
+from rusttt import logic, search, transposition
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+ENDGAME = "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"
+BACK_RANK_MATE = "6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1"
+
+# Quiescence helpers build a Searcher per leaf; share one small table rather than allocate the default.
+SMALL_TABLE = transposition.TranspositionTable(0.01)
+
+
+def quiet_score(position: logic.Position, ply: int = 0) -> int:
+    return search.Searcher(position, table=SMALL_TABLE).quiescence(ply, -search.SCORE_INFINITE, search.SCORE_INFINITE)
+
+
+def minimax(position: logic.Position, depth: int, ply: int = 0) -> int:
+    """Plain negamax without pruning, scored like the search."""
+
+    if depth == 0:
+        return quiet_score(position, ply)
+    moves = logic.generate_packed_moves(position, [])
+    if not moves:
+        king = position.piece_array[const.WK if position.white_to_play else const.BK]
+        in_check = logic.attacked_squares(position, not position.white_to_play) & king
+        return -search.MATE_SCORE + ply if in_check else 0
+    best = -search.SCORE_INFINITE
+    for move in moves:
+        context = logic.apply_move(position, move)
+        best = max(best, -minimax(position, depth - 1, ply + 1))
+        logic.undo_move(position, move, context)
+    return best
+
+
+def play_line(position: logic.Position, line: tuple[int, ...]) -> None:
+    for move in line:
+        assert move in logic.generate_packed_moves(position, [])
+        logic.apply_move(position, move)
+
+
+# ---------------------------------------------------------------------------
+# Deterministic unit tests
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize(
+    ("move", "name"),
+    [
+        (logic.encode_move(const.E2, const.E4, const.TAG_DOUBLE_PAWN_WHITE, const.WP), "e2e4"),
+        (logic.encode_move(const.E1, const.G1, const.TAG_WCASTLEKS, const.WK), "e1g1"),
+        (logic.encode_move(const.B7, const.A8, const.TAG_W_CAPTURE_QUEEN_PROMOTION, const.WP), "b7a8q"),
+        (logic.encode_move(const.G2, const.G1, const.TAG_B_KNIGHT_PROMOTION, const.BP), "g2g1n"),
+    ],
+)
+def test_move_name(move: int, name: str) -> None:
+    assert logic.move_name(move) == name
+
+
+def test_evaluate_is_symmetric() -> None:
+    assert search.evaluate(logic.Position.from_fen(const.STARTING_FEN)) == 0
+    white = logic.Position.from_fen("4k3/8/8/8/8/8/8/R3K3 w - - 0 1")
+    black = logic.Position.from_fen("r3k3/8/8/8/8/8/8/4K3 b - - 0 1")
+    assert search.evaluate(white) == search.evaluate(black) > 0
+
+
+@pytest.mark.parametrize(
+    ("score", "name"),
+    [
+        (35, "cp 35"),
+        (search.MATE_SCORE - 1, "mate 1"),
+        (search.MATE_SCORE - 3, "mate 2"),
+        (-search.MATE_SCORE + 2, "mate -1"),
+    ],
+)
+def test_score_name(score: int, name: str) -> None:
+    assert search.score_name(score) == name
+
+
+def test_search_finds_back_rank_mate() -> None:
+    result = search.search(logic.Position.from_fen(BACK_RANK_MATE), depth=3)
+    assert logic.move_name(result.best_move) == "a1a8"
+    assert result.score == search.MATE_SCORE - 1
+    assert result.pv == (result.best_move,)
+
+
+@pytest.mark.parametrize(
+    ("fen", "score"),
+    [("7k/6Q1/6K1/8/8/8/8/8 b - - 0 1", -search.MATE_SCORE), ("k7/8/1Q6/8/8/8/8/7K b - - 0 1", 0)],
+)
+def test_search_without_legal_moves(fen: str, score: int) -> None:
+    result = search.search(logic.Position.from_fen(fen), depth=4)
+    assert (result.best_move, result.score, result.depth, result.pv) == (0, score, 1, ())
+
+
+def test_search_wins_hanging_queen() -> None:
+    result = search.search(logic.Position.from_fen("4k3/8/8/3q4/8/8/8/3RK3 w - - 0 1"), depth=2)
+    assert logic.move_name(result.best_move) == "d1d5"
+
+
+@pytest.mark.parametrize(("fen", "depth"), [(ENDGAME, 3), (const.STARTING_FEN, 3), (KIWIPETE, 2)])
+def test_alpha_beta_matches_minimax(fen: str, depth: int) -> None:
+    position = logic.Position.from_fen(fen)
+    result = search.search(position, depth=depth)
+    assert result.score == minimax(position, depth)
+
+    # The PV is a legal line that ends in the position the score was taken from.
+    assert len(result.pv) == depth
+    play_line(position, result.pv)
+    assert quiet_score(position, depth) == (result.score if depth % 2 == 0 else -result.score)
+
+
+def test_search_leaves_position_untouched() -> None:
+    position = logic.Position.from_fen(KIWIPETE)
+    search.search(position, depth=3)
+    assert position.to_fen() == KIWIPETE
+    assert position.hash_key == logic.Position.from_fen(KIWIPETE).hash_key
+
+
+def test_iterations_are_reported_in_order() -> None:
+    reports: list[search.SearchResult] = []
+    result = search.search(logic.Position.from_fen(const.STARTING_FEN), depth=3, on_iteration=reports.append)
+    assert [report.depth for report in reports] == [1, 2, 3]
+    assert [report.nodes for report in reports] == sorted(report.nodes for report in reports)
+    assert result.depth == 3
+    assert result.best_move == result.pv[0]
+    assert result.info_line().startswith("depth 3 score cp ")
+    assert f"nps {result.nps} " in result.info_line()
+
+
+def test_node_limit_stops_the_search() -> None:
+    result = search.search(logic.Position.from_fen(KIWIPETE), nodes=2_000)
+    assert 1 <= result.depth < search.MAX_PLY
+    assert result.nodes <= 2_000 + 1
+    assert result.best_move == result.pv[0]
+
+
+def test_time_limit_stops_the_search() -> None:
+    started = time.monotonic()
+    result = search.search(logic.Position.from_fen(KIWIPETE), movetime=0.2)
+    assert time.monotonic() - started < 2
+    assert result.depth >= 1
+    assert result.best_move
+
+
+def test_first_iteration_finishes_under_any_limit() -> None:
+    result = search.search(logic.Position.from_fen(KIWIPETE), nodes=1)
+    assert result.depth == 1
+    assert result.best_move
+
+
+def test_search_rejects_missing_or_bad_limits() -> None:
+    position = logic.Position.from_fen(const.STARTING_FEN)
+    with pytest.raises(ValueError, match="limit"):
+        search.search(position)
+    with pytest.raises(ValueError, match="depth"):
+        search.search(position, depth=0)
+
+
+def test_repetition_of_game_history_is_a_draw() -> None:
+    position = logic.Position.from_fen(const.STARTING_FEN)
+    keys = [position.hash_key]
+    for move in (
+        logic.encode_move(const.G1, const.F3, const.TAG_NONE, const.WN),
+        logic.encode_move(const.G8, const.F6, const.TAG_NONE, const.BN),
+        logic.encode_move(const.F3, const.G1, const.TAG_NONE, const.WN),
+        logic.encode_move(const.F6, const.G8, const.TAG_NONE, const.BN),
+    ):
+        logic.apply_move(position, move)
+        keys.append(position.hash_key)
+    assert search.Searcher(position, history=keys[:-1]).is_repetition()
+    assert not search.Searcher(position, history=keys[1:-1]).is_repetition()
+
+
+def test_reused_table_saves_work_on_the_next_search() -> None:
+    table = transposition.TranspositionTable(0.05)
+    position = logic.Position.from_fen(KIWIPETE)
+    first = search.search(position, depth=3, table=table)
+    second = search.search(position, depth=3, table=table)
+    assert second.nodes < first.nodes
+    assert (second.best_move, second.score) == (first.best_move, first.score)
+    assert second.hashfull > 0
+
+
+def test_table_stores_the_root_result() -> None:
+    table = transposition.TranspositionTable(1)
+    position = logic.Position.from_fen(KIWIPETE)
+    result = search.search(position, depth=3, table=table)
+    assert table.probe(position.hash_key) == (result.best_move, result.score, 3, transposition.BOUND_EXACT)
+
+
+@pytest.mark.parametrize("ply", [0, 5])
+@pytest.mark.parametrize("score", [0, 250, search.MATE_SCORE - 7, -search.MATE_SCORE + 4])
+def test_table_scores_round_trip(score: int, ply: int) -> None:
+    assert search.score_from_table(search.score_to_table(score, ply), ply) == score
+
+
+def test_mate_distance_survives_the_table() -> None:
+    # Later iterations reach the mating line through table hits; the distance must not drift.
+    reports: list[search.SearchResult] = []
+    search.search(logic.Position.from_fen("k7/8/2K5/8/8/8/8/7R w - - 0 1"), depth=6, on_iteration=reports.append)
+    assert [report.score for report in reports[3:]] == [search.MATE_SCORE - 3] * 3
+    assert [logic.move_name(move) for move in reports[-1].pv] == ["c6c7", "a8a7", "h1a1"]
+
+
+def test_quiescence_stands_pat_in_quiet_positions() -> None:
+    position = logic.Position.from_fen(const.STARTING_FEN)
+    searcher = search.Searcher(position, table=SMALL_TABLE)
+    assert searcher.quiescence(0, -search.SCORE_INFINITE, search.SCORE_INFINITE) == 0
+    assert searcher.nodes == 1
+
+
+def test_quiescence_resolves_hanging_pieces() -> None:
+    # Black to move wins the rook on d2, which nothing defends; the static score alone misses it.
+    position = logic.Position.from_fen("4k3/8/8/3r4/8/8/3R4/7K b - - 0 1")
+    static = search.evaluate(position)
+    capture = logic.encode_move(const.D5, const.D2, const.TAG_CAPTURE, const.BR)
+    context = logic.apply_move(position, capture)
+    won = -search.evaluate(position)
+    logic.undo_move(position, capture, context)
+    assert won > static + 400
+    assert quiet_score(position) == won
+
+
+def test_quiescence_skips_losing_captures() -> None:
+    # Qxd5 loses the queen to the pawn on e6, so it is never played.
+    position = logic.Position.from_fen("4k3/8/4p3/3p4/8/8/8/3QK3 w - - 0 1")
+    searcher = search.Searcher(position, table=SMALL_TABLE)
+    assert searcher.quiescence(0, -search.SCORE_INFINITE, search.SCORE_INFINITE) == search.evaluate(position)
+    assert searcher.nodes == 1
+
+
+def test_quiescence_searches_all_evasions_in_check() -> None:
+    assert quiet_score(logic.Position.from_fen("7k/6Q1/6K1/8/8/8/8/8 b - - 0 1"), 3) == -search.MATE_SCORE + 3
+    # Only the king can move, and only to a square where it is safe.
+    assert quiet_score(logic.Position.from_fen("4k3/8/8/8/8/8/8/R3K3 b - - 0 1")) < 0
+
+
+def test_search_sees_through_the_exchange_at_the_horizon() -> None:
+    # Nxd5 wins a pawn at depth 1 only if the recapture Rxd5 Rxd5 is seen to end the exchange.
+    result = search.search(logic.Position.from_fen("3rk3/8/8/3p4/8/2N5/8/3RK3 w - - 0 1"), depth=1)
+    assert logic.move_name(result.best_move) == "c3d5"
+
+
+def test_run_search_prints_info_and_best_move(capsys: pytest.CaptureFixture[str]) -> None:
+    search.run_search(logic.Position.from_fen(BACK_RANK_MATE), depth=2)
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith("info depth 1 ")
+    assert lines[-1] == "bestmove a1a8"
+
+
+# ---------------------------------------------------------------------------
+# Hypothesis property-based tests
+# ---------------------------------------------------------------------------
+
+
+@settings(max_examples=15, deadline=None)
+@given(st.lists(st.integers(min_value=0, max_value=255), min_size=1, max_size=8))
+def test_search_matches_minimax_along_random_lines(choices: List[int]) -> None:
+    position = logic.Position.from_fen(KIWIPETE)
+    for choice in choices:
+        moves = logic.generate_packed_moves(position, [])
+        if not moves:
+            break
+        logic.apply_move(position, moves[choice % len(moves)])
+
+    fen = position.to_fen()
+    result = search.search(position, depth=2)
+    assert position.to_fen() == fen
+    assert result.score == minimax(position, 2)
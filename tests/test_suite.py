@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from rusttt import suite
+
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq -"
+POSITION_3 = "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - -"
+
+SUITE_LINES = [
+    "# perft suite",
+    f"{KIWIPETE} ;D1 48 ;D2 2039 ;D3 97862",
+    "",
+    f"{POSITION_3} ;D1 14 ;D2 191 ;D3 2812",
+    "4k3/8/8/8/8/8/8/4K3 w - - 0 1 ;D1 5 ;D2 26",
+]
+
+
+def test_parse_epd_line_reads_counts() -> None:
+    entry = suite.parse_epd_line(f"{KIWIPETE} ;D1 48 ;D2 2039 ;", 7)
+    assert entry == suite.SuiteEntry(7, KIWIPETE, {1: 48, 2: 2039})
+
+
+@pytest.mark.parametrize("line", ["", "   ", "# comment"])
+def test_parse_epd_line_skips_blank_and_comment_lines(line: str) -> None:
+    assert suite.parse_epd_line(line) is None
+
+
+@pytest.mark.parametrize("line", [KIWIPETE, f"{KIWIPETE} ;D1 x", f"{KIWIPETE} ;bm e4", f"{KIWIPETE} ;D 4"])
+def test_parse_epd_line_rejects_records_without_counts(line: str) -> None:
+    with pytest.raises(ValueError, match="line 3"):
+        suite.parse_epd_line(line, 3)
+
+
+def test_read_epd_numbers_lines_from_one() -> None:
+    entries = list(suite.read_epd(SUITE_LINES))
+    assert [entry.line_number for entry in entries] == [2, 4, 5]
+
+
+@pytest.mark.parametrize(("jobs", "backend"), [(1, "python"), (2, "numba")])
+def test_check_suite_reports_in_input_order(jobs: int, backend: str) -> None:
+    results = list(suite.check_suite(suite.read_epd(SUITE_LINES), jobs, max_depth=2, backend=backend))
+    assert [result.entry.line_number for result in results] == [2, 4, 5]
+    assert [result.passed for result in results] == [True, True, False]
+    assert results[0].counts == {1: 48, 2: 2039}
+    assert results[2].counts == {1: 5, 2: 25}
+    assert results[0].nodes == 48 + 2039
+
+
+def test_run_perft_suite_prints_report(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    epd = tmp_path / "suite.epd"
+    epd.write_text("\n".join(SUITE_LINES[:4]))
+    assert suite.run_perft_suite(epd, jobs=1, backend="numba")
+    out = capsys.readouterr().out
+    assert f"PASS line 2: D1-D3 {48 + 2039 + 97862} nodes" in out
+    assert "Passed: 2/2" in out
+    assert "Nodes/second: " in out
+
+
+def test_run_perft_suite_lists_failing_depths(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    epd = tmp_path / "suite.epd"
+    epd.write_text(SUITE_LINES[-1])
+    assert not suite.run_perft_suite(epd, jobs=1)
+    out = capsys.readouterr().out
+    assert "FAIL line 1" in out
+    assert "D2: expected 26, got 25" in out
+    assert "Passed: 0/1" in out
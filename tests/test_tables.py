@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from rusttt import constants as const
+from rusttt import tables
+
+
+@pytest.fixture
+def cache_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setenv(tables.CACHE_DIR_ENV, str(tmp_path))
+    return tmp_path
+
+
+def counting_builder(calls: list[int]):
+    def build() -> dict[str, np.ndarray]:
+        calls.append(1)
+        return {"numbers": np.arange(8, dtype=np.uint64), "grid": np.ones((2, 3), dtype=np.uint64)}
+
+    return build
+
+
+def test_cache_dir_prefers_environment(cache_dir: Path) -> None:
+    assert tables.cache_dir() == cache_dir
+
+
+def test_cache_dir_falls_back_to_xdg(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.delenv(tables.CACHE_DIR_ENV, raising=False)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert tables.cache_dir() == tmp_path / "rusttt"
+
+
+def test_load_or_build_builds_once_then_memory_maps(cache_dir: Path) -> None:
+    calls: list[int] = []
+    first = tables.load_or_build("demo", "1", counting_builder(calls))
+    second = tables.load_or_build("demo", "1", counting_builder(calls))
+
+    assert calls == [1]
+    assert (cache_dir / "demo-v1" / "numbers.npy").exists()
+    assert isinstance(second["numbers"], np.memmap)
+    assert second["grid"].shape == (2, 3)
+    assert np.array_equal(first["numbers"], second["numbers"])
+
+
+def test_load_or_build_rebuilds_for_new_version(cache_dir: Path) -> None:
+    calls: list[int] = []
+    tables.load_or_build("demo", "1", counting_builder(calls))
+    tables.load_or_build("demo", "2", counting_builder(calls))
+    assert calls == [1, 1]
+    assert (cache_dir / "demo-v2").is_dir()
+
+
+def test_load_or_build_replaces_corrupt_cache(cache_dir: Path) -> None:
+    calls: list[int] = []
+    tables.load_or_build("demo", "1", counting_builder(calls))
+    (cache_dir / "demo-v1" / "numbers.npy").write_bytes(b"not an array")
+
+    arrays = tables.load_or_build("demo", "1", counting_builder(calls))
+    assert calls == [1, 1]
+    assert arrays["numbers"].tolist() == list(range(8))
+
+
+def test_load_or_build_falls_back_to_memory_when_unwritable(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    monkeypatch.setenv(tables.CACHE_DIR_ENV, str(blocker / "cache"))
+
+    calls: list[int] = []
+    arrays = tables.load_or_build("demo", "1", counting_builder(calls))
+    assert calls == [1]
+    assert not isinstance(arrays["numbers"], np.memmap)
+
+
+def test_geometry_leaper_tables() -> None:
+    geometry = tables.build_geometry()
+    assert int(geometry["knight_attacks"][const.A8]) == const.SQUARE_BBS[const.B6] | const.SQUARE_BBS[const.C7]
+    assert int(geometry["king_attacks"][const.H1]).bit_count() == 3
+    assert int(geometry["white_pawn_attacks"][const.E2]) == const.SQUARE_BBS[const.D3] | const.SQUARE_BBS[const.F3]
+    assert int(geometry["black_pawn_attacks"][const.A7]) == const.SQUARE_BBS[const.B6]
+    assert int(geometry["white_pawn_attacks"][const.E8]) == 0
+
+
+def test_geometry_inbetween_only_for_aligned_squares() -> None:
+    inbetween = tables.build_geometry()["inbetween"]
+    assert int(inbetween[const.A8, const.D8]) == (
+        const.SQUARE_BBS[const.B8] | const.SQUARE_BBS[const.C8] | const.SQUARE_BBS[const.D8]
+    )
+    assert int(inbetween[const.A1, const.H8]).bit_count() == 7
+    assert int(inbetween[const.C1, const.A8]) == 0
+    assert int(inbetween[const.E4, const.E4]) == 0
+
+
+def test_constants_expose_generated_tables_as_int_lists() -> None:
+    assert isinstance(const.KING_ATTACKS[0], int)
+    assert len(const.INBETWEEN_BITBOARDS) == 64
+    assert const.ROOK_ATTACKS[const.ROOK_UP][const.A1] == sum(
+        const.SQUARE_BBS[square] for square in range(const.A2, -1, -8)
+    )
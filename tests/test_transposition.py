@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+from typing import List
+
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from rusttt import constants as const
+from rusttt import logic, transposition
+from rusttt.transposition import BOUND_EXACT, BOUND_LOWER, BOUND_UPPER
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+E2E4 = logic.encode_move(const.E2, const.E4, const.TAG_DOUBLE_PAWN_WHITE, const.WP)
+G1F3 = logic.encode_move(const.G1, const.F3, const.TAG_NONE, const.WN)
+
+
+def bucket_mates(count: int) -> list[int]:
+    """Return ``count`` keys that share one bucket but differ in their stored top 16 bits."""
+
+    return [(check + 1) << 48 | 0x1234 for check in range(count)]
+
+
+# ---------------------------------------------------------------------------
+# Deterministic unit tests
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize("megabytes", [0.01, 1, 3.5])
+def test_table_stays_within_budget(megabytes: float) -> None:
+    table = transposition.TranspositionTable(megabytes)
+    assert table.nbytes <= megabytes * 1024 * 1024
+    assert len(table) == table.bucket_count * transposition.BUCKET_SIZE
+    assert table.entries.ctypes.data % transposition.BUCKET_BYTES == 0
+
+
+def test_table_rejects_tiny_budget() -> None:
+    with pytest.raises(ValueError, match="too small"):
+        transposition.TranspositionTable(0.00001)
+
+
+def test_store_and_probe_round_trip() -> None:
+    table = transposition.TranspositionTable(1)
+    key = 0xDEADBEEF12345678
+    assert table.probe(key) is None
+    table.store(key, E2E4, -31_990, 12, BOUND_LOWER)
+    assert table.probe(key) == (E2E4, -31_990, 12, BOUND_LOWER)
+    assert table.probe(key ^ 1 << 60) is None
+
+
+def test_store_accepts_move_tuples() -> None:
+    table = transposition.TranspositionTable(1)
+    table.store(7, logic.Move(*logic.decode_move(G1F3)), 15, 3, BOUND_EXACT)
+    assert table.probe(7) == (G1F3, 15, 3, BOUND_EXACT)
+
+
+def test_store_without_move_keeps_the_stored_move() -> None:
+    table = transposition.TranspositionTable(1)
+    table.store(7, G1F3, 15, 3, BOUND_EXACT)
+    table.store(7, 0, -40, 4, BOUND_UPPER)
+    assert table.probe(7) == (G1F3, -40, 4, BOUND_UPPER)
+
+
+def test_shallow_bound_does_not_overwrite_deep_entry() -> None:
+    table = transposition.TranspositionTable(1)
+    table.store(7, G1F3, 15, 8, BOUND_LOWER)
+    table.store(7, E2E4, 99, 2, BOUND_UPPER)
+    assert table.probe(7) == (G1F3, 15, 8, BOUND_LOWER)
+    table.store(7, E2E4, 99, 2, BOUND_EXACT)
+    assert table.probe(7) == (E2E4, 99, 2, BOUND_EXACT)
+
+
+def test_full_bucket_replaces_shallowest_entry() -> None:
+    table = transposition.TranspositionTable(1)
+    keys = bucket_mates(5)
+    assert len({table.bucket_start(key) for key in keys}) == 1
+    for depth, key in zip((5, 2, 7, 4), keys, strict=False):
+        table.store(key, E2E4, 0, depth, BOUND_EXACT)
+    table.store(keys[4], G1F3, 0, 1, BOUND_EXACT)
+    assert table.probe(keys[1]) is None
+    assert [table.probe(key) is not None for key in keys] == [True, False, True, True, True]
+
+
+def test_full_bucket_replaces_older_generation_first() -> None:
+    table = transposition.TranspositionTable(1)
+    keys = bucket_mates(5)
+    table.store(keys[0], E2E4, 0, 6, BOUND_EXACT)
+    table.new_search()
+    for key in keys[1:4]:
+        table.store(key, E2E4, 0, 3, BOUND_EXACT)
+    table.store(keys[4], G1F3, 0, 3, BOUND_EXACT)
+    assert table.probe(keys[0]) is None
+    assert all(table.probe(key) is not None for key in keys[1:])
+
+
+def test_probe_refreshes_the_age_of_an_entry() -> None:
+    table = transposition.TranspositionTable(1)
+    keys = bucket_mates(5)
+    for key in keys[:4]:
+        table.store(key, E2E4, 0, 3, BOUND_EXACT)
+    table.new_search()
+    assert table.probe(keys[0]) is not None
+    table.store(keys[4], G1F3, 0, 3, BOUND_EXACT)
+    assert table.probe(keys[0]) is not None
+    assert table.probe(keys[1]) is None
+
+
+def test_hashfull_counts_current_generation_only() -> None:
+    table = transposition.TranspositionTable(0.1)
+    assert table.hashfull() == 0
+    for bucket in range(transposition.HASHFULL_SAMPLE // transposition.BUCKET_SIZE):
+        # Keys whose low 32 bits land in the given bucket.
+        low = -(-(bucket << 32) // table.bucket_count)
+        for check in range(1, transposition.BUCKET_SIZE + 1):
+            table.store(check << 48 | low, E2E4, 0, 1, BOUND_EXACT)
+    assert table.hashfull() == 1000
+    table.new_search()
+    assert table.hashfull() == 0
+
+
+def test_clear_empties_the_table() -> None:
+    table = transposition.TranspositionTable(1)
+    table.store(7, G1F3, 15, 3, BOUND_EXACT)
+    table.new_search()
+    table.clear()
+    assert table.probe(7) is None
+    assert table.generation == 0
+
+
+def test_generation_wraps() -> None:
+    table = transposition.TranspositionTable(1)
+    for _ in range(transposition.GENERATIONS):
+        table.new_search()
+    assert table.generation == 0
+
+
+# ---------------------------------------------------------------------------
+# Hypothesis property-based tests
+# ---------------------------------------------------------------------------
+
+
+@settings(max_examples=50, deadline=None)
+@given(
+    st.lists(
+        st.tuples(
+            st.integers(min_value=0, max_value=(1 << 64) - 1),
+            st.integers(min_value=1, max_value=(1 << 21) - 1),
+            st.integers(min_value=-32_767, max_value=32_767),
+            st.integers(min_value=0, max_value=transposition.MAX_DEPTH),
+        ),
+        min_size=1,
+        max_size=40,
+    )
+)
+def test_exact_store_is_read_back(entries: List[tuple[int, int, int, int]]) -> None:
+    table = transposition.TranspositionTable(0.01)
+    for key, move, score, depth in entries:
+        table.store(key, move, score, depth, BOUND_EXACT)
+        assert table.probe(key) == (move, score, depth, BOUND_EXACT)
+    assert table.hashfull() <= 1000
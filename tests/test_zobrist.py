@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from rusttt import constants as const
+from rusttt import zobrist
+
+
+def all_keys() -> list[int]:
+    keys = [key for row in zobrist.PIECE_KEYS for key in row]
+    return [*keys, zobrist.SIDE_KEY, *zobrist.CASTLE_KEYS, *zobrist.EP_FILE_KEYS]
+
+
+def test_key_table_shapes() -> None:
+    assert len(zobrist.PIECE_KEYS) == 12
+    assert all(len(row) == 64 for row in zobrist.PIECE_KEYS)
+    assert len(zobrist.CASTLE_KEYS) == 4
+    assert len(zobrist.EP_FILE_KEYS) == 8
+    assert zobrist.PIECE_KEY_TABLE.shape == (12, 64)
+
+
+def test_keys_are_distinct_nonzero_64_bit_values() -> None:
+    keys = all_keys()
+    assert len(set(keys)) == len(keys)
+    assert all(0 < key < (1 << 64) for key in keys)
+
+
+def test_keys_are_stable_across_runs() -> None:
+    regenerated = zobrist._splitmix64(zobrist.ZOBRIST_SEED, len(all_keys()))
+    assert regenerated == all_keys()
+
+
+def test_array_tables_match_lists() -> None:
+    assert zobrist.PIECE_KEY_TABLE.tolist() == zobrist.PIECE_KEYS
+    assert zobrist.CASTLE_KEY_TABLE.tolist() == zobrist.CASTLE_KEYS
+    assert zobrist.EP_FILE_KEY_TABLE.tolist() == zobrist.EP_FILE_KEYS
+
+
+def test_compute_hash_of_empty_board() -> None:
+    empty = [0] * 12
+    assert zobrist.compute_hash(empty, True, 0, const.NO_SQUARE) == 0
+    assert zobrist.compute_hash(empty, False, 0, const.NO_SQUARE) == zobrist.SIDE_KEY
+
+
+def test_compute_hash_uses_ep_file_only() -> None:
+    empty = [0] * 12
+    assert zobrist.compute_hash(empty, True, 0, const.E3) == zobrist.EP_FILE_KEYS[4]
+    assert zobrist.compute_hash(empty, True, 0, const.E6) == zobrist.EP_FILE_KEYS[4]
+
+
+def test_compute_hash_xors_piece_keys() -> None:
+    piece_array = [0] * 12
+    piece_array[const.WQ] = const.SQUARE_BBS[const.D1] | const.SQUARE_BBS[const.H5]
+    expected = zobrist.PIECE_KEYS[const.WQ][const.D1] ^ zobrist.PIECE_KEYS[const.WQ][const.H5]
+    assert zobrist.compute_hash(piece_array, True, 0, const.NO_SQUARE) == expected
+
+
+def test_castle_mask_keys_fold_the_single_right_keys() -> None:
+    assert zobrist.CASTLE_MASK_KEYS[0] == 0
+    for mask in range(16):
+        expected = 0
+        for index in range(4):
+            if mask >> index & 1:
+                expected ^= zobrist.CASTLE_KEYS[index]
+        assert zobrist.CASTLE_MASK_KEYS[mask] == expected